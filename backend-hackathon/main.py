@@ -5,13 +5,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 import time
 
 # Import routers
-from routers import stt, tts, sign_output, session_log, dialogue, config
+from routers import stt, tts, sign_output, session_log, dialogue, config, metrics, gesture
 from models.schemas import HealthResponse
+from utils.audio_utils import MAX_AUDIO_SIZE_BYTES
+from utils.upload_limit import UploadSizeLimitMiddleware
 
 # Load environment variables
 load_dotenv()
@@ -27,20 +30,61 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Sign Language Interpreter API...")
     print(f"📍 Environment: {os.getenv('DEBUG', 'False')}")
     
+    from services.log_index import get_log_index
+    from services.log_writer import get_log_writer
+    from services.log_compactor import get_log_compactor
+    
+    # Index log lines written before the index existed (or before a crash)
+    log_index = get_log_index()
+    indexed = await asyncio.to_thread(log_index.sync_directory)
+    if indexed:
+        print(f"🗂️ Indexed {indexed} conversation log entries")
+    
+    log_writer = get_log_writer()
+    log_writer.start()
+    
+    # Roll finished daily log files into compressed segments in the background
+    log_compactor = get_log_compactor()
+    log_compactor.start()
+    
+    # Open upstream connections now so the first requests skip TCP/TLS setup
+    # (with COQUI_ENGINE=local this loads the TTS model in every worker instead)
+    from services.coqui_tts import get_coqui_service
+    from services.signall_sdk import get_signall_service
+    
+    await asyncio.gather(get_coqui_service().prewarm(), get_signall_service().prewarm())
+    
+    # Load and warm up the local STT model (STT_BACKEND=local) before the first request
+    from services.whisper_stt import warmup_whisper_service
+    
+    await warmup_whisper_service()
+    
     yield
     
     # Shutdown
     print("👋 Shutting down Sign Language Interpreter API...")
     
+    # Write out queued conversation logs before exiting
+    await log_compactor.stop()
+    await log_writer.stop()
+    log_index.close()
+    
     # Cleanup services
-    from services.coqui_tts import get_coqui_service
-    from services.signall_sdk import get_signall_service
+    from services.http_pool import close_upstream_clients
+    from services.transcript_cache import close_transcript_cache
+    from services.whisper_stt import close_whisper_service
+    from utils.audio_utils import shutdown_preprocess_pool
     
     coqui_service = get_coqui_service()
     await coqui_service.close()
     
     signall_service = get_signall_service()
     await signall_service.close()
+    
+    await close_upstream_clients()
+    await close_whisper_service()
+    close_transcript_cache()
+    shutdown_preprocess_pool()
 
 
 # Create FastAPI app
@@ -62,6 +106,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized audio uploads before they are spooled (allowing for multipart overhead)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=MAX_AUDIO_SIZE_BYTES + 64 * 1024,
+    path_prefixes=["/stt"]
+)
+
 # Include routers
 app.include_router(stt.router)
 app.include_router(tts.router)
@@ -69,6 +120,8 @@ app.include_router(sign_output.router)
 app.include_router(session_log.router)
 app.include_router(dialogue.router)
 app.include_router(config.router)
+app.include_router(metrics.router)
+app.include_router(gesture.router)
 
 
 @app.get("/", tags=["Root"])
@@ -91,10 +144,23 @@ async def health_check():
     
     uptime_str = f"{hours}h {minutes}m"
     
+    from services.coqui_tts import get_coqui_service
+    from services.signall_sdk import get_signall_service
+    
+    # Open circuits mean requests to that upstream currently fail fast (or fall back)
+    coqui_service = get_coqui_service()
+    circuits = {
+        "coqui": coqui_service.breaker.current_state(),
+        "signall": get_signall_service().breaker.current_state()
+    }
+    if coqui_service.hedger is not None:
+        circuits["coqui_hedge"] = coqui_service.hedge_breaker.current_state()
+    
     return HealthResponse(
         status="ok",
         uptime=uptime_str,
-        version="1.0.0"
+        version="1.0.0",
+        circuits=circuits
     )
 
 
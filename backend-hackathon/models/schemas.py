@@ -2,7 +2,7 @@
 Pydantic models for request/response validation
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -20,6 +20,48 @@ class TextToSpeechRequest(BaseModel):
         }
 
 
+class TextToSpeechBatchRequest(BaseModel):
+    """Request model for batched text-to-speech conversion"""
+    items: List[TextToSpeechRequest] = Field(..., min_length=1, max_length=100, description="Texts to synthesize")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"text": "Hello", "language": "en-US"},
+                    {"text": "Thank you for helping me.", "language": "en-US"}
+                ]
+            }
+        }
+
+
+class TextToSpeechBatchItem(BaseModel):
+    """Result of one batched text-to-speech item"""
+    index: int = Field(..., description="Position of the item in the request")
+    text: str = Field(..., description="Original text")
+    audio_base64: Optional[str] = Field(None, description="Base64 encoded WAV audio")
+    error: Optional[str] = Field(None, description="Error message if this item failed")
+
+
+class TextToSpeechBatchResponse(BaseModel):
+    """Response model for batched text-to-speech conversion"""
+    results: List[TextToSpeechBatchItem] = Field(..., description="Results in request order")
+    count: int = Field(..., description="Number of items")
+    failed: int = Field(..., description="Number of failed items")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "results": [
+                    {"index": 0, "text": "Hello", "audio_base64": "UklGRiQAAABXQVZFZm10...", "error": None},
+                    {"index": 1, "text": "Thank you for helping me.", "audio_base64": None, "error": "Coqui TTS error: timeout"}
+                ],
+                "count": 2,
+                "failed": 1
+            }
+        }
+
+
 class SpeechToTextResponse(BaseModel):
     """Response model for speech-to-text conversion"""
     transcript: str = Field(..., description="Transcribed text from audio")
@@ -48,16 +90,239 @@ class TextToSignRequest(BaseModel):
         }
 
 
+class SignClip(BaseModel):
+    """One clip of a sign language playlist"""
+    text: str = Field(..., description="Words covered by this clip")
+    video_url: str = Field(..., description="URL to the clip")
+    source: str = Field(..., description="'prerecorded' library phrase or 'fingerspell' placeholder")
+
+
 class TextToSignResponse(BaseModel):
     """Response model for text-to-sign conversion"""
     video_url: str = Field(..., description="URL to sign language video/animation")
     text: str = Field(..., description="Original text")
+    playlist: Optional[List[SignClip]] = Field(None, description="Ordered clips covering the text (pre-recorded fallback)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "video_url": "https://cdn.example.com/signs/default.mp4",
+                "text": "Hello, I need help",
+                "playlist": [
+                    {"text": "hello", "video_url": "https://cdn.example.com/signs/hello.mp4", "source": "prerecorded"},
+                    {"text": "i need help", "video_url": "https://cdn.example.com/signs/need_help.mp4", "source": "prerecorded"}
+                ]
+            }
+        }
+
+
+class TextToSignBatchRequest(BaseModel):
+    """Request model for batched text-to-sign conversion"""
+    items: List[TextToSignRequest] = Field(..., min_length=1, max_length=100, description="Texts to convert")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"text": "Hello", "language": "ASL"},
+                    {"text": "Where is the hospital?", "language": "ASL"}
+                ]
+            }
+        }
+
+
+class TextToSignBatchItem(BaseModel):
+    """Result of one batched text-to-sign item"""
+    index: int = Field(..., description="Position of the item in the request")
+    text: str = Field(..., description="Original text")
+    video_url: Optional[str] = Field(None, description="URL to sign language video/animation")
+    playlist: Optional[List[SignClip]] = Field(None, description="Ordered clips covering the text (pre-recorded fallback)")
+    error: Optional[str] = Field(None, description="Error message if this item failed")
+
+
+class TextToSignBatchResponse(BaseModel):
+    """Response model for batched text-to-sign conversion"""
+    results: List[TextToSignBatchItem] = Field(..., description="Results in request order")
+    count: int = Field(..., description="Number of items")
+    failed: int = Field(..., description="Number of failed items")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "results": [
+                    {"index": 0, "text": "Hello", "video_url": "https://cdn.example.com/signs/hello.mp4", "playlist": None, "error": None},
+                    {"index": 1, "text": "Where is the hospital?", "video_url": "https://cdn.example.com/signs/where_hospital.mp4", "playlist": None, "error": None}
+                ],
+                "count": 2,
+                "failed": 0
+            }
+        }
+
+
+class GestureClassifyRequest(BaseModel):
+    """Request model for classifying hand-landmark frames"""
+    frames: List[List[List[float]]] = Field(
+        ...,
+        min_length=1,
+        max_length=20000,
+        description="Frames of 21 MediaPipe hand landmarks, each [x, y, z] (or [x, y])"
+    )
+    include_fingers: bool = Field(default=False, description="Also return per-finger extension flags")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "frames": [[[0.5, 0.9, 0.0]] * 21],
+                "include_fingers": False
+            }
+        }
+
+
+class GestureClassifyResponse(BaseModel):
+    """Response model for hand-landmark classification"""
+    labels: List[Optional[str]] = Field(..., description="Gesture per frame ('Hello', 'Help' or null)")
+    fingers: Optional[List[List[bool]]] = Field(
+        None,
+        description="Extended flags per frame in order thumb, index, middle, ring, pinky"
+    )
+    count: int = Field(..., description="Number of frames")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "labels": ["Hello", None, "Help"],
+                "fingers": None,
+                "count": 3
+            }
+        }
+
+
+class GestureMatchRequest(BaseModel):
+    """Request model for matching frames against the handshape vocabulary"""
+    frames: List[List[List[float]]] = Field(
+        ...,
+        min_length=1,
+        max_length=20000,
+        description="Frames of 21 MediaPipe hand landmarks, each [x, y, z] (or [x, y])"
+    )
+    k: Optional[int] = Field(None, ge=1, le=50, description="Neighbours voting (defaults to GESTURE_KNN_K)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "frames": [[[0.5, 0.9, 0.0]] * 21],
+                "k": 5
+            }
+        }
+
+
+class GestureMatch(BaseModel):
+    """Nearest-neighbour match of one frame"""
+    label: Optional[str] = Field(None, description="Matched sign (null if no template is close enough)")
+    confidence: float = Field(..., description="Share of the distance-weighted neighbour vote (0-1)")
+    distance: Optional[float] = Field(None, description="Normalized distance to the nearest template")
+
+
+class GestureMatchResponse(BaseModel):
+    """Response model for handshape vocabulary matching"""
+    matches: List[GestureMatch] = Field(..., description="Match per frame")
+    count: int = Field(..., description="Number of frames")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "matches": [{"label": "Thank you", "confidence": 0.92, "distance": 0.14}],
+                "count": 1
+            }
+        }
+
+
+class GestureTemplateRequest(BaseModel):
+    """Request model for adding handshape templates"""
+    label: str = Field(..., min_length=1, max_length=64, description="Sign the frames show")
+    frames: List[List[List[float]]] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="Example frames of 21 MediaPipe hand landmarks, each [x, y, z] (or [x, y])"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "label": "Thank you",
+                "frames": [[[0.5, 0.9, 0.0]] * 21]
+            }
+        }
+
+
+class GestureTemplateResponse(BaseModel):
+    """Response model for adding handshape templates"""
+    label: str = Field(..., description="Sign the templates were added to")
+    added: int = Field(..., description="Number of templates added")
+    label_templates: int = Field(..., description="Templates now stored for the sign")
+    vocabulary: List[str] = Field(..., description="All known signs")
+
+
+class GestureSequenceMatchRequest(BaseModel):
+    """Request model for recognizing a sign from a landmark sequence"""
+    frames: List[List[List[float]]] = Field(
+        ...,
+        min_length=2,
+        max_length=900,
+        description="Consecutive frames of 21 MediaPipe hand landmarks, each [x, y, z] (or [x, y])"
+    )
+    k: int = Field(default=5, ge=1, le=20, description="Number of best-matching signs to return")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "frames": [[[0.5, 0.9, 0.0]] * 21] * 30,
+                "k": 3
+            }
+        }
+
+
+class GestureSequenceCandidate(BaseModel):
+    """One recorded sign matched against a landmark sequence"""
+    label: str = Field(..., description="Recorded sign")
+    distance: float = Field(..., description="DTW distance per step (lower is closer)")
+
+
+class GestureSequenceMatchResponse(BaseModel):
+    """Response model for sequence sign recognition"""
+    label: Optional[str] = Field(None, description="Best-matching sign (null if none is close enough)")
+    candidates: List[GestureSequenceCandidate] = Field(..., description="Top-k signs, best first")
+    count: int = Field(..., description="Number of frames")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "label": "Thank you",
+                "candidates": [
+                    {"label": "Thank you", "distance": 1.42},
+                    {"label": "Good", "distance": 3.1}
+                ],
+                "count": 30
+            }
+        }
+
+
+class GestureSequenceTemplateRequest(BaseModel):
+    """Request model for adding a recorded sign"""
+    label: str = Field(..., min_length=1, max_length=64, description="Sign the recording shows")
+    frames: List[List[List[float]]] = Field(
+        ...,
+        min_length=2,
+        max_length=900,
+        description="Consecutive frames of 21 MediaPipe hand landmarks covering one performance of the sign"
+    )
     
     class Config:
         json_schema_extra = {
             "example": {
-                "video_url": "https://cdn.example.com/signs/where_is_the_hospital.mp4",
-                "text": "Where is the hospital?"
+                "label": "Thank you",
+                "frames": [[[0.5, 0.9, 0.0]] * 21] * 30
             }
         }
 
@@ -90,7 +355,7 @@ class ConversationLogResponse(BaseModel):
     class Config:
         json_schema_extra = {
             "example": {
-                "status": "saved",
+                "status": "queued",
                 "log_id": "log_12345"
             }
         }
@@ -101,13 +366,15 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Server status")
     uptime: Optional[str] = Field(None, description="Server uptime")
     version: str = Field(default="1.0.0", description="API version")
+    circuits: Optional[Dict[str, str]] = Field(None, description="Circuit breaker state per upstream (closed, open, half_open)")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "status": "ok",
                 "uptime": "20h",
-                "version": "1.0.0"
+                "version": "1.0.0",
+                "circuits": {"coqui": "closed", "signall": "open"}
             }
         }
 
@@ -4,6 +4,7 @@ Configuration endpoint for server-side settings
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
 import os
+from services.stt_backends import stt_model_name
 
 router = APIRouter(prefix="/config", tags=["Configuration"])
 
@@ -51,9 +52,9 @@ async def get_config():
     - Enabled features
     """
     return ConfigResponse(
-        whisper_model="whisper-1",
+        whisper_model=stt_model_name(),
         coqui_server_url=os.getenv("COQUI_SERVER_URL", "http://localhost:5002"),
-        tts_model="tts_models/en/ljspeech/tacotron2-DDC",  # Default model
+        tts_model=os.getenv("COQUI_LOCAL_MODEL", "tts_models/en/ljspeech/tacotron2-DDC"),  # Default model
         api_version="1.0.0",
         features={
             "speech_to_text": True,
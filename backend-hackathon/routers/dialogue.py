@@ -1,14 +1,18 @@
 """
 Dialogue orchestration endpoint for end-to-end interactions
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import AsyncIterator, List, Optional, Literal, Tuple
 from models.schemas import ErrorResponse
 from services.whisper_stt import get_whisper_service
 from services.coqui_tts import get_coqui_service
-from fastapi.responses import Response
+from utils.circuit_breaker import CircuitOpenError
+from fastapi.responses import Response, StreamingResponse
+import base64
 import io
+import json
+import uuid
 
 router = APIRouter(prefix="/dialogue", tags=["Dialogue"])
 
@@ -41,24 +45,128 @@ class DialogueResponse(BaseModel):
         }
 
 
+# Response modes of POST /dialogue; the first is the legacy default
+_RESPONSE_MODES = ("application/json", "multipart/mixed", "application/x-ndjson", "text/event-stream")
+
+
+def _negotiate(accept: Optional[str]) -> str:
+    """
+    Pick the response mode from the Accept header (legacy JSON by default)
+    
+    Each mode takes the q-value of the most specific media range matching it
+    (exact type over type/* over */*). The highest q wins; ties go to the
+    more specific match, then to JSON. A mode with q=0 is never chosen.
+    """
+    ranges = []
+    for media_range in (accept or "").lower().split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if "/" not in media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_type, quality))
+    
+    best, best_key = "application/json", (0.0, 0, 1)
+    for mode in _RESPONSE_MODES:
+        main_type = mode.split("/")[0]
+        matches = [
+            (quality, specificity)
+            for media_type, quality in ranges
+            for pattern, specificity in ((mode, 2), (f"{main_type}/*", 1), ("*/*", 0))
+            if media_type == pattern
+        ]
+        if not matches:
+            continue
+        quality, specificity = max(matches, key=lambda match: match[1])
+        key = (quality, specificity, mode == "application/json")
+        if quality > 0 and key > best_key:
+            best, best_key = mode, key
+    return best
+
+
+def _multipart_mixed(parts: List[Tuple[str, bytes]]) -> Tuple[bytes, str]:
+    """
+    Encode parts as a multipart/mixed body
+    
+    Args:
+        parts: List of (content type, payload) pairs
+        
+    Returns:
+        Tuple of (body, boundary)
+    """
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for content_type, payload in parts:
+        body.write(f"--{boundary}\r\n".encode())
+        body.write(f"Content-Type: {content_type}\r\n".encode())
+        body.write(f"Content-Length: {len(payload)}\r\n\r\n".encode())
+        body.write(payload)
+        body.write(b"\r\n")
+    body.write(f"--{boundary}--\r\n".encode())
+    return body.getvalue(), boundary
+
+
+async def _dialogue_events(reply_text: str) -> AsyncIterator[Tuple[str, dict]]:
+    """Yield the reply text first, then the audio sentence by sentence as it is synthesized"""
+    yield "text", {"type": "text", "reply_text": reply_text}
+    
+    coqui_service = get_coqui_service()
+    index = 0
+    try:
+        async for audio_content in coqui_service.stream_speech(text=reply_text):
+            yield "audio", {
+                "type": "audio",
+                "index": index,
+                "audio_base64": base64.b64encode(audio_content).decode("utf-8")
+            }
+            index += 1
+    except Exception as e:
+        yield "error", {"type": "error", "detail": f"Audio synthesis failed: {str(e)}"}
+        return
+    
+    yield "done", {"type": "done", "audio_chunks": index}
+
+
 @router.post(
     "",
     response_model=DialogueResponse,
     responses={
+        200: {
+            "content": {
+                "multipart/mixed": {},
+                "application/x-ndjson": {},
+                "text/event-stream": {}
+            },
+            "description": "Reply in the format requested by the Accept header"
+        },
         400: {"model": ErrorResponse},
-        500: {"model": ErrorResponse}
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse}
     },
     summary="Orchestrate end-to-end dialogue",
     description="Handle complete user interaction with speech/text input and audio/text output"
 )
-async def dialogue_interaction(request: DialogueRequest):
+async def dialogue_interaction(
+    request: DialogueRequest,
+    accept: Optional[str] = Header(None)
+):
     """
     Orchestrate a complete dialogue interaction
     
     - **user_input**: User's input (text or reference to audio)
     - **mode**: Input mode ('speech' or 'text')
     
-    Returns text response and optional audio
+    The response format follows the Accept header:
+    - application/json (default): reply text with base64 audio
+    - multipart/mixed: a JSON part with the reply text, then raw WAV bytes
+    - application/x-ndjson or text/event-stream: the reply text immediately,
+      then base64 WAV chunks per sentence as they are synthesized
     """
     try:
         # For now, this is a simple echo/response system
@@ -67,12 +175,41 @@ async def dialogue_interaction(request: DialogueRequest):
         # Generate a simple response based on input
         reply_text = f"I understand you said: '{request.user_input}'. How can I assist you further?"
         
+        response_mode = _negotiate(accept)
+        
+        if response_mode == "application/x-ndjson":
+            async def ndjson_stream():
+                async for _, payload in _dialogue_events(reply_text):
+                    yield json.dumps(payload) + "\n"
+            
+            return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+        
+        if response_mode == "text/event-stream":
+            async def sse_stream():
+                async for event, payload in _dialogue_events(reply_text):
+                    yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            
+            return StreamingResponse(
+                sse_stream(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache"}
+            )
+        
         # Generate audio response using Coqui TTS
         coqui_service = get_coqui_service()
         audio_content = await coqui_service.synthesize_speech(text=reply_text)
         
-        # Convert audio to base64 for JSON response
-        import base64
+        if response_mode == "multipart/mixed":
+            body, boundary = _multipart_mixed([
+                ("application/json", json.dumps({"reply_text": reply_text}).encode("utf-8")),
+                ("audio/wav", audio_content)
+            ])
+            return Response(
+                content=body,
+                media_type=f'multipart/mixed; boundary="{boundary}"'
+            )
+        
+        # Convert audio to base64 for JSON response (legacy clients)
         audio_base64 = base64.b64encode(audio_content).decode('utf-8')
         
         return DialogueResponse(
@@ -80,6 +217,12 @@ async def dialogue_interaction(request: DialogueRequest):
             reply_audio_base64=audio_base64
         )
     
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Dialogue processing failed: {str(e)}",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
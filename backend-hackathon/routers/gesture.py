@@ -0,0 +1,349 @@
+"""
+Gesture recognition endpoints over MediaPipe hand landmarks
+"""
+from collections import deque
+from fastapi import APIRouter, HTTPException, WebSocket
+import asyncio
+import os
+from models.schemas import (
+    GestureClassifyRequest,
+    GestureClassifyResponse,
+    GestureMatch,
+    GestureMatchRequest,
+    GestureMatchResponse,
+    GestureSequenceCandidate,
+    GestureSequenceMatchRequest,
+    GestureSequenceMatchResponse,
+    GestureSequenceTemplateRequest,
+    GestureTemplateRequest,
+    GestureTemplateResponse,
+    ErrorResponse
+)
+from services.gesture_templates import get_template_store
+from services.sign_sequences import get_sequence_library
+from utils.gesture import (
+    GestureSmoother,
+    as_landmark_array,
+    finger_extension,
+    gesture_codes,
+    gesture_labels,
+    parse_landmark_message
+)
+
+router = APIRouter(prefix="/gesture", tags=["Gesture Recognition"])
+
+# Frame labelling methods of the /gesture/ws stream
+STREAM_METHODS = ("rules", "knn", "dtw")
+
+
+@router.post(
+    "/classify",
+    response_model=GestureClassifyResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Classify hand-landmark frames",
+    description="Label a batch of hand-landmark frames with the same rules as the mobile app"
+)
+async def classify_gestures(request: GestureClassifyRequest):
+    """
+    Classify hand-landmark frames in one vectorized pass
+    
+    - **frames**: N frames of 21 landmarks, each [x, y, z] (z may be omitted)
+    - **include_fingers**: Also return which fingers are extended per frame
+    
+    Uses the finger-extension rules of lib/gesture.ts, so labels match what
+    the app computes on device. Returns one label per frame.
+    """
+    try:
+        frames = as_landmark_array(request.frames)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        extended = finger_extension(frames)
+        codes = gesture_codes(extended)
+        
+        return GestureClassifyResponse(
+            labels=gesture_labels(codes),
+            fingers=extended.tolist() if request.include_fingers else None,
+            count=len(frames)
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to classify gestures: {str(e)}"
+        )
+
+
+@router.post(
+    "/match",
+    response_model=GestureMatchResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Match frames against the handshape vocabulary",
+    description="Label hand-landmark frames by their nearest recorded handshape templates"
+)
+async def match_gestures(request: GestureMatchRequest):
+    """
+    Classify frames by k-nearest neighbours over the template store
+    
+    - **frames**: N frames of 21 landmarks, each [x, y, z] (z may be omitted)
+    - **k**: Neighbours voting (defaults to GESTURE_KNN_K)
+    
+    Frames are compared after moving the wrist to the origin and scaling the
+    hand to unit palm size, so any sign added through POST /gesture/templates
+    is recognized. A frame gets no label when its nearest template is farther
+    than GESTURE_KNN_MAX_DISTANCE.
+    """
+    try:
+        labels, confidences, distances = get_template_store().classify(request.frames, k=request.k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to match gestures: {str(e)}"
+        )
+    
+    return GestureMatchResponse(
+        matches=[
+            GestureMatch(
+                label=label,
+                confidence=round(confidence, 3),
+                distance=round(distance, 4) if distance != float("inf") else None
+            )
+            for label, confidence, distance in zip(labels, confidences.tolist(), distances.tolist())
+        ],
+        count=len(labels)
+    )
+
+
+@router.post(
+    "/templates",
+    response_model=GestureTemplateResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Add handshape templates",
+    description="Teach the vocabulary a new sign (or more examples of one) from landmark frames"
+)
+async def add_gesture_templates(request: GestureTemplateRequest):
+    """
+    Add example frames of a sign to the template store
+    
+    - **label**: Sign the frames show
+    - **frames**: Example frames of 21 landmarks, each [x, y, z]
+    
+    Templates are appended to GESTURE_TEMPLATES_PATH and used by the next
+    match. A handful of frames from different signers and angles per sign
+    makes matching much more robust than one.
+    """
+    store = get_template_store()
+    label = request.label.strip()
+    if not label:
+        raise HTTPException(status_code=400, detail="Label must not be blank")
+    
+    try:
+        # Appending and rebuilding the matrix is file I/O and copying; keep it off the event loop
+        label_templates = await asyncio.to_thread(store.add, label, request.frames)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to add gesture templates: {str(e)}"
+        )
+    
+    return GestureTemplateResponse(
+        label=label,
+        added=len(request.frames),
+        label_templates=label_templates,
+        vocabulary=store.labels
+    )
+
+
+@router.post(
+    "/sequence/match",
+    response_model=GestureSequenceMatchResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Recognize a sign from a landmark sequence",
+    description="Match a window of hand-landmark frames against recorded sign motions with pruned DTW"
+)
+async def match_gesture_sequence(request: GestureSequenceMatchRequest):
+    """
+    Rank recorded signs by dynamic time warping distance to a landmark sequence
+    
+    - **frames**: Consecutive frames of 21 landmarks, each [x, y, z]
+    - **k**: Number of best-matching signs to return
+    
+    Captures signs defined by motion, which the per-frame rules cannot.
+    Sequences are compared by handshape and wrist trajectory, so different
+    hand positions, sizes and signing speeds match the same recording.
+    """
+    try:
+        # DTW over the whole library is CPU-bound; run it in a worker thread
+        candidates = await asyncio.to_thread(get_sequence_library().match, request.frames, request.k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to match gesture sequence: {str(e)}"
+        )
+    
+    return GestureSequenceMatchResponse(
+        label=candidates[0][0] if candidates else None,
+        candidates=[
+            GestureSequenceCandidate(label=label, distance=round(distance, 4))
+            for label, distance in candidates
+        ],
+        count=len(request.frames)
+    )
+
+
+@router.post(
+    "/sequence/templates",
+    response_model=GestureTemplateResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Add a recorded sign",
+    description="Teach the sequence recognizer a sign (or another performance of one) from landmark frames"
+)
+async def add_gesture_sequence(request: GestureSequenceTemplateRequest):
+    """
+    Add one recorded performance of a sign to the sequence library
+    
+    - **label**: Sign the recording shows
+    - **frames**: Consecutive frames covering the sign from start to end
+    
+    The recording is appended to GESTURE_SEQUENCES_PATH and used by the next
+    match. Trim the recording to the sign itself; a few performances per
+    sign make recognition more robust.
+    """
+    library = get_sequence_library()
+    label = request.label.strip()
+    if not label:
+        raise HTTPException(status_code=400, detail="Label must not be blank")
+    
+    try:
+        label_templates = await asyncio.to_thread(library.add, label, request.frames)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to add gesture sequence: {str(e)}"
+        )
+    
+    return GestureTemplateResponse(
+        label=label,
+        added=1,
+        label_templates=label_templates,
+        vocabulary=library.labels
+    )
+
+
+@router.websocket("/ws")
+async def gesture_stream(
+    websocket: WebSocket,
+    window: int = 15,
+    method: str = "rules"
+):
+    """
+    Stream hand landmarks and receive stable gesture changes
+    
+    The client sends binary messages: an 8-byte little-endian header
+    (uint8 version = 1, one reserved byte, uint16 frame count, uint32
+    sequence number) followed by frame count x 21 x 3 float32 values
+    (x, y, z per landmark). A count of 0 means no hand is visible. Frames
+    are labelled as in POST /gesture/classify (method=rules) or POST
+    /gesture/match (method=knn). With method=dtw, the last
+    GESTURE_DTW_WINDOW frames are matched as in POST /gesture/sequence/match
+    every GESTURE_DTW_STRIDE frames, and each frame takes the latest result.
+    Labels are smoothed over the last `window` frames (majority vote with
+    hysteresis). The server pushes JSON messages only when the stable label
+    changes:
+    
+    - {"type": "label", "label": "Hello" | "Help" | ... | null, "sequence": n, "confidence": 0.8}
+    - {"type": "error", "detail": "..."} for malformed messages or failed
+      recognition (the stream continues)
+    
+    A text message "end" closes the connection. An unknown method is
+    reported as an error and the connection is closed with code 1008.
+    """
+    await websocket.accept()
+    if method not in STREAM_METHODS:
+        await websocket.send_json({
+            "type": "error",
+            "detail": f"Unknown method '{method}' (expected one of: {', '.join(STREAM_METHODS)})"
+        })
+        await websocket.close(code=1008)
+        return
+    
+    store = get_template_store() if method == "knn" else None
+    library = get_sequence_library() if method == "dtw" else None
+    smoother = GestureSmoother(window=min(max(window, 1), 300))
+    # Sliding window of recent frames for method=dtw
+    recent = deque(maxlen=max(2, int(os.getenv("GESTURE_DTW_WINDOW", "45"))))
+    stride = max(1, int(os.getenv("GESTURE_DTW_STRIDE", "3")))
+    since_match = 0
+    sequence_label = None
+    
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        
+        data = message.get("bytes")
+        if data is None:
+            if (message.get("text") or "").strip().lower() == "end":
+                await websocket.close()
+                return
+            continue
+        
+        try:
+            sequence, frames = parse_landmark_message(data)
+            
+            if not len(frames):
+                labels = [None]
+                recent.clear()
+                sequence_label = None
+            elif library is not None:
+                labels = []
+                for frame in frames:
+                    recent.append(frame)
+                    since_match += 1
+                    if len(recent) == recent.maxlen and since_match >= stride:
+                        since_match = 0
+                        # DTW over a large library takes milliseconds; keep it off the event loop
+                        candidates = await asyncio.to_thread(library.match, list(recent), 1)
+                        sequence_label = candidates[0][0] if candidates else None
+                    labels.append(sequence_label)
+            elif store is not None:
+                labels = store.classify(frames)[0]
+            else:
+                labels = gesture_labels(gesture_codes(finger_extension(frames)))
+        except Exception as e:
+            # A bad message or recognizer failure must not end the stream
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            continue
+        
+        for label in labels:
+            if smoother.push(label):
+                await websocket.send_json({
+                    "type": "label",
+                    "label": smoother.label,
+                    "sequence": sequence,
+                    "confidence": round(smoother.confidence(), 3)
+                })
@@ -0,0 +1,74 @@
+"""
+Runtime metrics endpoint for caches and upstream services
+"""
+from fastapi import APIRouter
+import asyncio
+from services.coqui_tts import get_coqui_service
+from services.http_pool import upstream_stats
+from services.signall_sdk import get_signall_service
+from services.gesture_templates import get_template_store
+from services.sign_sequences import get_sequence_library
+from services.transcript_cache import get_transcript_cache
+from services.whisper_stt import get_whisper_service
+from services.log_writer import get_log_writer
+from services.log_compactor import get_log_compactor
+from utils.audio_utils import preprocess_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get(
+    "",
+    summary="Get runtime metrics",
+    description="Returns in-process counters for caches and upstream services"
+)
+async def get_metrics():
+    """
+    Get runtime metrics
+    
+    Returns counters for:
+    - TTS audio cache (hits, misses, evictions, size)
+    - Coalesced in-flight upstream requests per service
+    - Hedged Coqui requests (when COQUI_HEDGE_SERVER_URL is set)
+    - Local Coqui worker processes (when COQUI_ENGINE=local)
+    - SignAll result cache (fresh/stale/negative hits, hit ratio)
+    - Upstream connection pools (open/idle connections, saturation)
+    - Circuit breakers per upstream (state, rolling failure rate)
+    - Speech-to-Text backend (queue depth, active calls or batch sizes, timeouts)
+    - Audio preprocessing before transcription (size reduction)
+    - Persistent transcript cache (hits, misses, size, evictions)
+    - Handshape template vocabulary (signs, templates)
+    - Sequence sign recognizer (recordings, DTW pruning, match time)
+    - Conversation log writer (queue depth, flush latency)
+    - Conversation log compaction (segments, bytes before/after)
+    """
+    coqui_service = get_coqui_service()
+    signall_service = get_signall_service()
+    transcript_cache = get_transcript_cache()
+    
+    try:
+        stt_stats = get_whisper_service().stats()
+    except ValueError:
+        # Whisper is not configured (no API key, or unknown STT_BACKEND)
+        stt_stats = None
+    
+    return {
+        "tts_cache": coqui_service.cache.stats(),
+        "coqui_inflight": coqui_service.inflight.stats(),
+        "coqui_hedging": coqui_service.hedger.stats() if coqui_service.hedger else None,
+        "coqui_engine": coqui_service.local_engine.stats() if coqui_service.local_engine else None,
+        "signall_inflight": signall_service.inflight.stats(),
+        "signall_cache": signall_service.cache_stats(),
+        "upstream_pools": upstream_stats(),
+        "circuit_breakers": {
+            "coqui": coqui_service.breaker.stats(),
+            "signall": signall_service.breaker.stats()
+        },
+        "stt_executor": stt_stats,
+        "audio_preprocess": preprocess_stats(),
+        "stt_cache": transcript_cache.stats() if transcript_cache else None,
+        "gesture_templates": get_template_store().stats(),
+        "gesture_sequences": get_sequence_library().stats(),
+        "log_writer": get_log_writer().stats(),
+        "log_compactor": await asyncio.to_thread(get_log_compactor().stats)
+    }
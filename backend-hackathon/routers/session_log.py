@@ -1,25 +1,26 @@
 """
 Conversation logging API endpoints
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from models.schemas import ConversationLogRequest, ConversationLogResponse, ErrorResponse
-from typing import List
+from services.log_writer import get_log_writer
+from services.log_index import get_log_index
+from typing import Optional
+import asyncio
 import json
-import os
 from datetime import datetime
 import uuid
 
 router = APIRouter(prefix="/log", tags=["Logging"])
 
-# Simple file-based storage for MVP (replace with database in production)
-LOGS_DIR = "conversation_logs"
-
 
 @router.post(
     "",
     response_model=ConversationLogResponse,
     responses={
-        500: {"model": ErrorResponse}
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse}
     },
     summary="Log conversation interaction",
     description="Save conversation data for analytics and learning"
@@ -34,12 +35,10 @@ async def log_conversation(request: ConversationLogRequest):
     - **timestamp**: Conversation timestamp
     - **session_id**: Unique session identifier
     
-    Returns confirmation of saved log
+    Returns confirmation that the log was queued; it is written to disk by
+    the background log writer within LOG_FLUSH_INTERVAL_MS
     """
     try:
-        # Create logs directory if it doesn't exist
-        os.makedirs(LOGS_DIR, exist_ok=True)
-        
         # Generate unique log ID
         log_id = str(uuid.uuid4())
         
@@ -53,18 +52,20 @@ async def log_conversation(request: ConversationLogRequest):
             "session_id": request.session_id
         }
         
-        # Save to file (in production, use database)
+        # Queue for the background writer (in production, use database)
         log_filename = f"{request.session_id}_{datetime.utcnow().strftime('%Y%m%d')}.jsonl"
-        log_path = os.path.join(LOGS_DIR, log_filename)
-        
-        with open(log_path, 'a') as f:
-            f.write(json.dumps(log_entry) + '\n')
+        get_log_writer().enqueue(log_filename, log_entry)
         
         return ConversationLogResponse(
-            status="saved",
+            status="queued",
             log_id=log_id
         )
     
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Conversation log queue is full, try again later"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -77,33 +78,37 @@ async def log_conversation(request: ConversationLogRequest):
     summary="Get conversation history",
     description="Retrieve conversation logs for a session"
 )
-async def get_conversation_history(session_id: str):
+async def get_conversation_history(
+    session_id: str,
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of entries to return"),
+    since: Optional[datetime] = Query(None, description="Only entries with a timestamp at or after this time"),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page")
+):
     """
     Retrieve conversation history for a session
     
-    - **session_id**: Session identifier
+    - **session_id**: Session identifier (exact match)
+    - **limit**: Page size
+    - **since**: Optional lower bound on the entry timestamp
+    - **cursor**: Continue after the previous page
     
-    Returns list of conversation logs
+    Returns a page of conversation logs in the order they were written and
+    a next_cursor (null on the last page)
     """
     try:
-        # Find log files for this session
-        logs = []
-        
-        if not os.path.exists(LOGS_DIR):
-            return {"session_id": session_id, "logs": []}
+        # Make entries queued before this request visible
+        await get_log_writer().flush()
         
-        for filename in os.listdir(LOGS_DIR):
-            if filename.startswith(session_id):
-                log_path = os.path.join(LOGS_DIR, filename)
-                with open(log_path, 'r') as f:
-                    for line in f:
-                        if line.strip():
-                            logs.append(json.loads(line))
+        # Look up byte ranges in the index and read only those
+        logs, next_cursor = await asyncio.to_thread(
+            get_log_index().query, session_id, limit, since, cursor
+        )
         
         return {
             "session_id": session_id,
             "logs": logs,
-            "count": len(logs)
+            "count": len(logs),
+            "next_cursor": next_cursor
         }
     
     except Exception as e:
@@ -111,3 +116,40 @@ async def get_conversation_history(session_id: str):
             status_code=500,
             detail=f"Failed to retrieve conversation history: {str(e)}"
         )
+
+
+@router.get(
+    "/{session_id}/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "All entries of the session, one JSON object per line"
+        }
+    },
+    summary="Export conversation history",
+    description="Stream every log entry of a session as NDJSON"
+)
+async def export_conversation_history(session_id: str):
+    """
+    Export the full conversation history of a session
+    
+    - **session_id**: Session identifier (exact match)
+    
+    Returns all entries as newline-delimited JSON, read sequentially from
+    daily files and compacted segments
+    """
+    await get_log_writer().flush()
+    
+    def lines():
+        for entry in get_log_index().scan(session_id):
+            yield json.dumps(entry) + "\n"
+    
+    # Starlette iterates synchronous generators in a worker thread
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="{session_id}.jsonl"'
+        }
+    )
@@ -1,9 +1,19 @@
 """
 Text-to-Sign API endpoints
 """
-from fastapi import APIRouter, HTTPException
-from models.schemas import TextToSignRequest, TextToSignResponse, ErrorResponse
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from models.schemas import (
+    TextToSignRequest,
+    TextToSignResponse,
+    TextToSignBatchRequest,
+    TextToSignBatchItem,
+    TextToSignBatchResponse,
+    ErrorResponse
+)
 from services.signall_sdk import get_signall_service
+from utils.batch import iter_batch, run_batch
 
 router = APIRouter(prefix="/translate-sign", tags=["Sign Language Output"])
 
@@ -25,7 +35,8 @@ async def text_to_sign(request: TextToSignRequest):
     - **text**: Text to convert to sign language
     - **language**: Sign language type (ASL, Arabic Sign Language)
     
-    Returns URL to sign language video or animation
+    Returns URL to sign language video or animation, plus an ordered clip
+    playlist when served from the pre-recorded library
     """
     try:
         # Get SignAll service
@@ -39,7 +50,8 @@ async def text_to_sign(request: TextToSignRequest):
         
         return TextToSignResponse(
             video_url=result["video_url"],
-            text=request.text
+            text=request.text,
+            playlist=result.get("playlist")
         )
     
     except Exception as e:
@@ -47,3 +59,78 @@ async def text_to_sign(request: TextToSignRequest):
             status_code=500,
             detail=f"Failed to generate sign language output: {str(e)}"
         )
+
+
+@router.post(
+    "/batch",
+    response_model=TextToSignBatchResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "Per-item results (NDJSON in completion order when requested via Accept)"
+        },
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Convert a batch of texts to sign language",
+    description="Convert many texts in one request with bounded concurrency and per-item errors"
+)
+async def text_to_sign_batch(
+    request: TextToSignBatchRequest,
+    accept: Optional[str] = Header(None)
+):
+    """
+    Convert a batch of texts to sign language video/animation
+    
+    - **items**: Texts and sign language types (duplicates are converted once)
+    
+    Returns a video URL (and playlist when pre-recorded) per item in request
+    order. A failed item carries an error instead. With
+    `Accept: application/x-ndjson` each result is streamed as one line as
+    soon as it is ready.
+    """
+    signall_service = get_signall_service()
+    items = request.items
+    
+    def key(item: TextToSignRequest) -> tuple:
+        return " ".join(item.text.lower().split()), item.language
+    
+    async def convert(item: TextToSignRequest) -> dict:
+        return await signall_service.text_to_sign(text=item.text, language=item.language)
+    
+    def result_item(index: int, result: Optional[dict], error: Optional[Exception]) -> TextToSignBatchItem:
+        if error:
+            return TextToSignBatchItem(
+                index=index,
+                text=items[index].text,
+                error=f"Failed to generate sign language output: {str(error)}"
+            )
+        return TextToSignBatchItem(
+            index=index,
+            text=items[index].text,
+            video_url=result["video_url"],
+            playlist=result.get("playlist")
+        )
+    
+    if "application/x-ndjson" in (accept or "").lower():
+        async def ndjson_stream():
+            async for indices, result, error in iter_batch(items, key, convert):
+                for index in indices:
+                    yield result_item(index, result, error).model_dump_json() + "\n"
+        
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+    
+    try:
+        outcomes = await run_batch(items, key, convert)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate sign language batch: {str(e)}"
+        )
+    
+    results = [result_item(index, result, error) for index, (result, error) in enumerate(outcomes)]
+    return TextToSignBatchResponse(
+        results=results,
+        count=len(results),
+        failed=sum(1 for result in results if result.error)
+    )
@@ -1,19 +1,32 @@
 """
 Speech-to-Text API endpoints using OpenAI Whisper
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, WebSocket
+from typing import Optional, Set
 from models.schemas import SpeechToTextResponse, ErrorResponse
+from services.stt_backends import stt_model_name
+from services.transcript_cache import get_transcript_cache, transcript_key
 from services.whisper_stt import get_whisper_service
-from utils.audio_utils import validate_audio_file
+from utils.audio_utils import validate_audio_file, pcm_to_wav, preprocess_for_stt, wav_pcm16_mono
+from utils.vad import VADSegmenter
+import asyncio
+import os
 
 router = APIRouter(prefix="/stt", tags=["Speech Recognition"])
 
+STREAM_SAMPLE_RATE = 16000
+# Seconds of new speech between partial transcripts of an open utterance
+PARTIAL_INTERVAL_SECONDS = float(os.getenv("STT_WS_PARTIAL_INTERVAL_SECONDS", "2.0"))
+# Uploads longer than this are transcribed in parallel chunks unless long_audio=false
+LONG_AUDIO_SECONDS = float(os.getenv("STT_LONG_AUDIO_SECONDS", "60"))
+
 
 @router.post(
     "",
     response_model=SpeechToTextResponse,
     responses={
         400: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
         500: {"model": ErrorResponse}
     },
     summary="Convert speech to text",
@@ -21,13 +34,21 @@ router = APIRouter(prefix="/stt", tags=["Speech Recognition"])
 )
 async def speech_to_text(
     audio_file: UploadFile = File(..., description="Audio file (.wav, .mp3, .m4a, .ogg, .flac)"),
-    language: str = Query(None, description="Optional language code (e.g., 'en', 'ar'). Auto-detected if not provided.")
+    language: str = Query(None, description="Optional language code (e.g., 'en', 'ar'). Auto-detected if not provided."),
+    long_audio: Optional[bool] = Query(None, description="Transcribe in parallel chunks (default: automatic for long recordings)"),
+    prompt: Optional[str] = Query(None, description="Optional text to guide transcription (names, spelling)")
 ):
     """
     Convert speech audio to text using OpenAI Whisper API
     
     - **audio_file**: Audio file to transcribe
     - **language**: Optional language code (auto-detected if not provided)
+    - **long_audio**: Force (true) or disable (false) chunked transcription;
+      by default recordings longer than STT_LONG_AUDIO_SECONDS are chunked
+    - **prompt**: Optional text guiding transcription
+    
+    Repeated audio (same samples, language and prompt) is answered from the
+    transcript cache without calling Whisper.
     
     Returns the transcribed text and detected language
     """
@@ -35,15 +56,47 @@ async def speech_to_text(
         # Validate audio file
         audio_content = await validate_audio_file(audio_file)
         
-        # Get Whisper service
-        whisper_service = get_whisper_service()
+        # Downmix to 16 kHz mono and trim silence so far less audio is uploaded
+        audio_content, filename = await preprocess_for_stt(audio_content, audio_file.filename)
+        if not audio_content:
+            raise HTTPException(
+                status_code=400,
+                detail="No speech detected in audio file"
+            )
         
-        # Transcribe audio (Whisper auto-detects format from filename)
-        transcript, detected_language = await whisper_service.transcribe_audio(
-            audio_content=audio_content,
-            filename=audio_file.filename,
-            language=language
-        )
+        # Retried uploads and replayed recordings skip Whisper entirely
+        transcript_cache = get_transcript_cache()
+        cached = None
+        if transcript_cache:
+            cache_key = await asyncio.to_thread(transcript_key, audio_content, language, prompt, stt_model_name())
+            cached = await asyncio.to_thread(transcript_cache.get, cache_key)
+        
+        if cached:
+            transcript, detected_language = cached
+        else:
+            # Get Whisper service
+            whisper_service = get_whisper_service()
+            
+            # Long recordings are split at pauses and transcribed concurrently
+            pcm_audio = wav_pcm16_mono(audio_content) if long_audio is not False else None
+            if pcm_audio and (long_audio or len(pcm_audio[0]) / (2 * pcm_audio[1]) > LONG_AUDIO_SECONDS):
+                transcript, detected_language = await whisper_service.transcribe_long_audio(
+                    pcm=pcm_audio[0],
+                    sample_rate=pcm_audio[1],
+                    language=language,
+                    prompt=prompt
+                )
+            else:
+                # Transcribe audio (Whisper auto-detects format from filename)
+                transcript, detected_language = await whisper_service.transcribe_audio(
+                    audio_content=audio_content,
+                    filename=filename,
+                    language=language,
+                    prompt=prompt
+                )
+            
+            if transcript_cache and transcript:
+                await asyncio.to_thread(transcript_cache.set, cache_key, transcript, detected_language)
         
         if not transcript:
             raise HTTPException(
@@ -63,3 +116,106 @@ async def speech_to_text(
             status_code=500,
             detail=f"Failed to transcribe audio: {str(e)}"
         )
+
+
+@router.websocket("/ws")
+async def speech_to_text_stream(
+    websocket: WebSocket,
+    language: Optional[str] = None
+):
+    """
+    Stream speech to text over a WebSocket
+    
+    The client sends binary messages of raw 16 kHz, 16-bit little-endian mono
+    PCM and a text message "end" when done. The audio is segmented into
+    utterances with an energy VAD; each utterance is transcribed while audio
+    keeps arriving. The server pushes JSON messages:
+    
+    - {"type": "partial", "utterance_id": n, "transcript": "..."} while an utterance is open
+    - {"type": "final", "utterance_id": n, "transcript": "..."} once it closes
+    - {"type": "error", "detail": "..."} on failures
+    """
+    await websocket.accept()
+    
+    try:
+        whisper_service = get_whisper_service()
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1011)
+        return
+    
+    segmenter = VADSegmenter(sample_rate=STREAM_SAMPLE_RATE)
+    send_lock = asyncio.Lock()
+    tasks: Set[asyncio.Task] = set()
+    finalized: Set[int] = set()
+    partial_pending: Set[int] = set()
+    partial_mark = 0.0
+    
+    async def send(message: dict):
+        async with send_lock:
+            await websocket.send_json(message)
+    
+    async def transcribe(utterance_id: int, pcm: bytes, final: bool):
+        try:
+            transcript, _ = await whisper_service.transcribe_audio(
+                audio_content=pcm_to_wav(pcm, sample_rate=STREAM_SAMPLE_RATE),
+                filename=f"utterance_{utterance_id}.wav",
+                language=language
+            )
+            # A partial that finishes after its final is stale
+            if not final and utterance_id in finalized:
+                return
+            await send({
+                "type": "final" if final else "partial",
+                "utterance_id": utterance_id,
+                "transcript": transcript.strip()
+            })
+        except Exception as e:
+            await send({"type": "error", "utterance_id": utterance_id, "detail": str(e)})
+        finally:
+            if not final:
+                partial_pending.discard(utterance_id)
+    
+    def spawn(utterance_id: int, pcm: bytes, final: bool):
+        if final:
+            finalized.add(utterance_id)
+        task = asyncio.create_task(transcribe(utterance_id, pcm, final))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            
+            if message.get("bytes"):
+                closed = segmenter.feed(message["bytes"])
+            elif (message.get("text") or "").strip().lower() == "end":
+                closed = segmenter.flush()
+            else:
+                continue
+            
+            for utterance_id, pcm in closed:
+                spawn(utterance_id, pcm, final=True)
+                partial_mark = 0.0
+            
+            # One partial per open utterance at a time, every PARTIAL_INTERVAL_SECONDS of speech
+            utterance_id = segmenter.utterance_id
+            if (
+                segmenter.in_speech
+                and utterance_id not in partial_pending
+                and segmenter.speech_seconds - partial_mark >= PARTIAL_INTERVAL_SECONDS
+            ):
+                partial_mark = segmenter.speech_seconds
+                partial_pending.add(utterance_id)
+                spawn(utterance_id, segmenter.current_audio(), final=False)
+            
+            if message.get("text") is not None:
+                # "end": deliver outstanding transcripts, then close
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await websocket.close()
+                return
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,14 +1,34 @@
 """
 Text-to-Speech API endpoints using Coqui TTS
 """
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from models.schemas import TextToSpeechRequest, ErrorResponse
-from services.coqui_tts import get_coqui_service
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional
+from models.schemas import (
+    TextToSpeechRequest,
+    TextToSpeechBatchRequest,
+    TextToSpeechBatchItem,
+    TextToSpeechBatchResponse,
+    ErrorResponse
+)
+from services.coqui_tts import CoquiTTSService, get_coqui_service
+from utils.audio_utils import split_wav, wav_stream_header
+from utils.batch import iter_batch, run_batch
+from utils.circuit_breaker import CircuitOpenError
+import base64
 
 router = APIRouter(prefix="/tts", tags=["Speech Synthesis"])
 
 
+def _unavailable(error: CircuitOpenError) -> HTTPException:
+    """503 returned immediately while the Coqui circuit is open"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Failed to synthesize speech: {str(error)}",
+        headers={"Retry-After": str(max(1, round(error.retry_after)))}
+    )
+
+
 @router.post(
     "",
     response_class=Response,
@@ -18,7 +38,8 @@ router = APIRouter(prefix="/tts", tags=["Speech Synthesis"])
             "description": "Audio file (WAV format)"
         },
         400: {"model": ErrorResponse},
-        500: {"model": ErrorResponse}
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse}
     },
     summary="Convert text to speech",
     description="Send text and receive synthesized audio from local Coqui TTS server"
@@ -50,8 +71,140 @@ async def text_to_speech(request: TextToSpeechRequest):
             }
         )
     
+    except CircuitOpenError as e:
+        raise _unavailable(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to synthesize speech: {str(e)}"
+        )
+
+
+@router.post(
+    "/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"audio/wav": {}},
+            "description": "Chunked WAV stream (one header, then PCM per sentence)"
+        },
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse}
+    },
+    summary="Stream text to speech",
+    description="Synthesize text sentence by sentence and stream audio as each sentence is ready"
+)
+async def text_to_speech_stream(request: TextToSpeechRequest):
+    """
+    Stream synthesized speech using Coqui TTS (local server)
+    
+    - **text**: Text to convert to speech (split into sentences)
+    - **language**: Language code (e.g., en-US, ar-SA) - currently not used by basic Coqui setup
+    
+    Returns a single WAV stream whose PCM data arrives sentence by sentence
+    """
+    coqui_service = get_coqui_service()
+    sentences = coqui_service.stream_speech(text=request.text)
+    
+    # Synthesize the first sentence before responding so failures still return 500
+    try:
+        fmt_chunk, first_pcm = split_wav(await sentences.__anext__())
+    except CircuitOpenError as e:
+        await sentences.aclose()
+        raise _unavailable(e)
     except Exception as e:
+        await sentences.aclose()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to synthesize speech: {str(e)}"
         )
+    
+    async def audio_stream():
+        try:
+            yield wav_stream_header(fmt_chunk)
+            yield first_pcm
+            async for audio_content in sentences:
+                yield split_wav(audio_content)[1]
+        except Exception as e:
+            # Headers are already sent; end the stream early
+            print(f"TTS stream aborted: {e}")
+        finally:
+            await sentences.aclose()
+    
+    return StreamingResponse(
+        audio_stream(),
+        media_type="audio/wav",
+        headers={
+            "Content-Disposition": 'attachment; filename="speech.wav"'
+        }
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=TextToSpeechBatchResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "Per-item results (NDJSON in completion order when requested via Accept)"
+        },
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Convert a batch of texts to speech",
+    description="Synthesize many texts in one request with bounded concurrency and per-item errors"
+)
+async def text_to_speech_batch(
+    request: TextToSpeechBatchRequest,
+    accept: Optional[str] = Header(None)
+):
+    """
+    Convert a batch of texts to speech using Coqui TTS (local server)
+    
+    - **items**: Texts to synthesize (duplicates are synthesized once)
+    
+    Returns base64 WAV audio per item in request order. A failed item carries
+    an error instead of audio. With `Accept: application/x-ndjson` each
+    result is streamed as one line as soon as it is ready.
+    """
+    coqui_service = get_coqui_service()
+    items = request.items
+    
+    def key(item: TextToSpeechRequest) -> str:
+        return CoquiTTSService.cache_key(item.text, None, None, None)
+    
+    async def synthesize(item: TextToSpeechRequest) -> str:
+        audio_content = await coqui_service.synthesize_speech(text=item.text)
+        return base64.b64encode(audio_content).decode("utf-8")
+    
+    def result_item(index: int, audio_base64: Optional[str], error: Optional[Exception]) -> TextToSpeechBatchItem:
+        return TextToSpeechBatchItem(
+            index=index,
+            text=items[index].text,
+            audio_base64=audio_base64,
+            error=f"Failed to synthesize speech: {str(error)}" if error else None
+        )
+    
+    if "application/x-ndjson" in (accept or "").lower():
+        async def ndjson_stream():
+            async for indices, audio_base64, error in iter_batch(items, key, synthesize):
+                for index in indices:
+                    yield result_item(index, audio_base64, error).model_dump_json() + "\n"
+        
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+    
+    try:
+        outcomes = await run_batch(items, key, synthesize)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to synthesize speech batch: {str(e)}"
+        )
+    
+    results = [result_item(index, audio_base64, error) for index, (audio_base64, error) in enumerate(outcomes)]
+    return TextToSpeechBatchResponse(
+        results=results,
+        count=len(results),
+        failed=sum(1 for result in results if result.error)
+    )
@@ -1,9 +1,39 @@
 """
-Coqui TTS service integration (local self-hosted server)
+Coqui TTS service integration (self-hosted server or in-process worker pool)
 """
 import httpx
-from typing import Optional
+from typing import AsyncIterator, List, Optional
+import asyncio
+import hashlib
+import json
 import os
+import re
+import unicodedata
+from services.http_pool import get_upstream_client, is_upstream_failure, prewarm_upstream
+from services.local_tts import LocalTTSEngine
+from utils.cache import ByteLRUCache
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.hedging import Hedger
+from utils.singleflight import SingleFlight
+
+
+# Sentence boundary: terminal punctuation followed by whitespace (CJK needs none), or a newline
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…؟])\s+|(?<=[。！？])\s*|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences for incremental synthesis
+    
+    Args:
+        text: Text to split
+        
+    Returns:
+        Non-empty sentences in order (the stripped text if no boundary is found)
+    """
+    sentences = [part.strip() for part in _SENTENCE_BOUNDARY.split(text)]
+    sentences = [sentence for sentence in sentences if sentence]
+    return sentences or [text.strip() or text]
 
 
 class CoquiTTSService:
@@ -17,7 +47,76 @@ class CoquiTTSService:
             server_url: Coqui TTS server URL (from environment if not provided)
         """
         self.server_url = server_url or os.getenv("COQUI_SERVER_URL", "http://localhost:5002")
-        self.client = httpx.AsyncClient(timeout=30.0)
+        
+        # COQUI_ENGINE=local runs the model in worker processes instead of calling the server
+        self.engine = os.getenv("COQUI_ENGINE", "server").lower()
+        self.local_engine: Optional[LocalTTSEngine] = LocalTTSEngine() if self.engine == "local" else None
+        
+        # Cache of synthesized WAV bytes (repeated phrases dominate traffic)
+        cache_ttl = os.getenv("TTS_CACHE_TTL_SECONDS")
+        self.cache = ByteLRUCache(
+            max_bytes=int(float(os.getenv("TTS_CACHE_MAX_MB", "64")) * 1024 * 1024),
+            ttl_seconds=float(cache_ttl) if cache_ttl else None
+        )
+        
+        # Concurrent identical requests share a single upstream call
+        self.inflight = SingleFlight()
+        
+        # Number of sentences synthesized ahead of the one being streamed
+        self.stream_lookahead = max(1, int(os.getenv("TTS_STREAM_LOOKAHEAD", "2")))
+        
+        # Fail fast while the Coqui server is down (COQUI_BREAKER_* settings)
+        self.breaker = CircuitBreaker("coqui", is_failure=is_upstream_failure)
+        
+        # Optional second server raced against slow primary requests (COQUI_HEDGE_* settings)
+        self.hedge_server_url = os.getenv("COQUI_HEDGE_SERVER_URL")
+        self.hedger: Optional[Hedger] = None
+        if self.hedge_server_url:
+            self.hedger = Hedger("coqui")
+            self.hedge_breaker = CircuitBreaker("coqui_hedge", is_failure=is_upstream_failure)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client for the Coqui server (COQUI_HTTP_* settings)"""
+        return get_upstream_client("coqui")
+    
+    async def prewarm(self) -> int:
+        """
+        Open pooled connections to the Coqui server ahead of traffic, or
+        start the local worker processes and load the model
+        
+        Returns:
+            Number of connections opened (workers started for the local engine)
+        """
+        if self.local_engine is not None:
+            return await self.local_engine.start()
+        opened = await prewarm_upstream("coqui", f"{self.server_url}/health")
+        if self.hedge_server_url:
+            opened += await prewarm_upstream("coqui_hedge", f"{self.hedge_server_url}/health")
+        return opened
+    
+    @staticmethod
+    def cache_key(
+        text: str,
+        speaker_id: Optional[str] = None,
+        language_id: Optional[str] = None,
+        style_wav: Optional[str] = None
+    ) -> str:
+        """
+        Build a content-addressed cache key for a synthesis request
+        
+        Args:
+            text: Text to convert to speech
+            speaker_id: Optional speaker ID
+            language_id: Optional language ID
+            style_wav: Optional style reference
+            
+        Returns:
+            Hex digest identifying the request
+        """
+        normalized_text = " ".join(unicodedata.normalize("NFC", text).split())
+        material = json.dumps([normalized_text, speaker_id, language_id, style_wav])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
     
     async def synthesize_speech(
         self,
@@ -39,8 +138,86 @@ class CoquiTTSService:
             Audio content as bytes (WAV format)
             
         Raises:
+            CircuitOpenError: If the server has been failing and the call was skipped
             Exception: If synthesis fails or server is unreachable
         """
+        key = self.cache_key(text, speaker_id, language_id, style_wav)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        async def synthesize_and_cache() -> bytes:
+            audio_content = await self._request_synthesis(text, speaker_id, language_id, style_wav)
+            self.cache.set(key, audio_content)
+            return audio_content
+        
+        return await self.inflight.do(key, synthesize_and_cache)
+    
+    async def stream_speech(
+        self,
+        text: str,
+        speaker_id: Optional[str] = None,
+        language_id: Optional[str] = None,
+        style_wav: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Synthesize text sentence by sentence, yielding each WAV as soon as it is ready
+        
+        Up to stream_lookahead sentences are synthesized concurrently so the
+        next sentence is usually ready by the time the previous one is sent.
+        
+        Args:
+            text: Text to convert to speech
+            speaker_id: Optional speaker ID for multi-speaker models
+            language_id: Optional language ID for multi-lingual models
+            style_wav: Optional path to reference audio for style transfer
+            
+        Yields:
+            WAV bytes for each sentence, in order
+            
+        Raises:
+            Exception: If synthesis of any sentence fails
+        """
+        sentences = split_sentences(text)
+        pending: List[asyncio.Task] = []
+        next_index = 0
+        
+        def schedule():
+            nonlocal next_index
+            while next_index < len(sentences) and len(pending) < self.stream_lookahead:
+                pending.append(asyncio.ensure_future(self.synthesize_speech(
+                    text=sentences[next_index],
+                    speaker_id=speaker_id,
+                    language_id=language_id,
+                    style_wav=style_wav
+                )))
+                next_index += 1
+        
+        try:
+            schedule()
+            while pending:
+                audio_content = await pending[0]
+                pending.pop(0)
+                schedule()
+                yield audio_content
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _request_synthesis(
+        self,
+        text: str,
+        speaker_id: Optional[str],
+        language_id: Optional[str],
+        style_wav: Optional[str]
+    ) -> bytes:
+        """Send a synthesis request to the Coqui TTS server (or the local engine)"""
+        if self.local_engine is not None:
+            try:
+                return await self.local_engine.synthesize(text, speaker_id, language_id, style_wav)
+            except Exception as e:
+                raise Exception(f"Coqui TTS synthesis failed: {str(e)}")
+        
         try:
             # Prepare request payload
             payload = {
@@ -57,16 +234,41 @@ class CoquiTTSService:
                 payload["style_wav"] = style_wav
             
             # Make request to Coqui TTS server
-            response = await self.client.post(
-                f"{self.server_url}/api/tts",
-                json=payload
-            )
+            async def post() -> httpx.Response:
+                response = await self.client.post(
+                    f"{self.server_url}/api/tts",
+                    json=payload
+                )
+                response.raise_for_status()
+                return response
             
-            response.raise_for_status()
+            if self.hedger is None:
+                response = await self.breaker.call(post)
+            else:
+                async def post_hedge() -> httpx.Response:
+                    response = await get_upstream_client("coqui_hedge").post(
+                        f"{self.hedge_server_url}/api/tts",
+                        json=payload
+                    )
+                    response.raise_for_status()
+                    return response
+                
+                try:
+                    response = await self.hedger.run(
+                        lambda: self.breaker.call(post),
+                        lambda: self.hedge_breaker.call(post_hedge)
+                    )
+                except CircuitOpenError as e:
+                    if e.name != self.breaker.name:
+                        raise
+                    # The primary is down: serve from the hedge server behind its own breaker
+                    response = await self.hedge_breaker.call(post_hedge)
             
             # Return audio bytes
             return response.content
         
+        except CircuitOpenError:
+            raise
         except httpx.ConnectError:
             raise Exception(
                 f"Cannot connect to Coqui TTS server at {self.server_url}. "
@@ -87,6 +289,9 @@ class CoquiTTSService:
         Raises:
             Exception: If server is unreachable
         """
+        if self.local_engine is not None:
+            return {"engine": "local", **self.local_engine.stats()}
+        
         try:
             response = await self.client.get(f"{self.server_url}/api/tts/info")
             response.raise_for_status()
@@ -107,6 +312,9 @@ class CoquiTTSService:
         Returns:
             True if server is reachable and healthy, False otherwise
         """
+        if self.local_engine is not None:
+            return self.local_engine.stats()["started"]
+        
         try:
             response = await self.client.get(f"{self.server_url}/health", timeout=5.0)
             return response.status_code == 200
@@ -114,8 +322,9 @@ class CoquiTTSService:
             return False
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """Stop local worker processes (the shared HTTP clients are closed by close_upstream_clients)"""
+        if self.local_engine is not None:
+            self.local_engine.close()
 
 
 # Singleton instance
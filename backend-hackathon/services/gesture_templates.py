@@ -0,0 +1,200 @@
+"""
+Handshape template store with batched k-nearest-neighbour classification
+"""
+from typing import List, Optional, Tuple
+import os
+import numpy as np
+from utils.gesture import NUM_LANDMARKS, WRIST, as_landmark_array
+from utils.jsonl_store import LabeledJSONLStore
+
+# Data file of templates, one JSON object per line:
+# {"label": "A", "landmarks": [[x, y, z], ... 21 landmarks]}
+TEMPLATES_PATH = os.path.join("data", "handshapes.jsonl")
+# Middle finger MCP; its distance to the wrist is the hand's scale
+SCALE_LANDMARK = 9
+# Queries compared against the template matrix at once (bounds memory)
+_QUERY_BLOCK = 1024
+
+
+def normalize_handshapes(frames: np.ndarray) -> np.ndarray:
+    """
+    Make landmark frames comparable regardless of hand position and size
+    
+    Landmarks are translated so the wrist is the origin and scaled so the
+    wrist to middle-finger MCP distance is 1.
+    
+    Args:
+        frames: Landmarks shaped (N, 21, 3)
+        
+    Returns:
+        Float32 feature vectors shaped (N, 63)
+    """
+    centered = frames - frames[:, WRIST:WRIST + 1, :]
+    scale = np.sqrt(np.einsum("ij,ij->i", centered[:, SCALE_LANDMARK], centered[:, SCALE_LANDMARK]))
+    # Degenerate frames (all landmarks on the wrist) stay at the origin
+    scale[scale == 0] = 1.0
+    return (centered / scale[:, None, None]).reshape(len(frames), NUM_LANDMARKS * 3).astype(np.float32)
+
+
+class GestureTemplateStore(LabeledJSONLStore):
+    """
+    Vocabulary of static handshapes matched by k-nearest neighbours
+    
+    Templates are normalized landmark vectors kept in one matrix together
+    with their squared norms. A batch of queries is classified with a single
+    matrix product (|q|^2 + |t|^2 - 2 q.t), so cost grows with the template
+    count but stays one BLAS call. The label is a distance-weighted vote of
+    the k nearest templates. Confidence is the winning label's share of the
+    vote. Adding a sign only appends templates to the data file.
+    """
+    
+    record_name = "handshape template"
+    
+    def __init__(self, path: Optional[str] = None, k: Optional[int] = None, max_distance: Optional[float] = None):
+        """
+        Load templates from the data file
+        
+        Args:
+            path: JSONL data file (defaults to GESTURE_TEMPLATES_PATH or data/handshapes.jsonl)
+            k: Neighbours voting per query (defaults to GESTURE_KNN_K)
+            max_distance: Queries whose nearest template is farther than this
+                (in normalized units) get no label (defaults to GESTURE_KNN_MAX_DISTANCE)
+        """
+        super().__init__(path or os.getenv("GESTURE_TEMPLATES_PATH") or TEMPLATES_PATH)
+        self.k = k or int(os.getenv("GESTURE_KNN_K", "5"))
+        self.max_distance = max_distance if max_distance is not None else float(
+            os.getenv("GESTURE_KNN_MAX_DISTANCE", "1.0")
+        )
+        
+        self._matrix = np.zeros((0, NUM_LANDMARKS * 3), dtype=np.float32)
+        self._squared_norms = np.zeros(0, dtype=np.float32)
+        self.load()
+    
+    def load(self) -> int:
+        """
+        (Re)load all templates from the data file
+        
+        Returns:
+            Number of templates loaded
+        """
+        labels, landmarks = self._read_records(lambda record: as_landmark_array([record["landmarks"]])[0])
+        matrix = normalize_handshapes(np.array(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3))
+        with self._lock:
+            self._rebuild(labels, matrix)
+        return len(labels)
+    
+    def _rebuild(self, template_labels: List[str], matrix: np.ndarray) -> None:
+        """Swap in a new template matrix and its label index (lock held)"""
+        self._index_labels(template_labels)
+        self._matrix = matrix
+        self._squared_norms = np.einsum("ij,ij->i", matrix, matrix)
+    
+    def add(self, label: str, frames) -> int:
+        """
+        Add templates for a label and append them to the data file
+        
+        Args:
+            label: Sign name
+            frames: Landmarks shaped (N, 21, 3) or (N, 21, 2)
+            
+        Returns:
+            Number of templates now stored for the label
+            
+        Raises:
+            ValueError: If the frames have the wrong shape
+        """
+        frames = as_landmark_array(frames)
+        vectors = normalize_handshapes(frames)
+        with self._lock:
+            self._append_records([{"label": label, "landmarks": frame} for frame in frames.tolist()])
+            self._rebuild(self._record_labels + [label] * len(frames), np.concatenate([self._matrix, vectors]))
+            return self._record_labels.count(label)
+    
+    def classify(self, frames, k: Optional[int] = None) -> Tuple[List[Optional[str]], np.ndarray, np.ndarray]:
+        """
+        Classify frames by their k nearest templates
+        
+        Args:
+            frames: Landmarks shaped (N, 21, 3) or (N, 21, 2)
+            k: Neighbours voting (defaults to the store's k)
+            
+        Returns:
+            Tuple of (label per frame or None, confidence per frame in [0, 1],
+            distance to the nearest template per frame)
+            
+        Raises:
+            ValueError: If the frames have the wrong shape
+        """
+        queries = normalize_handshapes(as_landmark_array(frames))
+        with self._lock:
+            matrix, squared_norms = self._matrix, self._squared_norms
+            label_ids, labels = self._label_ids, self.labels
+        
+        count = len(queries)
+        if not len(matrix):
+            return [None] * count, np.zeros(count, dtype=np.float32), np.full(count, np.inf, dtype=np.float32)
+        
+        k = max(1, min(k or self.k, len(matrix)))
+        result_labels: List[Optional[str]] = []
+        confidences = np.empty(count, dtype=np.float32)
+        nearest = np.empty(count, dtype=np.float32)
+        
+        for start in range(0, count, _QUERY_BLOCK):
+            block = queries[start:start + _QUERY_BLOCK]
+            # Squared distances to every template from one matrix product
+            distances = np.einsum("ij,ij->i", block, block)[:, None] + squared_norms[None, :] - 2.0 * (block @ matrix.T)
+            np.maximum(distances, 0.0, out=distances)
+            
+            if k < len(matrix):
+                neighbours = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            else:
+                neighbours = np.broadcast_to(np.arange(len(matrix)), (len(block), k))
+            neighbour_distances = np.sqrt(np.take_along_axis(distances, neighbours, axis=1))
+            
+            # Distance-weighted vote per label
+            weights = 1.0 / (neighbour_distances + 1e-3)
+            scores = np.zeros((len(block), len(labels)), dtype=np.float32)
+            rows = np.repeat(np.arange(len(block)), k)
+            np.add.at(scores, (rows, label_ids[neighbours].reshape(-1)), weights.reshape(-1))
+            
+            winners = scores.argmax(axis=1)
+            block_confidence = scores[np.arange(len(block)), winners] / scores.sum(axis=1)
+            block_nearest = neighbour_distances.min(axis=1)
+            for winner, distance in zip(winners.tolist(), block_nearest.tolist()):
+                result_labels.append(labels[winner] if distance <= self.max_distance else None)
+            confidences[start:start + len(block)] = block_confidence
+            nearest[start:start + len(block)] = block_nearest
+        
+        return result_labels, confidences, nearest
+    
+    def stats(self) -> dict:
+        """
+        Get vocabulary size
+        
+        Returns:
+            Dictionary with label and template counts and the data file path
+        """
+        return {
+            "labels": len(self.labels),
+            "templates": len(self._matrix),
+            "k": self.k,
+            "max_distance": self.max_distance,
+            "path": self.path
+        }
+
+
+# Singleton instance
+_template_store: Optional[GestureTemplateStore] = None
+
+
+def get_template_store() -> GestureTemplateStore:
+    """
+    Get or create GestureTemplateStore singleton instance
+    
+    Returns:
+        GestureTemplateStore instance
+    """
+    global _template_store
+    if _template_store is None:
+        _template_store = GestureTemplateStore()
+    return _template_store
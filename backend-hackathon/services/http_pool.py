@@ -0,0 +1,306 @@
+"""
+Shared, tuned HTTP client pools for upstream services
+"""
+from typing import AsyncIterator, Callable, Dict
+import asyncio
+import importlib.util
+import os
+import time
+
+import httpx
+
+# Per-upstream defaults; each can be overridden with {PREFIX}_HTTP_* environment variables
+_DEFAULTS = {
+    "max_connections": 20,
+    "max_keepalive": 10,
+    "keepalive_expiry": 30.0,
+    "connect_timeout": 5.0,
+    "read_timeout": 30.0,
+    "pool_timeout": 10.0,
+    "prewarm": 2,
+}
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports when its connection is released"""
+    
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+    
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+    
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Connection-pool transport that counts how close the pool is to saturation
+    
+    A request holds its connection until the response body is closed, so
+    active counts requests from send until release. Requests started while
+    every connection was busy had to wait for one (saturated).
+    """
+    
+    def __init__(self, transport: httpx.AsyncHTTPTransport, max_connections: int):
+        """
+        Wrap a transport
+        
+        Args:
+            transport: Pooled transport performing the requests
+            max_connections: Pool size of the wrapped transport
+        """
+        self._transport = transport
+        self.max_connections = max_connections
+        
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self.saturated = 0
+        self.pool_timeouts = 0
+        self.errors = 0
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.active >= self.max_connections:
+            self.saturated += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception as e:
+            self.active -= 1
+            if isinstance(e, httpx.PoolTimeout):
+                self.pool_timeouts += 1
+            else:
+                self.errors += 1
+            raise
+        
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, self._release),
+            extensions=response.extensions
+        )
+    
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+    
+    def connections(self) -> Dict[str, int]:
+        """
+        Get open and idle connection counts of the underlying pool
+        
+        Returns:
+            Dictionary with open and idle connection counts
+        """
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {
+            "open": len(connections),
+            "idle": sum(1 for connection in connections if connection.is_idle())
+        }
+    
+    def _release(self) -> None:
+        self.active -= 1
+
+
+class UpstreamClient:
+    """An upstream's shared AsyncClient and its pool configuration"""
+    
+    def __init__(self, name: str):
+        """
+        Build the client from {NAME}_HTTP_* environment variables
+        
+        Args:
+            name: Upstream name, also the environment variable prefix (e.g. "coqui")
+        """
+        self.name = name
+        prefix = f"{name.upper()}_HTTP_"
+        
+        def setting(key: str) -> float:
+            return float(os.getenv(prefix + key.upper(), str(_DEFAULTS[key])))
+        
+        self.max_connections = int(setting("max_connections"))
+        self.max_keepalive = int(setting("max_keepalive"))
+        self.keepalive_expiry = setting("keepalive_expiry")
+        self.prewarm_connections = int(setting("prewarm"))
+        self.timeout = httpx.Timeout(
+            connect=setting("connect_timeout"),
+            read=setting("read_timeout"),
+            write=setting("read_timeout"),
+            pool=setting("pool_timeout")
+        )
+        
+        # HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 without it
+        self.http2 = os.getenv(prefix + "HTTP2", "false").lower() == "true"
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            print(f"⚠️ {prefix}HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+            self.http2 = False
+        
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        self.transport = InstrumentedTransport(
+            httpx.AsyncHTTPTransport(limits=limits, http2=self.http2),
+            max_connections=self.max_connections
+        )
+        self.client = httpx.AsyncClient(transport=self.transport, timeout=self.timeout)
+        
+        self.prewarmed = 0
+    
+    async def prewarm(self, url: str) -> int:
+        """
+        Open pooled connections ahead of traffic with lightweight HEAD requests
+        
+        Args:
+            url: URL on the upstream host to request (any status counts)
+        
+        Returns:
+            Number of requests that reached the upstream
+        """
+        # One HTTP/2 connection multiplexes every request
+        count = 1 if self.http2 else min(self.prewarm_connections, self.max_keepalive)
+        if count <= 0:
+            return 0
+        
+        results = await asyncio.gather(
+            *(self.client.head(url) for _ in range(count)),
+            return_exceptions=True
+        )
+        reached = sum(1 for result in results if isinstance(result, httpx.Response))
+        self.prewarmed += reached
+        return reached
+    
+    def stats(self) -> dict:
+        """
+        Get pool configuration and saturation counters
+        
+        Returns:
+            Dictionary with limits, connection counts and request counters
+        """
+        transport = self.transport
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+            **transport.connections(),
+            "in_flight": transport.active,
+            "peak_in_flight": transport.peak_active,
+            # Above 1.0 requests are queued waiting for a connection
+            "utilization": round(transport.active / self.max_connections, 3),
+            "requests": transport.requests,
+            "saturated": transport.saturated,
+            "pool_timeouts": transport.pool_timeouts,
+            "errors": transport.errors,
+            "prewarmed": self.prewarmed
+        }
+
+
+# Shared clients by upstream name
+_upstreams: Dict[str, UpstreamClient] = {}
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """
+    Decide whether an error means the upstream is unhealthy
+    
+    Transport errors, timeouts, 5xx and 429 responses count; other 4xx
+    responses are problems with the request itself.
+    
+    Args:
+        error: Exception raised by an upstream call
+    
+    Returns:
+        True if the error should count against the upstream's circuit breaker
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+def get_upstream(name: str) -> UpstreamClient:
+    """
+    Get or create the shared client pool of an upstream
+    
+    A closed client (app restarted in the same process) is replaced.
+    
+    Args:
+        name: Upstream name (e.g. "coqui", "signall")
+    
+    Returns:
+        UpstreamClient instance
+    """
+    upstream = _upstreams.get(name)
+    if upstream is None or upstream.client.is_closed:
+        upstream = UpstreamClient(name)
+        _upstreams[name] = upstream
+    return upstream
+
+
+def get_upstream_client(name: str) -> httpx.AsyncClient:
+    """
+    Get the shared AsyncClient of an upstream
+    
+    Args:
+        name: Upstream name (e.g. "coqui", "signall")
+    
+    Returns:
+        httpx.AsyncClient instance
+    """
+    return get_upstream(name).client
+
+
+async def prewarm_upstream(name: str, url: str) -> int:
+    """
+    Open connections to an upstream ahead of the first request
+    
+    Failures are logged and ignored so startup does not depend on upstreams.
+    
+    Args:
+        name: Upstream name
+        url: URL on the upstream host to request
+    
+    Returns:
+        Number of requests that reached the upstream
+    """
+    upstream = get_upstream(name)
+    if upstream.prewarm_connections <= 0:
+        return 0
+    
+    started = time.perf_counter()
+    reached = await upstream.prewarm(url)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if reached:
+        print(f"🔌 Pre-opened {reached} connections to {name} in {elapsed_ms:.0f}ms")
+    else:
+        print(f"⚠️ Could not pre-open connections to {name} ({url})")
+    return reached
+
+
+def upstream_stats() -> Dict[str, dict]:
+    """
+    Get pool statistics of every upstream client created so far
+    
+    Returns:
+        Dictionary of upstream name to pool statistics
+    """
+    return {name: upstream.stats() for name, upstream in _upstreams.items()}
+
+
+async def close_upstream_clients() -> None:
+    """Close every shared upstream client"""
+    for upstream in _upstreams.values():
+        await upstream.client.aclose()
@@ -0,0 +1,244 @@
+"""
+In-process Coqui TTS engine running the model in a pool of worker processes
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional, Tuple
+import asyncio
+import os
+import struct
+import time
+import numpy as np
+
+DEFAULT_MODEL = "tts_models/en/ljspeech/tacotron2-DDC"
+
+# Model loaded once per worker process by _init_worker (or why loading failed)
+_worker_model: Any = None
+_worker_error: Optional[str] = None
+
+
+def _load_model(model_name: str) -> Any:
+    """Load a Coqui TTS model on the CPU (runs inside a worker process)"""
+    try:
+        from TTS.api import TTS
+    except ImportError:
+        raise ValueError("COQUI_ENGINE=local requires the TTS package (pip install TTS)")
+    return TTS(model_name, progress_bar=False).to("cpu")
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    global _worker_model, _worker_error
+    try:
+        import torch
+        # Workers split the cores between them instead of each using all of them
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    # An initializer error would break the whole pool; report it per request instead
+    try:
+        _worker_model = _load_model(model_name)
+    except Exception as e:
+        _worker_error = str(e)
+
+
+def _wav_header(data_bytes: int, sample_rate: int) -> bytes:
+    """44-byte header of a 16-bit mono PCM WAV file"""
+    return (
+        b"RIFF" + struct.pack("<I", 36 + data_bytes) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", data_bytes)
+    )
+
+
+def _synthesize_to_shared_memory(
+    text: str,
+    speaker_id: Optional[str],
+    language_id: Optional[str],
+    style_wav: Optional[str]
+) -> Tuple[str, int]:
+    """
+    Synthesize in a worker and write the WAV into a new shared memory block
+    
+    Only the block name and size are sent back to the parent, which copies
+    the WAV out and unlinks the block.
+    """
+    if _worker_model is None:
+        raise ValueError(f"Coqui model failed to load: {_worker_error}")
+    samples = _worker_model.tts(
+        text=text,
+        speaker=speaker_id,
+        language=language_id,
+        speaker_wav=style_wav
+    )
+    samples = np.asarray(samples, dtype=np.float32)
+    sample_rate = _worker_model.synthesizer.output_sample_rate
+    
+    data_bytes = len(samples) * 2
+    block = SharedMemory(create=True, size=44 + data_bytes)
+    try:
+        block.buf[:44] = _wav_header(data_bytes, sample_rate)
+        # Convert straight into the shared block instead of building bytes first
+        pcm = np.ndarray(len(samples), dtype="<i2", buffer=block.buf, offset=44)
+        np.clip(np.round(samples * 32768.0), -32768, 32767, out=samples)
+        pcm[:] = samples
+        del pcm
+        return block.name, 44 + data_bytes
+    finally:
+        block.close()
+
+
+def _discard_block(future) -> None:
+    """Unlink the shared memory block of a result nobody is waiting for"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    name, _ = future.result()
+    block = SharedMemory(name=name)
+    block.close()
+    block.unlink()
+
+
+class LocalTTSEngine:
+    """
+    Coqui TTS model loaded in COQUI_LOCAL_WORKERS processes
+    
+    Each worker loads the model once at startup. Requests are queued to the
+    pool, and the synthesized WAV comes back through a shared memory block
+    rather than as pickled bytes. This removes the HTTP hop to a separate
+    Coqui server and uses every core of a single-node deployment.
+    """
+    
+    def __init__(self, model_name: Optional[str] = None, workers: Optional[int] = None):
+        """
+        Initialize engine (worker processes start on start() or the first request)
+        
+        Args:
+            model_name: Coqui model name (defaults to COQUI_LOCAL_MODEL)
+            workers: Number of worker processes (defaults to COQUI_LOCAL_WORKERS or the core count)
+        """
+        self.model_name = model_name or os.getenv("COQUI_LOCAL_MODEL", DEFAULT_MODEL)
+        self.workers = workers or int(os.getenv("COQUI_LOCAL_WORKERS", "0")) or os.cpu_count() or 1
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.bytes_out = 0
+        self.total_seconds = 0.0
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Workers must report their shared memory blocks to the parent's
+            # tracker, so the parent's unlink() balances their registration
+            resource_tracker.ensure_running()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.model_name, self.threads_per_worker)
+            )
+        return self._pool
+    
+    async def start(self) -> int:
+        """
+        Start the worker processes and load the model in each
+        
+        Returns:
+            Number of workers that loaded the model
+        """
+        print(f"🧠 Loading Coqui model {self.model_name} in {self.workers} worker processes...")
+        # One short synthesis per worker forces every process to start and load the model
+        results = await asyncio.gather(
+            *[self.synthesize("Hello.") for _ in range(self.workers)],
+            return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            print(f"⚠️ Local Coqui engine warmup failed: {errors[0]}")
+        return len(results) - len(errors)
+    
+    async def synthesize(
+        self,
+        text: str,
+        speaker_id: Optional[str] = None,
+        language_id: Optional[str] = None,
+        style_wav: Optional[str] = None
+    ) -> bytes:
+        """
+        Synthesize text in a worker process
+        
+        Args:
+            text: Text to convert to speech
+            speaker_id: Optional speaker ID for multi-speaker models
+            language_id: Optional language ID for multi-lingual models
+            style_wav: Optional path to reference audio for voice cloning
+            
+        Returns:
+            Audio content as bytes (16-bit mono WAV)
+            
+        Raises:
+            Exception: If synthesis fails or the worker process died
+        """
+        pool = self._get_pool()
+        started = time.monotonic()
+        self.in_flight += 1
+        future = None
+        try:
+            future = pool.submit(_synthesize_to_shared_memory, text, speaker_id, language_id, style_wav)
+            name, size = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # The worker finishes anyway; free its block once it does
+            if future is not None:
+                future.add_done_callback(_discard_block)
+            raise
+        except BrokenProcessPool:
+            # A worker crashed (e.g. out of memory); start a fresh pool next time
+            self.failed += 1
+            if self._pool is pool:
+                self._pool = None
+                self.restarts += 1
+            raise Exception("Coqui worker process died")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        
+        block = SharedMemory(name=name)
+        try:
+            audio_content = bytes(block.buf[:size])
+        finally:
+            block.close()
+            block.unlink()
+        
+        self.completed += 1
+        self.bytes_out += size
+        self.total_seconds += time.monotonic() - started
+        return audio_content
+    
+    def stats(self) -> dict:
+        """
+        Get engine counters
+        
+        Returns:
+            Dictionary with pool size, queue depth and synthesis counters
+        """
+        return {
+            "model": self.model_name,
+            "workers": self.workers,
+            "started": self._pool is not None,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "bytes_out": self.bytes_out,
+            "avg_ms": round(self.total_seconds / self.completed * 1000, 1) if self.completed else None
+        }
+    
+    def close(self) -> None:
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
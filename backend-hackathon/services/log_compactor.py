@@ -0,0 +1,287 @@
+"""
+Background compaction of daily conversation log files into segments
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+import asyncio
+import gzip
+import importlib.util
+import os
+import time
+
+from services.log_index import LOGS_DIR, ConversationLogIndex, get_log_index
+
+SEGMENTS_DIR = "segments"
+_EXTENSIONS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst", "none": ".jsonl"}
+# Input held in memory per compaction batch
+_BATCH_BYTES = 16 * 1024 * 1024
+
+
+class ConversationLogCompactor:
+    """
+    Roll finished daily log files into large append-only segment files
+    
+    Each `{session_id}_{YYYYMMDD}.jsonl` file from a previous day is appended
+    to the current segment in blocks of roughly block_bytes. Each block is
+    compressed on its own, so one entry can be read by decompressing only its
+    block. The index is then repointed at the segment and the small file is
+    deleted. Files with bytes the index has not covered are left in place.
+    """
+    
+    def __init__(
+        self,
+        index: ConversationLogIndex,
+        logs_dir: str = LOGS_DIR,
+        compression: Optional[str] = None,
+        segment_max_bytes: Optional[int] = None,
+        block_bytes: Optional[int] = None,
+        min_age_seconds: Optional[float] = None,
+        interval_seconds: Optional[float] = None
+    ):
+        """
+        Initialize compactor
+        
+        Args:
+            index: Log index to relocate entries in
+            logs_dir: Directory holding the .jsonl log files
+            compression: "gzip", "zstd" (requires the zstandard package) or "none"
+            segment_max_bytes: Start a new segment once the current one reaches this size
+            block_bytes: Uncompressed size of each independently compressed block
+            min_age_seconds: Only compact files not modified for this long
+            interval_seconds: Delay between background compaction runs
+        """
+        self.index = index
+        self.logs_dir = logs_dir
+        self.compression = (compression or os.getenv("LOG_SEGMENT_COMPRESSION", "gzip")).lower()
+        if self.compression not in _EXTENSIONS:
+            raise ValueError(f"Invalid LOG_SEGMENT_COMPRESSION: {self.compression}")
+        if self.compression == "zstd" and importlib.util.find_spec("zstandard") is None:
+            print("⚠️ LOG_SEGMENT_COMPRESSION=zstd but the zstandard package is not installed; using gzip")
+            self.compression = "gzip"
+        self.segment_max_bytes = segment_max_bytes or int(
+            float(os.getenv("LOG_SEGMENT_MAX_MB", "256")) * 1024 * 1024
+        )
+        self.block_bytes = block_bytes or int(os.getenv("LOG_SEGMENT_BLOCK_KB", "64")) * 1024
+        self.min_age_seconds = min_age_seconds if min_age_seconds is not None else float(
+            os.getenv("LOG_COMPACT_MIN_AGE_SECONDS", "600")
+        )
+        self.interval_seconds = interval_seconds or float(os.getenv("LOG_COMPACT_INTERVAL_SECONDS", "3600"))
+        
+        self._task: Optional[asyncio.Task] = None
+        
+        self.runs = 0
+        self.files_compacted = 0
+        self.files_skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.last_run_ms = 0.0
+    
+    def start(self) -> None:
+        """Start periodic background compaction"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop background compaction (an in-progress run finishes first)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def compact(self) -> int:
+        """
+        Compact every eligible daily log file
+        
+        Returns:
+            Number of files compacted
+        """
+        started = time.perf_counter()
+        eligible = self._eligible_files()
+        
+        # Pack many small files into shared blocks, bounded per batch
+        batch: List[str] = []
+        batch_bytes = 0
+        compacted = 0
+        for filename in eligible:
+            batch.append(filename)
+            batch_bytes += os.path.getsize(os.path.join(self.logs_dir, filename))
+            if batch_bytes >= _BATCH_BYTES:
+                compacted += self._compact_batch(batch)
+                batch, batch_bytes = [], 0
+        if batch:
+            compacted += self._compact_batch(batch)
+        
+        self.runs += 1
+        self.last_run_ms = (time.perf_counter() - started) * 1000
+        return compacted
+    
+    def stats(self) -> dict:
+        """
+        Get compaction counters
+        
+        Returns:
+            Dictionary with segment usage and compaction totals
+        """
+        segments_path = os.path.join(self.logs_dir, SEGMENTS_DIR)
+        segments = os.listdir(segments_path) if os.path.isdir(segments_path) else []
+        return {
+            "compression": self.compression,
+            "segments": len(segments),
+            "segment_bytes": sum(os.path.getsize(os.path.join(segments_path, name)) for name in segments),
+            "runs": self.runs,
+            "files_compacted": self.files_compacted,
+            "files_skipped": self.files_skipped,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "last_run_ms": round(self.last_run_ms, 3)
+        }
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                compacted = await asyncio.to_thread(self.compact)
+                if compacted:
+                    print(f"🗜️ Compacted {compacted} conversation log files")
+            except Exception as e:
+                print(f"Conversation log compaction failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+    
+    def _eligible_files(self) -> List[str]:
+        if not os.path.isdir(self.logs_dir):
+            return []
+        
+        # Today's files are still being appended to
+        today = datetime.utcnow().strftime("%Y%m%d")
+        now = time.time()
+        eligible = []
+        for filename in sorted(os.listdir(self.logs_dir)):
+            if not filename.endswith(".jsonl") or "_" not in filename:
+                continue
+            day = filename[:-len(".jsonl")].rsplit("_", 1)[1]
+            if len(day) != 8 or not day.isdigit() or day >= today:
+                continue
+            if now - os.path.getmtime(os.path.join(self.logs_dir, filename)) < self.min_age_seconds:
+                continue
+            eligible.append(filename)
+        return eligible
+    
+    def _compact_batch(self, filenames: List[str]) -> int:
+        # Deleting a file the index has not fully covered would lose entries
+        filenames = [filename for filename in filenames if self._fully_indexed(filename)]
+        
+        # (seq, line) for every indexed entry of the batch, file by file
+        lines: List[Tuple[int, bytes]] = []
+        for filename in filenames:
+            path = os.path.join(self.logs_dir, filename)
+            with open(path, "rb") as f:
+                for seq, offset, length in self.index.entries_for_file(filename):
+                    f.seek(offset)
+                    lines.append((seq, f.read(length)))
+        
+        if lines:
+            segment_file = self._current_segment()
+            moves = self._append_to_segment(segment_file, lines)
+            self.index.relocate(segment_file, moves)
+        
+        # Files are removed only after the index points at the segment
+        for filename in filenames:
+            self.bytes_in += os.path.getsize(os.path.join(self.logs_dir, filename))
+            os.remove(os.path.join(self.logs_dir, filename))
+            self.index.forget_file(filename)
+        self.files_compacted += len(filenames)
+        return len(filenames)
+    
+    def _fully_indexed(self, filename: str) -> bool:
+        size = os.path.getsize(os.path.join(self.logs_dir, filename))
+        if self.index.indexed_bytes(filename) != size:
+            self.index.sync_file(filename)
+            if self.index.indexed_bytes(filename) != size:
+                self.files_skipped += 1
+                print(f"⚠️ Not compacting {filename}: only part of it is indexed")
+                return False
+        return True
+    
+    def _append_to_segment(self, segment_file: str, lines: List[Tuple[int, bytes]]) -> List[tuple]:
+        moves = []
+        path = os.path.join(self.logs_dir, segment_file)
+        with open(path, "ab") as segment:
+            start = position = segment.tell()
+            
+            if self.compression == "none":
+                for seq, line in lines:
+                    moves.append((seq, None, None, position, len(line)))
+                    position += len(line)
+                segment.write(b"".join(line for _, line in lines))
+            else:
+                for block_lines in self._blocks(lines):
+                    block = b"".join(line for _, line in block_lines)
+                    data = self._compress(block)
+                    offset = 0
+                    for seq, line in block_lines:
+                        moves.append((seq, position, len(data), offset, len(line)))
+                        offset += len(line)
+                    segment.write(data)
+                    position += len(data)
+            
+            segment.flush()
+            os.fsync(segment.fileno())
+            self.bytes_out += position - start
+        return moves
+    
+    def _blocks(self, lines: List[Tuple[int, bytes]]) -> List[List[Tuple[int, bytes]]]:
+        blocks, current, size = [], [], 0
+        for item in lines:
+            current.append(item)
+            size += len(item[1])
+            if size >= self.block_bytes:
+                blocks.append(current)
+                current, size = [], 0
+        if current:
+            blocks.append(current)
+        return blocks
+    
+    def _compress(self, block: bytes) -> bytes:
+        if self.compression == "zstd":
+            import zstandard
+            return zstandard.ZstdCompressor().compress(block)
+        return gzip.compress(block)
+    
+    def _current_segment(self) -> str:
+        segments_path = os.path.join(self.logs_dir, SEGMENTS_DIR)
+        os.makedirs(segments_path, exist_ok=True)
+        
+        extension = _EXTENSIONS[self.compression]
+        numbers = [
+            int(name.split("-", 1)[1].split(".", 1)[0])
+            for name in os.listdir(segments_path)
+            if name.startswith("segment-")
+        ]
+        latest = max(numbers, default=0)
+        if latest:
+            name = f"segment-{latest:06d}{extension}"
+            path = os.path.join(segments_path, name)
+            # Keep appending to the latest segment while it has room and the same codec
+            if os.path.exists(path) and os.path.getsize(path) < self.segment_max_bytes:
+                return os.path.join(SEGMENTS_DIR, name)
+        return os.path.join(SEGMENTS_DIR, f"segment-{latest + 1:06d}{extension}")
+
+
+# Singleton instance
+_log_compactor: Optional[ConversationLogCompactor] = None
+
+
+def get_log_compactor() -> ConversationLogCompactor:
+    """
+    Get or create ConversationLogCompactor singleton instance
+    
+    Returns:
+        ConversationLogCompactor instance
+    """
+    global _log_compactor
+    if _log_compactor is None:
+        _log_compactor = ConversationLogCompactor(index=get_log_index())
+    return _log_compactor
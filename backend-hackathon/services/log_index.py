@@ -0,0 +1,392 @@
+"""
+SQLite index of conversation log entries by session
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import gzip
+import json
+import mmap
+import os
+import sqlite3
+import threading
+
+# Simple file-based storage for MVP (replace with database in production)
+LOGS_DIR = "conversation_logs"
+
+# Location of one entry: (file, block offset, block length, offset, length).
+# Block offset/length are None for plain files; for compressed segments they
+# address the compressed block and offset/length are within the decompressed block.
+Location = Tuple[str, Optional[int], Optional[int], int, int]
+
+
+def decompress_block(filename: str, data: bytes) -> bytes:
+    """
+    Decompress one segment block according to the segment file extension
+    
+    Args:
+        filename: Segment file name (.gz or .zst)
+        data: Compressed block bytes
+        
+    Returns:
+        Decompressed block
+    """
+    if filename.endswith(".zst"):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _epoch(timestamp: Optional[str]) -> Optional[float]:
+    """Convert an ISO timestamp to epoch seconds (naive timestamps are UTC)"""
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class ConversationLogIndex:
+    """
+    Map session IDs to the byte ranges of their entries in the log files
+    
+    Every appended line is recorded as (session_id, timestamp, file, offset,
+    length), so retrieving a session reads only its own lines instead of
+    listing and parsing the whole log directory. When daily files are
+    compacted into segments, their rows are relocated to the segment block.
+    """
+    
+    def __init__(self, logs_dir: str = LOGS_DIR, db_path: Optional[str] = None):
+        """
+        Open (or create) the index database
+        
+        Args:
+            logs_dir: Directory holding the .jsonl log files
+            db_path: SQLite file path (defaults to LOG_INDEX_PATH or logs_dir/index.sqlite3)
+        """
+        self.logs_dir = logs_dir
+        self.db_path = db_path or os.getenv("LOG_INDEX_PATH") or os.path.join(logs_dir, "index.sqlite3")
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        # Used from the log writer thread and from request handlers
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        with self._lock:
+            self._connect()
+    
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Reopened lazily after close() (e.g. on app restart in the same process)
+        if self._connection is None:
+            self._connect()
+        return self._connection
+    
+    def _connect(self) -> None:
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                log_id TEXT,
+                ts REAL,
+                file TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                block_offset INTEGER,
+                block_length INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS entries_session ON entries (session_id, seq);
+            CREATE INDEX IF NOT EXISTS entries_file ON entries (file, offset);
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY,
+                indexed_bytes INTEGER NOT NULL
+            );
+        """)
+        # Indexes created before segment compaction lack the block columns
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(entries)")}
+        for column in ("block_offset", "block_length"):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE entries ADD COLUMN {column} INTEGER")
+        self._connection.commit()
+    
+    def record(self, filename: str, start_offset: int, lines: List[Tuple[dict, int]]) -> None:
+        """
+        Index lines just appended to a log file
+        
+        Args:
+            filename: Log file name inside logs_dir
+            start_offset: File offset where the first line was written
+            lines: (entry, encoded line length) pairs in write order
+        """
+        rows = []
+        offset = start_offset
+        for entry, length in lines:
+            # Blank or unparsable lines only advance the offset
+            if entry.get("session_id"):
+                rows.append((
+                    entry["session_id"], entry.get("log_id"), _epoch(entry.get("timestamp")),
+                    filename, offset, length
+                ))
+            offset += length
+        
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO entries (session_id, log_id, ts, file, offset, length) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._db.execute(
+                "INSERT INTO files (name, indexed_bytes) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET indexed_bytes = excluded.indexed_bytes",
+                (filename, offset)
+            )
+            self._db.commit()
+    
+    def sync_directory(self) -> int:
+        """
+        Index any log file content not yet in the index (e.g. files written
+        before the index existed)
+        
+        Returns:
+            Number of entries added
+        """
+        if not os.path.isdir(self.logs_dir):
+            return 0
+        
+        with self._lock:
+            indexed = dict(self._db.execute("SELECT name, indexed_bytes FROM files"))
+        
+        added = 0
+        for filename in sorted(os.listdir(self.logs_dir)):
+            if filename.endswith(".jsonl"):
+                added += self.sync_file(filename, indexed.get(filename, 0))
+        return added
+    
+    def sync_file(self, filename: str, start: Optional[int] = None) -> int:
+        """
+        Index the content of one log file past its indexed bytes
+        
+        Args:
+            filename: Log file name inside logs_dir
+            start: Offset to index from (defaults to the file's indexed bytes)
+            
+        Returns:
+            Number of entries added
+        """
+        if start is None:
+            start = self.indexed_bytes(filename)
+        path = os.path.join(self.logs_dir, filename)
+        if os.path.getsize(path) <= start:
+            return 0
+        
+        lines = []
+        with open(path, "rb") as f:
+            f.seek(start)
+            for raw_line in f:
+                # Stop at a partially written trailing line
+                if not raw_line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(raw_line) if raw_line.strip() else {}
+                except ValueError:
+                    entry = {}
+                lines.append((entry, len(raw_line)))
+        
+        self.record(filename, start, lines)
+        return sum(1 for entry, _ in lines if entry.get("session_id"))
+    
+    def indexed_bytes(self, filename: str) -> int:
+        """
+        Get how many leading bytes of a log file have been indexed
+        
+        Args:
+            filename: Log file name inside logs_dir
+            
+        Returns:
+            Offset just past the last indexed line (0 if the file is unknown)
+        """
+        with self._lock:
+            row = self._db.execute("SELECT indexed_bytes FROM files WHERE name = ?", (filename,)).fetchone()
+        return row[0] if row else 0
+    
+    def query(
+        self,
+        session_id: str,
+        limit: int,
+        since: Optional[datetime] = None,
+        cursor: Optional[int] = None
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Read a page of a session's entries in write order
+        
+        Args:
+            session_id: Exact session identifier
+            limit: Maximum entries to return
+            since: Only entries with a timestamp at or after this time
+            cursor: Sequence number returned as next_cursor by the previous page
+            
+        Returns:
+            Tuple of (entries, next cursor or None when there are no more)
+        """
+        sql = "SELECT seq, file, block_offset, block_length, offset, length FROM entries WHERE session_id = ?"
+        params: list = [session_id]
+        if cursor is not None:
+            sql += " AND seq > ?"
+            params.append(cursor)
+        if since is not None:
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            sql += " AND ts >= ?"
+            params.append(since.timestamp())
+        sql += " ORDER BY seq LIMIT ?"
+        params.append(limit + 1)
+        
+        rows, entries = self._lookup(sql, params, limit)
+        next_cursor = rows[-1][0] if len(rows) > limit else None
+        return entries, next_cursor
+    
+    def scan(self, session_id: Optional[str] = None) -> Iterator[dict]:
+        """
+        Iterate over all entries (optionally of one session) in write order
+        
+        Reads sequentially through daily files and compacted segments,
+        decompressing each segment block once.
+        
+        Args:
+            session_id: Optional exact session identifier
+            
+        Yields:
+            Log entries
+        """
+        sql = "SELECT seq, file, block_offset, block_length, offset, length FROM entries WHERE seq > ?"
+        if session_id is not None:
+            sql += " AND session_id = ?"
+        sql += " ORDER BY seq LIMIT 1000"
+        
+        last_seq = 0
+        while True:
+            # Page through the index so the lock is not held while reading files
+            params = [last_seq] if session_id is None else [last_seq, session_id]
+            rows, entries = self._lookup(sql, params)
+            if not rows:
+                return
+            last_seq = rows[-1][0]
+            yield from entries
+    
+    def entries_for_file(self, filename: str) -> List[Tuple[int, int, int]]:
+        """
+        Get the indexed entries stored in a plain log file
+        
+        Args:
+            filename: Log file name inside logs_dir
+            
+        Returns:
+            (seq, offset, length) of each entry in file order
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT seq, offset, length FROM entries WHERE file = ? AND block_offset IS NULL ORDER BY offset",
+                (filename,)
+            ).fetchall()
+    
+    def relocate(self, segment_file: str, moves: List[Tuple[int, Optional[int], Optional[int], int, int]]) -> None:
+        """
+        Point entries of compacted files at their new segment location
+        
+        Args:
+            segment_file: Segment file (relative to logs_dir) now holding the entries
+            moves: (seq, block offset, block length, offset, length) per entry
+        """
+        with self._lock:
+            self._db.executemany(
+                "UPDATE entries SET file = ?, block_offset = ?, block_length = ?, offset = ?, length = ? WHERE seq = ?",
+                [(segment_file, block_offset, block_length, offset, length, seq)
+                 for seq, block_offset, block_length, offset, length in moves]
+            )
+            self._db.commit()
+    
+    def forget_file(self, filename: str) -> None:
+        """
+        Drop the bookkeeping row of a log file that no longer exists
+        
+        Args:
+            filename: Log file name inside logs_dir
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM files WHERE name = ?", (filename,))
+            self._db.commit()
+    
+    def _lookup(self, sql: str, params: list, limit: Optional[int] = None) -> Tuple[list, List[dict]]:
+        # A daily file is removed only after its rows point at a segment, so
+        # if it vanished between lookup and read, a second lookup finds the new location
+        for attempt in range(2):
+            with self._lock:
+                rows = self._db.execute(sql, params).fetchall()
+            try:
+                entries = list(self._read_locations(tuple(row[1:]) for row in rows[:limit]))
+                return rows, entries
+            except FileNotFoundError:
+                if attempt:
+                    raise
+    
+    def _read_locations(self, locations: Iterable[Location]) -> Iterator[dict]:
+        handles: Dict[str, int] = {}
+        maps: Dict[str, mmap.mmap] = {}
+        block_key: Optional[Tuple[str, int]] = None
+        block = b""
+        try:
+            for filename, block_offset, block_length, offset, length in locations:
+                path = os.path.join(self.logs_dir, filename)
+                
+                if block_offset is not None:
+                    # Compressed segment: decompress each block once
+                    if block_key != (filename, block_offset):
+                        if filename not in handles:
+                            handles[filename] = os.open(path, os.O_RDONLY)
+                        block = decompress_block(filename, os.pread(handles[filename], block_length, block_offset))
+                        block_key = (filename, block_offset)
+                    raw_line = block[offset:offset + length]
+                elif filename.startswith("segments"):
+                    # Uncompressed segments are immutable, so map them instead of reading
+                    if filename not in maps:
+                        with open(path, "rb") as f:
+                            maps[filename] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    raw_line = maps[filename][offset:offset + length]
+                else:
+                    if filename not in handles:
+                        handles[filename] = os.open(path, os.O_RDONLY)
+                    raw_line = os.pread(handles[filename], length, offset)
+                
+                yield json.loads(raw_line)
+        finally:
+            for fd in handles.values():
+                os.close(fd)
+            for mapped in maps.values():
+                mapped.close()
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Singleton instance
+_log_index: Optional[ConversationLogIndex] = None
+
+
+def get_log_index() -> ConversationLogIndex:
+    """
+    Get or create ConversationLogIndex singleton instance
+    
+    Returns:
+        ConversationLogIndex instance
+    """
+    global _log_index
+    if _log_index is None:
+        _log_index = ConversationLogIndex()
+    return _log_index
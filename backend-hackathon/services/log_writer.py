@@ -0,0 +1,252 @@
+"""
+Background group-commit writer for conversation logs
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import time
+
+from services.log_index import LOGS_DIR, ConversationLogIndex, get_log_index
+
+
+class ConversationLogWriter:
+    """
+    Queue conversation log entries and append them to disk in batches
+    
+    Requests only enqueue; a single writer task collects entries until the
+    batch is full or the flush interval expires, then appends each file's
+    entries with one write (optionally followed by fsync) off the event loop.
+    Every entry gets a sequence number, and the writer publishes the highest
+    one it has finished so readers can wait for exactly their own entries.
+    """
+    
+    def __init__(
+        self,
+        logs_dir: str = LOGS_DIR,
+        index: Optional[ConversationLogIndex] = None,
+        flush_interval: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        fsync_policy: Optional[str] = None,
+        max_queue: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        """
+        Initialize log writer
+        
+        Args:
+            logs_dir: Directory holding the .jsonl log files
+            index: Index updated with the byte range of every written entry
+            flush_interval: Max seconds an entry waits before being written
+            batch_size: Max entries written per flush
+            fsync_policy: "never" (leave it to the OS) or "batch" (fsync after every flush)
+            max_queue: Max queued entries before enqueue is rejected
+            max_retries: Times a failed write is retried before its entries are dropped
+        """
+        self.logs_dir = logs_dir
+        self.index = index
+        self.flush_interval = flush_interval if flush_interval is not None else (
+            float(os.getenv("LOG_FLUSH_INTERVAL_MS", "50")) / 1000
+        )
+        self.batch_size = batch_size or int(os.getenv("LOG_BATCH_SIZE", "256"))
+        self.fsync_policy = (fsync_policy or os.getenv("LOG_FSYNC", "never")).lower()
+        if self.fsync_policy not in ("never", "batch"):
+            raise ValueError(f"Invalid LOG_FSYNC policy: {self.fsync_policy}")
+        
+        self.max_queue = max_queue or int(os.getenv("LOG_QUEUE_MAX", "10000"))
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LOG_WRITE_RETRIES", "3"))
+        
+        # Sequence number of the last enqueued entry, and the high-water mark
+        # below which every entry has been written (or dropped)
+        self._enqueued = 0
+        self._committed = 0
+        self._committed_changed: Optional[asyncio.Condition] = None
+        
+        self.written = 0
+        self.flushes = 0
+        self.retries = 0
+        self.dropped = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+    
+    def start(self) -> None:
+        """Start the writer task (no-op if already running)"""
+        if self._task is None or self._task.done():
+            # A drained queue may belong to a previous event loop (app restarted in-process)
+            if self._queue.empty():
+                self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._committed_changed = asyncio.Condition()
+            self._task = asyncio.create_task(self._run())
+    
+    def enqueue(self, filename: str, entry: dict) -> None:
+        """
+        Queue a log entry without waiting for disk I/O
+        
+        Args:
+            filename: Log file name inside logs_dir
+            entry: JSON-serializable log entry
+            
+        Raises:
+            asyncio.QueueFull: If the queue is at capacity
+        """
+        self.start()
+        self._queue.put_nowait((self._enqueued + 1, filename, entry))
+        self._enqueued += 1
+    
+    async def flush(self) -> None:
+        """
+        Wait until every entry queued before this call has been written
+        
+        Entries queued while waiting are not waited for, so readers are not
+        held up by steady traffic.
+        """
+        if self._task is None or self._task.done():
+            return
+        target = self._enqueued
+        async with self._committed_changed:
+            await self._committed_changed.wait_for(lambda: self._committed >= target)
+    
+    async def stop(self) -> None:
+        """Drain the queue and stop the writer task"""
+        if self._task is None:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def stats(self) -> dict:
+        """
+        Get writer counters
+        
+        Returns:
+            Dictionary with queue depth, flush counts and flush latency
+        """
+        return {
+            "queue_depth": self._queue.qsize(),
+            "written": self.written,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "flush_interval_ms": self.flush_interval * 1000,
+            "batch_size": self.batch_size,
+            "fsync": self.fsync_policy
+        }
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                # Entries are taken in sequence order, so the batch's last one is the high-water mark
+                self._committed = batch[-1][0]
+                async with self._committed_changed:
+                    self._committed_changed.notify_all()
+    
+    async def _commit(self, batch: List[Tuple[int, str, dict]]) -> None:
+        grouped: Dict[str, List[dict]] = defaultdict(list)
+        for _, filename, entry in batch:
+            grouped[filename].append(entry)
+        
+        started = time.perf_counter()
+        # Appended to disk but not yet indexed: filename -> (start offset, (entry, line length) pairs)
+        unindexed: Dict[str, Tuple[int, List[Tuple[dict, int]]]] = {}
+        attempt = 0
+        while True:
+            try:
+                # Each step removes what it finished, so a retry never appends the same entries twice
+                await asyncio.to_thread(self._write_files, grouped, unindexed)
+                break
+            except Exception as e:
+                remaining = sum(len(entries) for entries in grouped.values()) + sum(
+                    len(lines) for _, lines in unindexed.values()
+                )
+                if attempt >= self.max_retries:
+                    self.dropped += remaining
+                    self.written += len(batch) - remaining
+                    print(f"❌ Dropped {remaining} conversation log entries after {attempt + 1} failed writes: {e}")
+                    return
+                attempt += 1
+                self.retries += 1
+                print(f"⚠️ Failed to write conversation logs (retry {attempt}/{self.max_retries}): {e}")
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        self.written += len(batch)
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+    
+    def _write_files(
+        self,
+        grouped: Dict[str, List[dict]],
+        unindexed: Dict[str, Tuple[int, List[Tuple[dict, int]]]]
+    ) -> None:
+        os.makedirs(self.logs_dir, exist_ok=True)
+        for filename, entries in list(grouped.items()):
+            lines = [(json.dumps(entry) + "\n").encode("utf-8") for entry in entries]
+            # Unbuffered, so every byte reaches the file inside the try below
+            with open(os.path.join(self.logs_dir, filename), "ab", buffering=0) as f:
+                start_offset = f.tell()
+                try:
+                    data = memoryview(b"".join(lines))
+                    while data:
+                        data = data[f.write(data):]
+                    if self.fsync_policy == "batch":
+                        os.fsync(f.fileno())
+                except OSError:
+                    # Cut off a partial append so a retry does not leave a torn line
+                    f.truncate(start_offset)
+                    raise
+            
+            unindexed[filename] = (start_offset, [(entry, len(line)) for entry, line in zip(entries, lines)])
+            del grouped[filename]
+        
+        if self.index is not None:
+            for filename, (start_offset, lines) in list(unindexed.items()):
+                self.index.record(filename, start_offset, lines)
+                del unindexed[filename]
+        else:
+            unindexed.clear()
+
+
+# Singleton instance
+_log_writer: Optional[ConversationLogWriter] = None
+
+
+def get_log_writer() -> ConversationLogWriter:
+    """
+    Get or create ConversationLogWriter singleton instance
+    
+    Returns:
+        ConversationLogWriter instance
+    """
+    global _log_writer
+    if _log_writer is None:
+        _log_writer = ConversationLogWriter(index=get_log_index())
+    return _log_writer
@@ -0,0 +1,121 @@
+"""
+Pre-recorded sign library and phrase segmentation
+"""
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+import re
+
+# Simple mapping for common phrases (for MVP/demo)
+# In production, this would be a database lookup
+SIGN_LIBRARY: Dict[str, str] = {
+    "hello": "https://cdn.example.com/signs/hello.mp4",
+    "help": "https://cdn.example.com/signs/help.mp4",
+    "water": "https://cdn.example.com/signs/water.mp4",
+    "thank you": "https://cdn.example.com/signs/thank_you.mp4",
+    "yes": "https://cdn.example.com/signs/yes.mp4",
+    "no": "https://cdn.example.com/signs/no.mp4",
+    "where is the hospital": "https://cdn.example.com/signs/where_hospital.mp4",
+    "i need help": "https://cdn.example.com/signs/need_help.mp4",
+}
+
+DEFAULT_SIGN_URL = "https://cdn.example.com/signs/default.mp4"
+FINGERSPELL_URL = "https://cdn.example.com/signs/fingerspell/{word}.mp4"
+
+_WORD = re.compile(r"[\w']+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-cased words, dropping punctuation
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        List of words
+    """
+    return _WORD.findall(text.lower())
+
+
+class PhraseSegmenter:
+    """
+    Cover input text with the fewest library phrases
+    
+    Phrases are stored in a word-level trie. For every start position the
+    trie is walked for at most the longest phrase length, and a right-to-left
+    dynamic program picks the segmentation with the fewest clips (preferring
+    library phrases over fingerspelled words on ties). Cost is
+    O(words x longest phrase), i.e. linear in the input length.
+    """
+    
+    def __init__(self, library: Dict[str, str]):
+        """
+        Build the phrase trie
+        
+        Args:
+            library: Mapping of phrase text to clip URL
+        """
+        self._root: dict = {}
+        self.max_phrase_words = 0
+        for phrase, url in library.items():
+            words = tokenize(phrase)
+            if not words:
+                continue
+            node = self._root
+            for word in words:
+                node = node.setdefault(word, {})
+            # A None key cannot collide with a word, so it marks phrase ends
+            node[None] = url
+            self.max_phrase_words = max(self.max_phrase_words, len(words))
+    
+    def segment(self, text: str) -> List[Dict[str, str]]:
+        """
+        Segment text into an ordered clip playlist
+        
+        Args:
+            text: Text to convert to sign language
+        
+        Returns:
+            Clips in order; each has text, video_url and source
+            ("prerecorded" or "fingerspell" for words not in the library)
+        """
+        words = tokenize(text)
+        count = len(words)
+        
+        # best[i] = (clips, fingerspelled words) for words[i:]; choice[i] = (end, url)
+        best: List[Tuple[int, int]] = [(0, 0)] * (count + 1)
+        choice: List[Tuple[int, Optional[str]]] = [(count, None)] * count
+        
+        for start in range(count - 1, -1, -1):
+            clips, spelled = best[start + 1]
+            best[start] = (clips + 1, spelled + 1)
+            choice[start] = (start + 1, None)
+            
+            node = self._root
+            for end in range(start, min(count, start + self.max_phrase_words)):
+                node = node.get(words[end])
+                if node is None:
+                    break
+                url = node.get(None)
+                if url is not None:
+                    clips, spelled = best[end + 1]
+                    if (clips + 1, spelled) < best[start]:
+                        best[start] = (clips + 1, spelled)
+                        choice[start] = (end + 1, url)
+        
+        playlist = []
+        position = 0
+        while position < count:
+            end, url = choice[position]
+            phrase = " ".join(words[position:end])
+            if url is None:
+                playlist.append({
+                    "text": phrase,
+                    # Spelled words are user text; escape them so they stay one path segment
+                    "video_url": FINGERSPELL_URL.format(word=quote(phrase, safe="")),
+                    "source": "fingerspell"
+                })
+            else:
+                playlist.append({"text": phrase, "video_url": url, "source": "prerecorded"})
+            position = end
+        return playlist
@@ -0,0 +1,250 @@
+"""
+Library of recorded sign trajectories matched by pruned dynamic time warping
+"""
+from typing import List, Optional, Tuple
+import math
+import os
+import time
+import numpy as np
+from services.gesture_templates import SCALE_LANDMARK, normalize_handshapes
+from utils.dtw import banded_dtw, keogh_envelopes, lb_keogh, resample_sequence
+from utils.gesture import NUM_LANDMARKS, WRIST, as_landmark_array
+from utils.jsonl_store import LabeledJSONLStore
+
+# Data file of recorded signs, one JSON object per line:
+# {"label": "Thank you", "frames": [[[x, y, z], ... 21 landmarks], ... frames]}
+SEQUENCES_PATH = os.path.join("data", "sign_sequences.jsonl")
+# Wrist motion counts as much as the whole handshape (21 landmarks)
+TRAJECTORY_WEIGHT = math.sqrt(NUM_LANDMARKS)
+# Candidates compared per DTW batch, growing as the top-k threshold tightens
+_FIRST_BATCH = 8
+_MAX_BATCH = 64
+
+
+def sequence_features(frames: np.ndarray) -> np.ndarray:
+    """
+    Describe each frame of a landmark sequence by handshape and hand motion
+    
+    Args:
+        frames: Landmarks shaped (T, 21, 3)
+        
+    Returns:
+        Float32 array shaped (T, 66): the normalized handshape of each frame
+        (see normalize_handshapes) followed by the wrist position relative to
+        its mean over the sequence, in units of the mean palm size
+    """
+    wrist = frames[:, WRIST]
+    palm = np.linalg.norm(frames[:, SCALE_LANDMARK] - wrist, axis=1).mean()
+    trajectory = (wrist - wrist.mean(axis=0)) / (palm or 1.0) * TRAJECTORY_WEIGHT
+    return np.concatenate([normalize_handshapes(frames), trajectory.astype(np.float32)], axis=1)
+
+
+class SignSequenceLibrary(LabeledJSONLStore):
+    """
+    Dynamic sign recognizer over a library of recorded landmark sequences
+    
+    Every recorded sign and every query is resampled to the same number of
+    steps and compared by DTW within a Sakoe-Chiba band. A query is first
+    bounded against all candidates at once with LB_Keogh (envelopes are
+    precomputed). Candidates are then evaluated in order of their bound, in
+    vectorized batches. Each batch is pruned against the current k-th best
+    sign, and DTW rows are abandoned as soon as a candidate can no longer
+    beat it. Most of the library is therefore rejected without a full DTW.
+    """
+    
+    record_name = "sign sequence"
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        length: Optional[int] = None,
+        band: Optional[float] = None,
+        max_distance: Optional[float] = None
+    ):
+        """
+        Load recorded signs from the data file
+        
+        Args:
+            path: JSONL data file (defaults to GESTURE_SEQUENCES_PATH or data/sign_sequences.jsonl)
+            length: Steps every sequence is resampled to (defaults to GESTURE_DTW_LENGTH)
+            band: Sakoe-Chiba band as a fraction of length (defaults to GESTURE_DTW_BAND)
+            max_distance: Matches with a larger per-step RMS distance are
+                discarded (defaults to GESTURE_DTW_MAX_DISTANCE)
+        """
+        super().__init__(path or os.getenv("GESTURE_SEQUENCES_PATH") or SEQUENCES_PATH)
+        self.length = max(2, length or int(os.getenv("GESTURE_DTW_LENGTH", "32")))
+        band_ratio = band if band is not None else float(os.getenv("GESTURE_DTW_BAND", "0.1"))
+        self.band = max(1, int(math.ceil(band_ratio * self.length)))
+        self.max_distance = max_distance if max_distance is not None else float(
+            os.getenv("GESTURE_DTW_MAX_DISTANCE", "4.0")
+        )
+        
+        self._features = np.zeros((0, self.length, NUM_LANDMARKS * 3 + 3), dtype=np.float32)
+        self._upper = self._features
+        self._lower = self._features
+        
+        self.queries = 0
+        self.candidates = 0
+        self.lb_pruned = 0
+        self.abandoned = 0
+        self.completed = 0
+        self.total_seconds = 0.0
+        self.load()
+    
+    def _resampled_features(self, frames) -> np.ndarray:
+        """Features of a landmark sequence resampled to self.length steps"""
+        return resample_sequence(sequence_features(as_landmark_array(frames)), self.length)
+    
+    def load(self) -> int:
+        """
+        (Re)load all recorded signs from the data file
+        
+        Returns:
+            Number of recorded sequences loaded
+        """
+        labels, features = self._read_records(lambda record: self._resampled_features(record["frames"]))
+        stacked = np.array(features, dtype=np.float32).reshape(-1, *self._features.shape[1:])
+        with self._lock:
+            self._rebuild(labels, stacked, *keogh_envelopes(stacked, self.band))
+        return len(labels)
+    
+    def _rebuild(self, template_labels: List[str], features: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> None:
+        """Swap in new library arrays and their label index (lock held)"""
+        self._index_labels(template_labels)
+        self._features, self._upper, self._lower = features, upper, lower
+    
+    def add(self, label: str, frames) -> int:
+        """
+        Add a recorded sign and append it to the data file
+        
+        Args:
+            label: Sign name
+            frames: Landmark sequence shaped (T, 21, 3) or (T, 21, 2), T >= 2
+            
+        Returns:
+            Number of recordings now stored for the label
+            
+        Raises:
+            ValueError: If the frames have the wrong shape
+        """
+        frames = as_landmark_array(frames)
+        if len(frames) < 2:
+            raise ValueError("A sign recording needs at least 2 frames")
+        features = self._resampled_features(frames)[None]
+        upper, lower = keogh_envelopes(features, self.band)
+        with self._lock:
+            self._append_records([{"label": label, "frames": frames.tolist()}])
+            self._rebuild(
+                self._record_labels + [label],
+                np.concatenate([self._features, features]),
+                np.concatenate([self._upper, upper]),
+                np.concatenate([self._lower, lower])
+            )
+            return self._record_labels.count(label)
+    
+    def match(self, frames, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Find the recorded signs closest to a landmark sequence
+        
+        Args:
+            frames: Landmark sequence shaped (T, 21, 3) or (T, 21, 2), T >= 2
+            k: Number of signs to return
+            
+        Returns:
+            Up to k (label, distance) pairs, best first, one per sign. The
+            distance is the DTW cost as an RMS distance per step; signs
+            farther than max_distance are left out.
+            
+        Raises:
+            ValueError: If the frames have the wrong shape
+        """
+        started = time.monotonic()
+        frames = as_landmark_array(frames)
+        if len(frames) < 2:
+            raise ValueError("A sign sequence needs at least 2 frames")
+        query = self._resampled_features(frames)
+        with self._lock:
+            features, upper, lower = self._features, self._upper, self._lower
+            label_ids, labels = self._label_ids, self.labels
+        
+        # Best DTW cost per sign found so far; the k-th best is the pruning threshold
+        best = np.full(len(labels), np.inf)
+        max_cost = self.max_distance ** 2 * self.length
+        k = max(1, k)
+        
+        bounds = lb_keogh(query, upper, lower)
+        totals = bounds.sum(axis=1)
+        order = np.argsort(totals)
+        position, batch_size, pruned, abandoned = 0, _FIRST_BATCH, 0, 0
+        while position < len(order):
+            threshold = min(max_cost, np.partition(best, k - 1)[k - 1] if len(best) >= k else np.inf)
+            batch = order[position:position + batch_size]
+            # Bounds are sorted, so once one reaches the threshold the rest do too
+            viable = int(np.searchsorted(totals[batch], threshold, side="left"))
+            if viable < len(batch):
+                pruned += len(order) - position - viable
+                batch = batch[:viable]
+                position = len(order)
+            else:
+                position += len(batch)
+            if not len(batch):
+                break
+            
+            costs = banded_dtw(query, features[batch], self.band, bounds[batch], threshold)
+            abandoned += int(np.isinf(costs).sum())
+            np.minimum.at(best, label_ids[batch], costs)
+            batch_size = min(batch_size * 2, _MAX_BATCH)
+        
+        ranked = np.argsort(best)[:k]
+        results = [
+            (labels[label_id], math.sqrt(best[label_id] / self.length))
+            for label_id in ranked.tolist()
+            if best[label_id] <= max_cost
+        ]
+        
+        self.queries += 1
+        self.candidates += len(order)
+        self.lb_pruned += pruned
+        self.abandoned += abandoned
+        self.completed += len(order) - pruned - abandoned
+        self.total_seconds += time.monotonic() - started
+        return results
+    
+    def stats(self) -> dict:
+        """
+        Get library size and pruning counters
+        
+        Returns:
+            Dictionary with sign and recording counts, how candidates were
+            rejected, and the average match time
+        """
+        return {
+            "labels": len(self.labels),
+            "recordings": len(self._features),
+            "length": self.length,
+            "band": self.band,
+            "queries": self.queries,
+            "candidates": self.candidates,
+            "lb_pruned": self.lb_pruned,
+            "abandoned": self.abandoned,
+            "completed": self.completed,
+            "avg_ms": round(self.total_seconds / self.queries * 1000, 3) if self.queries else None,
+            "path": self.path
+        }
+
+
+# Singleton instance
+_sequence_library: Optional[SignSequenceLibrary] = None
+
+
+def get_sequence_library() -> SignSequenceLibrary:
+    """
+    Get or create SignSequenceLibrary singleton instance
+    
+    Returns:
+        SignSequenceLibrary instance
+    """
+    global _sequence_library
+    if _sequence_library is None:
+        _sequence_library = SignSequenceLibrary()
+    return _sequence_library
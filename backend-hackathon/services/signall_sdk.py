@@ -2,8 +2,14 @@
 SignAll SDK integration for sign language output
 """
 import httpx
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, Set
+import asyncio
 import os
+from services.http_pool import get_upstream_client, is_upstream_failure, prewarm_upstream
+from services.sign_library import SIGN_LIBRARY, DEFAULT_SIGN_URL, PhraseSegmenter
+from utils.cache import TTLCache
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.singleflight import SingleFlight
 
 
 class SignAllService:
@@ -19,7 +25,41 @@ class SignAllService:
         """
         self.api_key = api_key or os.getenv("SIGNALL_API_KEY")
         self.api_url = api_url or os.getenv("SIGNALL_API_URL", "https://api.signall.us")
-        self.client = httpx.AsyncClient(timeout=30.0)
+        
+        # Concurrent identical requests share a single upstream call
+        self.inflight = SingleFlight()
+        
+        # Splits text into library phrases for the pre-recorded fallback
+        self.segmenter = PhraseSegmenter(SIGN_LIBRARY)
+        
+        # SignAll results: served fresh, then stale while refreshing; failures cached briefly
+        self.cache = TTLCache(
+            max_entries=int(os.getenv("SIGNALL_CACHE_MAX_ENTRIES", "5000")),
+            ttl_seconds=float(os.getenv("SIGNALL_CACHE_TTL_SECONDS", "300")),
+            stale_seconds=float(os.getenv("SIGNALL_CACHE_STALE_SECONDS", "3600")),
+            negative_ttl_seconds=float(os.getenv("SIGNALL_NEGATIVE_TTL_SECONDS", "30"))
+        )
+        self._refreshes: Set[asyncio.Task] = set()
+        self.background_refreshes = 0
+        
+        # Skip straight to the fallback while SignAll is down (SIGNALL_BREAKER_* settings)
+        self.breaker = CircuitBreaker("signall", is_failure=is_upstream_failure)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client for the SignAll API (SIGNALL_HTTP_* settings)"""
+        return get_upstream_client("signall")
+    
+    async def prewarm(self) -> int:
+        """
+        Open pooled connections to the SignAll API ahead of traffic
+        
+        Returns:
+            Number of connections opened (0 without an API key)
+        """
+        if not self.api_key:
+            return 0
+        return await prewarm_upstream("signall", self.api_url)
     
     async def text_to_sign(
         self,
@@ -43,6 +83,68 @@ class SignAllService:
             # Fallback: Return pre-recorded sign videos (for MVP)
             return await self._get_prerecorded_sign(text, language)
         
+        key = (" ".join(text.lower().split()), language)
+        state, cached = self.cache.get(key)
+        
+        if state == TTLCache.FRESH:
+            return {**cached, "text": text}
+        
+        if state == TTLCache.STALE:
+            # Serve the stale result now and refresh it in the background,
+            # unless a refresh failed within SIGNALL_NEGATIVE_TTL_SECONDS
+            if not self.cache.refresh_failed_recently(key):
+                self._refresh_in_background(key, text, language)
+            return {**cached, "text": text}
+        
+        if state == TTLCache.NEGATIVE:
+            # SignAll failed moments ago; don't wait on it again
+            return await self._get_prerecorded_sign(text, language)
+        
+        try:
+            result = await self.inflight.do(key, lambda: self._refresh(key, text, language))
+        except CircuitOpenError:
+            # SignAll is known to be down; don't wait on it
+            return await self._get_prerecorded_sign(text, language)
+        except httpx.HTTPError as e:
+            print(f"SignAll API error: {e}")
+            # Fallback to pre-recorded signs
+            return await self._get_prerecorded_sign(text, language)
+        
+        return {**result, "text": text}
+    
+    def _refresh_in_background(self, key: tuple, text: str, language: str) -> None:
+        """Start a coalesced background refresh of a stale cache entry"""
+        async def refresh():
+            try:
+                await self.inflight.do(key, lambda: self._refresh(key, text, language))
+            except CircuitOpenError:
+                pass
+            except httpx.HTTPError as e:
+                print(f"SignAll background refresh failed: {e}")
+        
+        self.background_refreshes += 1
+        task = asyncio.create_task(refresh())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+    
+    async def _refresh(self, key: tuple, text: str, language: str) -> Dict[str, str]:
+        """Fetch from SignAll and update the cache (negatively on failure)"""
+        try:
+            result = await self._request_text_to_sign(text, language)
+        except httpx.HTTPError:
+            self.cache.set_negative(key)
+            raise
+        self.cache.set(key, result)
+        return result
+    
+    async def _request_text_to_sign(self, text: str, language: str) -> Dict[str, str]:
+        """
+        Send a text-to-sign request to SignAll
+        
+        Raises:
+            httpx.HTTPError: If the request fails
+            CircuitOpenError: If SignAll is failing and the call was skipped
+        """
         # Make API request to SignAll
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -55,64 +157,67 @@ class SignAllService:
             "format": "mp4"
         }
         
-        try:
+        async def post() -> httpx.Response:
             response = await self.client.post(
                 f"{self.api_url}/v1/text-to-sign",
                 json=payload,
                 headers=headers
             )
             response.raise_for_status()
-            
-            data = response.json()
-            return {
-                "video_url": data.get("video_url"),
-                "text": text,
-                "language": language
-            }
+            return response
         
-        except httpx.HTTPError as e:
-            print(f"SignAll API error: {e}")
-            # Fallback to pre-recorded signs
-            return await self._get_prerecorded_sign(text, language)
+        response = await self.breaker.call(post)
+        
+        data = response.json()
+        return {
+            "video_url": data.get("video_url"),
+            "text": text,
+            "language": language
+        }
     
-    async def _get_prerecorded_sign(self, text: str, language: str) -> Dict[str, str]:
+    async def _get_prerecorded_sign(self, text: str, language: str) -> Dict[str, Any]:
         """
         Fallback: Map text to pre-recorded sign videos
         
+        The text is segmented into the fewest library phrases; words not in
+        the library become fingerspelling clips.
+        
         Args:
             text: Text to map
             language: Sign language type
             
         Returns:
-            Dictionary with video_url
+            Dictionary with video_url and an ordered clip playlist
         """
-        # Simple mapping for common phrases (for MVP/demo)
-        # In production, this would be a database lookup
-        sign_library = {
-            "hello": "https://cdn.example.com/signs/hello.mp4",
-            "help": "https://cdn.example.com/signs/help.mp4",
-            "water": "https://cdn.example.com/signs/water.mp4",
-            "thank you": "https://cdn.example.com/signs/thank_you.mp4",
-            "yes": "https://cdn.example.com/signs/yes.mp4",
-            "no": "https://cdn.example.com/signs/no.mp4",
-            "where is the hospital": "https://cdn.example.com/signs/where_hospital.mp4",
-            "i need help": "https://cdn.example.com/signs/need_help.mp4",
-        }
+        playlist = self.segmenter.segment(text)
         
-        # Normalize text for lookup
-        normalized_text = text.lower().strip()
-        video_url = sign_library.get(normalized_text, "https://cdn.example.com/signs/default.mp4")
+        # Single-clip URL for clients that do not read the playlist
+        if len(playlist) == 1 and playlist[0]["source"] == "prerecorded":
+            video_url = playlist[0]["video_url"]
+        else:
+            video_url = DEFAULT_SIGN_URL
         
         return {
             "video_url": video_url,
             "text": text,
             "language": language,
-            "source": "prerecorded"
+            "source": "prerecorded",
+            "playlist": playlist
         }
     
+    def cache_stats(self) -> dict:
+        """
+        Get result cache counters
+        
+        Returns:
+            Dictionary with cache hit counters and background refresh count
+        """
+        return {**self.cache.stats(), "background_refreshes": self.background_refreshes}
+    
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """Cancel background refreshes (the shared HTTP client is closed by close_upstream_clients)"""
+        for task in self._refreshes:
+            task.cancel()
 
 
 # Singleton instance
@@ -0,0 +1,394 @@
+"""
+Speech-to-Text backends: OpenAI Whisper API or a local in-process model
+"""
+from openai import OpenAI
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple, Union
+import asyncio
+import os
+import threading
+import numpy as np
+from utils.audio_utils import (
+    AudioBufferReader, TARGET_SAMPLE_RATE, decode_audio, get_audio_format, resample, wav_pcm16_mono
+)
+from utils.micro_batch import MicroBatcher
+
+
+class STTBackend(ABC):
+    """Interface of a Speech-to-Text backend used by WhisperSTTService"""
+    
+    name = "base"
+    model_name = ""
+    
+    async def warmup(self) -> None:
+        """Prepare the backend before the first request (no-op by default)"""
+    
+    @abstractmethod
+    async def transcribe(
+        self,
+        audio_content: Union[bytes, memoryview],
+        filename: str,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Transcribe one audio file
+        
+        Args:
+            audio_content: Audio file content
+            filename: Filename (used to determine format)
+            language: Optional language code
+            prompt: Optional prompt to guide transcription
+            
+        Returns:
+            Tuple of (transcript, detected_language)
+        """
+        raise NotImplementedError
+    
+    @abstractmethod
+    async def translate(self, audio_content: Union[bytes, memoryview], filename: str) -> str:
+        """
+        Translate one audio file to English text
+        
+        Args:
+            audio_content: Audio file content
+            filename: Filename (used to determine format)
+            
+        Returns:
+            English translation
+        """
+        raise NotImplementedError
+    
+    def stats(self) -> dict:
+        """
+        Get backend counters
+        
+        Returns:
+            Dictionary of backend-specific counters
+        """
+        return {}
+    
+    async def close(self) -> None:
+        """Release backend resources"""
+
+
+class OpenAIWhisperBackend(STTBackend):
+    """OpenAI Whisper API (whisper-1) called from a bounded thread pool"""
+    
+    name = "openai"
+    model_name = "whisper-1"
+    
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Initialize OpenAI Whisper client
+        
+        Args:
+            api_key: OpenAI API key (from environment if not provided)
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        
+        self.client = OpenAI(api_key=self.api_key)
+        
+        # The OpenAI client is synchronous, so calls run on a dedicated bounded
+        # thread pool instead of blocking the event loop
+        self.max_concurrency = int(os.getenv("STT_MAX_CONCURRENCY", "4"))
+        self.timeout = float(os.getenv("STT_TIMEOUT_SECONDS", "60"))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="whisper-stt"
+        )
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+    
+    async def _run_blocking(self, fn: Callable[[], Any]) -> Any:
+        """
+        Run a blocking Whisper call on the executor under the concurrency cap
+        
+        Args:
+            fn: Zero-argument function performing the API call
+            
+        Returns:
+            Result of fn
+            
+        Raises:
+            Exception: If the call fails or exceeds the per-call timeout
+        """
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        
+        self.active += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn)
+        
+        def release(done: asyncio.Future):
+            # The slot is held until the worker thread actually finishes
+            self.active -= 1
+            self._slots.release()
+            if done.cancelled() or done.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+        
+        future.add_done_callback(release)
+        
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise Exception(f"Whisper request timed out after {self.timeout:g}s")
+    
+    async def transcribe(
+        self,
+        audio_content: Union[bytes, memoryview],
+        filename: str,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None
+    ) -> Tuple[str, Optional[str]]:
+        # File-like view of the buffer; Whisper uses the filename to detect format
+        audio_file = AudioBufferReader(audio_content, filename)
+        
+        # Prepare transcription parameters
+        transcribe_params = {
+            "file": audio_file,
+            "model": self.model_name,
+            "response_format": "verbose_json"  # Get detailed response with language
+        }
+        
+        if language:
+            transcribe_params["language"] = language
+        
+        if prompt:
+            transcribe_params["prompt"] = prompt
+        
+        # Perform transcription off the event loop
+        transcribe_params["timeout"] = self.timeout
+        response = await self._run_blocking(
+            lambda: self.client.audio.transcriptions.create(**transcribe_params)
+        )
+        
+        return response.text, getattr(response, 'language', None)
+    
+    async def translate(self, audio_content: Union[bytes, memoryview], filename: str) -> str:
+        audio_file = AudioBufferReader(audio_content, filename)
+        
+        # Use Whisper's translation endpoint off the event loop
+        response = await self._run_blocking(
+            lambda: self.client.audio.translations.create(
+                file=audio_file,
+                model=self.model_name,
+                timeout=self.timeout
+            )
+        )
+        
+        return response.text
+    
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "queue_depth": self.queued,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts
+        }
+    
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LocalWhisperBackend(STTBackend):
+    """
+    Whisper model running in-process on the CPU (Hugging Face transformers)
+    
+    Concurrent requests are grouped by a MicroBatcher into a single batched
+    inference call. On a CPU, one batched forward pass costs far less than
+    the same requests run one after another.
+    """
+    
+    name = "local"
+    
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        load_model: Optional[Callable[[str], Callable]] = None
+    ):
+        """
+        Initialize local backend (the model is loaded by warmup() or the first request)
+        
+        Args:
+            model_name: Hugging Face model ID or path (defaults to STT_LOCAL_MODEL)
+            load_model: Builds the inference function from the model name: it
+                takes (list of float32 16 kHz arrays, language, task) and
+                returns a transcript per array. Defaults to a transformers
+                pipeline; a stand-in can be passed for tests.
+        """
+        self.model_name = model_name or os.getenv("STT_LOCAL_MODEL", "openai/whisper-tiny")
+        self.load_model = load_model or _load_transformers_model
+        self.timeout = float(os.getenv("STT_TIMEOUT_SECONDS", "60"))
+        
+        self.batcher = MicroBatcher(
+            self._infer_batch,
+            max_batch_size=int(os.getenv("STT_BATCH_MAX_SIZE", "8")),
+            max_wait_ms=float(os.getenv("STT_BATCH_MAX_WAIT_MS", "20")),
+            name="local-stt"
+        )
+        self._model: Optional[Callable] = None
+        self._load_lock = threading.Lock()
+        
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+    
+    def _get_model(self) -> Callable:
+        with self._load_lock:
+            if self._model is None:
+                print(f"🧠 Loading local STT model {self.model_name}...")
+                self._model = self.load_model(self.model_name)
+        return self._model
+    
+    async def warmup(self) -> None:
+        """Load the model and run one inference so the first request is not slow"""
+        await asyncio.to_thread(self._get_model)
+        await self.batcher.submit((np.zeros(TARGET_SAMPLE_RATE, dtype=np.float32), None, "transcribe"))
+        print(f"✅ Local STT model {self.model_name} ready")
+    
+    def _infer_batch(self, items: List[Tuple[np.ndarray, Optional[str], str]]) -> List[str]:
+        """Run one batch on the inference thread, one model call per (language, task)"""
+        model = self._get_model()
+        groups: dict = {}
+        for index, (_, language, task) in enumerate(items):
+            groups.setdefault((language, task), []).append(index)
+        
+        results: List[str] = [""] * len(items)
+        for (language, task), indices in groups.items():
+            transcripts = model([items[index][0] for index in indices], language, task)
+            for index, transcript in zip(indices, transcripts):
+                results[index] = transcript.strip()
+        return results
+    
+    async def _run(self, audio_content: Union[bytes, memoryview], filename: str, language: Optional[str], task: str) -> str:
+        samples = await asyncio.to_thread(_load_samples, audio_content, filename)
+        try:
+            transcript = await asyncio.wait_for(self.batcher.submit((samples, language, task)), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise Exception(f"Local transcription timed out after {self.timeout:g}s")
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        return transcript
+    
+    async def transcribe(
+        self,
+        audio_content: Union[bytes, memoryview],
+        filename: str,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None
+    ) -> Tuple[str, Optional[str]]:
+        # Prompts are not supported by the local pipeline and are ignored
+        transcript = await self._run(audio_content, filename, language, "transcribe")
+        return transcript, language
+    
+    async def translate(self, audio_content: Union[bytes, memoryview], filename: str) -> str:
+        return await self._run(audio_content, filename, None, "translate")
+    
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "timeout_seconds": self.timeout,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            **self.batcher.stats()
+        }
+    
+    async def close(self) -> None:
+        self.batcher.close()
+
+
+def _load_samples(audio_content: Union[bytes, memoryview], filename: str) -> np.ndarray:
+    """Decode audio to float32 16 kHz mono samples for the local model"""
+    pcm_audio = wav_pcm16_mono(audio_content)
+    if pcm_audio and pcm_audio[1] == TARGET_SAMPLE_RATE:
+        # Preprocessed uploads are already in the model's input format
+        return np.frombuffer(pcm_audio[0], dtype="<i2").astype(np.float32) / 32768.0
+    
+    samples, sample_rate = decode_audio(bytes(audio_content), get_audio_format(filename))
+    mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    return resample(mono, sample_rate, TARGET_SAMPLE_RATE).astype(np.float32)
+
+
+def _load_transformers_model(model_name: str) -> Callable:
+    """Build a batched inference function from a transformers ASR pipeline"""
+    try:
+        from transformers import pipeline
+    except ImportError:
+        raise ValueError("STT_BACKEND=local requires transformers and torch (pip install transformers torch)")
+    
+    asr = pipeline(
+        "automatic-speech-recognition",
+        model=model_name,
+        device="cpu",
+        # Inputs longer than Whisper's 30s window are split by the pipeline
+        chunk_length_s=30
+    )
+    # English-only checkpoints reject the language and task options
+    multilingual = not model_name.endswith(".en")
+    
+    def infer(batch: List[np.ndarray], language: Optional[str], task: str) -> List[str]:
+        generate_kwargs = {}
+        if multilingual:
+            generate_kwargs["task"] = task
+            if language:
+                generate_kwargs["language"] = language
+        outputs = asr(
+            [{"raw": samples, "sampling_rate": TARGET_SAMPLE_RATE} for samples in batch],
+            batch_size=len(batch),
+            generate_kwargs=generate_kwargs
+        )
+        return [output["text"] for output in outputs]
+    
+    return infer
+
+
+def create_stt_backend(api_key: Optional[str] = None) -> STTBackend:
+    """
+    Create the backend selected by STT_BACKEND
+    
+    Args:
+        api_key: OpenAI API key for the openai backend (from environment if not provided)
+        
+    Returns:
+        OpenAIWhisperBackend ("openai", default) or LocalWhisperBackend ("local")
+    """
+    backend = os.getenv("STT_BACKEND", "openai").lower()
+    if backend == "local":
+        return LocalWhisperBackend()
+    if backend != "openai":
+        raise ValueError(f"Unknown STT_BACKEND: {backend} (expected 'openai' or 'local')")
+    return OpenAIWhisperBackend(api_key=api_key)
+
+
+def stt_model_name() -> str:
+    """
+    Get the name of the configured transcription model without creating a backend
+    
+    Returns:
+        "whisper-1" for the OpenAI backend, otherwise STT_LOCAL_MODEL
+    """
+    if os.getenv("STT_BACKEND", "openai").lower() == "local":
+        return os.getenv("STT_LOCAL_MODEL", "openai/whisper-tiny")
+    return OpenAIWhisperBackend.model_name
@@ -0,0 +1,242 @@
+"""
+Persistent cache of transcripts keyed by audio content
+"""
+from typing import Optional, Tuple, Union
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from utils.audio_utils import wav_pcm16_mono
+
+CACHE_DIR = "cache"
+
+
+def transcript_key(
+    audio_content: Union[bytes, memoryview],
+    language: Optional[str] = None,
+    prompt: Optional[str] = None,
+    model: str = "whisper-1"
+) -> str:
+    """
+    Build the cache key of a transcription request
+    
+    Preprocessed uploads are 16 kHz mono WAV, so only their samples are
+    hashed: the same recording uploaded as .mp3 or .m4a, or with different
+    WAV metadata, gets the same key. Audio that could not be decoded is
+    hashed as uploaded.
+    
+    Args:
+        audio_content: Audio that would be sent to the transcription model
+        language: Requested language code
+        prompt: Prompt guiding transcription
+        model: Transcription model name
+        
+    Returns:
+        Hex digest identifying the request
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    pcm_audio = wav_pcm16_mono(audio_content)
+    if pcm_audio:
+        digest.update(b"pcm16:%d:" % pcm_audio[1])
+        digest.update(pcm_audio[0])
+    else:
+        digest.update(b"raw:")
+        digest.update(audio_content)
+    # Separators keep e.g. language "en" + prompt "x" apart from "enx"
+    for part in (model, language or "", prompt or ""):
+        digest.update(b"\0" + part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """
+    SQLite-backed LRU cache of transcripts
+    
+    Retried uploads and replayed recordings (e.g. kiosk phrases) are answered
+    without another Whisper call, including after a restart. The cache is
+    bounded by entry count and total transcript bytes; the least recently
+    used entries are evicted first.
+    """
+    
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        Open (or create) the cache database
+        
+        Args:
+            db_path: SQLite file path (defaults to STT_CACHE_PATH or cache/transcripts.sqlite3)
+            max_entries: Maximum cached transcripts (defaults to STT_CACHE_MAX_ENTRIES)
+            max_bytes: Maximum total transcript size (defaults to STT_CACHE_MAX_MB)
+        """
+        self.db_path = db_path or os.getenv("STT_CACHE_PATH") or os.path.join(CACHE_DIR, "transcripts.sqlite3")
+        self.max_entries = max_entries or int(os.getenv("STT_CACHE_MAX_ENTRIES", "10000"))
+        self.max_bytes = max_bytes or int(float(os.getenv("STT_CACHE_MAX_MB", "16")) * 1024 * 1024)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        # Used from worker threads of concurrent requests
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self.entries = 0
+        self.bytes = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        
+        with self._lock:
+            self._connect()
+    
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Reopened lazily after close() (e.g. on app restart in the same process)
+        if self._connection is None:
+            self._connect()
+        return self._connection
+    
+    def _connect(self) -> None:
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                key TEXT PRIMARY KEY,
+                transcript TEXT NOT NULL,
+                language TEXT,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS transcripts_last_used ON transcripts (last_used);
+        """)
+        self._connection.commit()
+        self.entries, self.bytes = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+        ).fetchone()
+        # Limits may have been lowered since the last run
+        self._evict()
+    
+    def get(self, key: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Look up a cached transcript
+        
+        Args:
+            key: Key from transcript_key()
+            
+        Returns:
+            Tuple of (transcript, detected_language), or None on a miss
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT transcript, language FROM transcripts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE transcripts SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+            return row[0], row[1]
+    
+    def set(self, key: str, transcript: str, language: Optional[str]) -> None:
+        """
+        Store a transcript, evicting least recently used entries over the limits
+        
+        Args:
+            key: Key from transcript_key()
+            transcript: Transcribed text
+            language: Detected language code
+        """
+        size = len(transcript.encode("utf-8")) + len(language or "")
+        if size > self.max_bytes:
+            return
+        
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM transcripts WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO transcripts (key, transcript, language, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, transcript, language, size, now, now)
+            )
+            if previous is None:
+                self.entries += 1
+            else:
+                self.bytes -= previous[0]
+            self.bytes += size
+            self._evict()
+            self._db.commit()
+            self.stores += 1
+    
+    def _evict(self) -> None:
+        """Delete least recently used entries until within limits (lock held)"""
+        while self.entries > self.max_entries or self.bytes > self.max_bytes:
+            over = max(1, self.entries - self.max_entries)
+            rows = self._db.execute(
+                "SELECT key, size FROM transcripts ORDER BY last_used LIMIT ?", (over,)
+            ).fetchall()
+            if not rows:
+                break
+            self._db.executemany("DELETE FROM transcripts WHERE key = ?", [(key,) for key, _ in rows])
+            self.entries -= len(rows)
+            self.bytes -= sum(size for _, size in rows)
+            self.evictions += len(rows)
+        self._db.commit()
+    
+    def stats(self) -> dict:
+        """
+        Get cache counters
+        
+        Returns:
+            Dictionary with hits, misses, hit ratio, size and evictions
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.entries,
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions
+        }
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Singleton instance
+_transcript_cache: Optional[TranscriptCache] = None
+
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """
+    Get or create TranscriptCache singleton instance
+    
+    Returns:
+        TranscriptCache instance, or None when disabled with STT_CACHE=false
+    """
+    global _transcript_cache
+    if os.getenv("STT_CACHE", "true").lower() != "true":
+        return None
+    if _transcript_cache is None:
+        _transcript_cache = TranscriptCache()
+    return _transcript_cache
+
+
+def close_transcript_cache() -> None:
+    """Close the TranscriptCache singleton if it was created"""
+    global _transcript_cache
+    if _transcript_cache is not None:
+        _transcript_cache.close()
+        _transcript_cache = None
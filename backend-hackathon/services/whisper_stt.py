@@ -1,40 +1,62 @@
 """
-OpenAI Whisper Speech-to-Text service integration
+Whisper Speech-to-Text service (OpenAI API or local model backend)
 """
-from openai import OpenAI
-from typing import Optional, Tuple
+from collections import Counter
+from typing import Optional, Tuple, Union
+import asyncio
 import os
-import io
+from services.stt_backends import STTBackend, create_stt_backend
+from utils.audio_utils import pcm_to_wav
+from utils.long_audio import plan_chunks, stitch_transcripts
 
 
 class WhisperSTTService:
-    """Service for OpenAI Whisper Speech-to-Text API"""
+    """Service for Whisper Speech-to-Text through a pluggable backend"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, backend: Optional[STTBackend] = None):
         """
-        Initialize OpenAI Whisper client
+        Initialize the transcription backend
         
         Args:
             api_key: OpenAI API key (from environment if not provided)
+            backend: Backend to use (defaults to the one selected by STT_BACKEND)
         """
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        self.backend = backend or create_stt_backend(api_key=api_key)
+    
+    @property
+    def model_name(self) -> str:
+        """Name of the transcription model"""
+        return self.backend.model_name
+    
+    async def warmup(self) -> None:
+        """Load the backend model ahead of traffic (local backend only)"""
+        await self.backend.warmup()
+    
+    def stats(self) -> dict:
+        """
+        Get backend counters
         
-        self.client = OpenAI(api_key=self.api_key)
+        Returns:
+            Dictionary with the backend name and its queue and call counters
+        """
+        return {"backend": self.backend.name, **self.backend.stats()}
+    
+    async def close(self):
+        """Shut down the transcription backend"""
+        await self.backend.close()
     
     async def transcribe_audio(
         self,
-        audio_content: bytes,
+        audio_content: Union[bytes, memoryview],
         filename: str,
         language: Optional[str] = None,
         prompt: Optional[str] = None
     ) -> Tuple[str, Optional[str]]:
         """
-        Transcribe audio to text using OpenAI Whisper API
+        Transcribe audio to text with the configured backend
         
         Args:
-            audio_content: Audio file content as bytes
+            audio_content: Audio file content (bytes or a memoryview, not copied)
             filename: Original filename (used to determine format)
             language: Optional language code (e.g., 'en', 'ar')
             prompt: Optional prompt to guide transcription
@@ -46,45 +68,82 @@ class WhisperSTTService:
             Exception: If transcription fails
         """
         try:
-            # Create a file-like object from bytes
-            audio_file = io.BytesIO(audio_content)
-            audio_file.name = filename  # Whisper uses filename to detect format
-            
-            # Prepare transcription parameters
-            transcribe_params = {
-                "file": audio_file,
-                "model": "whisper-1",
-                "response_format": "verbose_json"  # Get detailed response with language
-            }
-            
-            if language:
-                transcribe_params["language"] = language
-            
-            if prompt:
-                transcribe_params["prompt"] = prompt
-            
-            # Perform transcription
-            response = self.client.audio.transcriptions.create(**transcribe_params)
-            
-            # Extract transcript and language
-            transcript = response.text
-            detected_language = getattr(response, 'language', None)
-            
-            return transcript, detected_language
+            return await self.backend.transcribe(audio_content, filename, language=language, prompt=prompt)
         
         except Exception as e:
             raise Exception(f"Whisper transcription failed: {str(e)}")
     
+    async def transcribe_long_audio(
+        self,
+        pcm: bytes,
+        sample_rate: int,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Transcribe a long recording as overlapping chunks in parallel
+        
+        The audio is cut at pauses into STT_CHUNK_SECONDS windows overlapping
+        by STT_CHUNK_OVERLAP_SECONDS. At most STT_CHUNK_CONCURRENCY chunks of
+        one recording are transcribed at once, and the transcripts are
+        stitched in order with repeated words at each seam removed.
+        
+        Args:
+            pcm: 16-bit little-endian mono samples
+            sample_rate: Sample rate in Hz
+            language: Optional language code (e.g., 'en', 'ar')
+            prompt: Optional prompt to guide transcription of every chunk
+            
+        Returns:
+            Tuple of (transcript, most common detected language)
+            
+        Raises:
+            Exception: If transcription of any chunk fails
+        """
+        target_seconds = float(os.getenv("STT_CHUNK_SECONDS", "30"))
+        chunks = plan_chunks(
+            pcm,
+            sample_rate=sample_rate,
+            target_seconds=target_seconds,
+            max_seconds=target_seconds * 1.5,
+            overlap_seconds=float(os.getenv("STT_CHUNK_OVERLAP_SECONDS", "1.0"))
+        )
+        slots = asyncio.Semaphore(int(os.getenv("STT_CHUNK_CONCURRENCY", "4")))
+        
+        async def transcribe_chunk(index: int, start: int, end: int) -> Tuple[str, Optional[str]]:
+            async with slots:
+                return await self.transcribe_audio(
+                    audio_content=pcm_to_wav(pcm[start:end], sample_rate=sample_rate),
+                    filename=f"chunk_{index}.wav",
+                    language=language,
+                    prompt=prompt
+                )
+        
+        tasks = [
+            asyncio.ensure_future(transcribe_chunk(index, start, end))
+            for index, (start, end) in enumerate(chunks)
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            # One failed chunk fails the recording; stop the others
+            for task in tasks:
+                task.cancel()
+        
+        transcript = stitch_transcripts([text for text, _ in results], chunks)
+        languages = Counter(detected for _, detected in results if detected)
+        return transcript, languages.most_common(1)[0][0] if languages else None
+    
     async def translate_to_english(
         self,
-        audio_content: bytes,
+        audio_content: Union[bytes, memoryview],
         filename: str
     ) -> str:
         """
         Translate audio to English text (Whisper's translation feature)
         
         Args:
-            audio_content: Audio file content as bytes
+            audio_content: Audio file content (bytes or a memoryview, not copied)
             filename: Original filename
             
         Returns:
@@ -94,17 +153,7 @@ class WhisperSTTService:
             Exception: If translation fails
         """
         try:
-            # Create a file-like object from bytes
-            audio_file = io.BytesIO(audio_content)
-            audio_file.name = filename
-            
-            # Use Whisper's translation endpoint
-            response = self.client.audio.translations.create(
-                file=audio_file,
-                model="whisper-1"
-            )
-            
-            return response.text
+            return await self.backend.translate(audio_content, filename)
         
         except Exception as e:
             raise Exception(f"Whisper translation failed: {str(e)}")
@@ -125,3 +174,21 @@ def get_whisper_service() -> WhisperSTTService:
     if _whisper_service is None:
         _whisper_service = WhisperSTTService()
     return _whisper_service
+
+
+async def close_whisper_service() -> None:
+    """Shut down the WhisperSTTService singleton if it was created"""
+    global _whisper_service
+    if _whisper_service is not None:
+        await _whisper_service.close()
+        _whisper_service = None
+
+
+async def warmup_whisper_service() -> None:
+    """Load the local STT model at startup when STT_BACKEND=local"""
+    if os.getenv("STT_BACKEND", "openai").lower() != "local":
+        return
+    try:
+        await get_whisper_service().warmup()
+    except Exception as e:
+        print(f"⚠️ Local STT model warmup failed: {e}")
@@ -0,0 +1,26 @@
+"""
+wav_pcm16_mono reads WAV uploads without copying and rejects malformed ones
+"""
+import struct
+import numpy as np
+from utils.audio_utils import pcm_to_wav, wav_pcm16_mono
+
+
+def test_memoryview_samples_share_the_upload_buffer():
+    pcm = np.arange(160, dtype="<i2").tobytes()
+    upload = bytearray(pcm_to_wav(pcm, sample_rate=16000))
+    
+    samples, sample_rate = wav_pcm16_mono(memoryview(upload))
+    assert sample_rate == 16000
+    assert bytes(samples) == pcm
+    assert isinstance(samples, memoryview) and samples.obj is upload
+
+
+def test_short_fmt_chunk_is_not_pcm16_mono():
+    fmt_chunk = struct.pack("<HHI", 1, 1, 16000)
+    wav = (
+        b"RIFF" + struct.pack("<I", 4 + 8 + len(fmt_chunk) + 8 + 4) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt_chunk)) + fmt_chunk
+        + b"data" + struct.pack("<I", 4) + b"\0\0\0\0"
+    )
+    assert wav_pcm16_mono(wav) is None
@@ -0,0 +1,21 @@
+"""
+POST /dialogue picks its response format from Accept media ranges and q-values
+"""
+import pytest
+from routers.dialogue import _negotiate
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "application/json"),
+    ("*/*", "application/json"),
+    ("application/x-ndjson", "application/x-ndjson"),
+    ("application/json, application/x-ndjson;q=0.1", "application/json"),
+    ("application/x-ndjson;q=0", "application/json"),
+    ("application/json;q=0.5, multipart/mixed", "multipart/mixed"),
+    ("application/*;q=0.2, application/x-ndjson;q=0.9", "application/x-ndjson"),
+    ("text/*", "text/event-stream"),
+    ("application/json, application/x-ndjson", "application/json"),
+    ("image/png", "application/json"),
+])
+def test_negotiate_uses_q_values(accept, expected):
+    assert _negotiate(accept) == expected
@@ -0,0 +1,144 @@
+"""
+Hedger races a backup server against a primary with tail latency
+"""
+import asyncio
+import time
+import httpx
+import main
+from services import coqui_tts
+from services.http_pool import get_upstream
+from utils.hedging import Hedger
+
+FAST_SECONDS = 0.01
+TAIL_SECONDS = 0.5
+
+
+def _server(name: str, delays: list) -> httpx.AsyncClient:
+    """Fake upstream answering after the next delay in delays (FAST_SECONDS once empty)"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delays.pop(0) if delays else FAST_SECONDS)
+        return httpx.Response(200, headers={"x-server": name}, content=b"RIFF fake wav")
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _hedger(budget_percent: float) -> Hedger:
+    return Hedger("test", percentile=90, budget_percent=budget_percent, min_delay_ms=20, min_samples=10)
+
+
+def test_slow_primary_is_hedged_and_faster_response_wins():
+    # Every fifth request after warm-up hits the primary's tail
+    primary_delays = [FAST_SECONDS] * 10 + [FAST_SECONDS, FAST_SECONDS, FAST_SECONDS, FAST_SECONDS, TAIL_SECONDS] * 4
+    primary = _server("primary", primary_delays)
+    backup = _server("backup", [])
+    hedger = _hedger(budget_percent=25)
+    
+    async def scenario():
+        results = []
+        for _ in range(len(primary_delays)):
+            slow = primary_delays[0] == TAIL_SECONDS
+            started = time.monotonic()
+            response = await hedger.run(
+                lambda: primary.post("http://primary/api/tts"),
+                lambda: backup.post("http://backup/api/tts")
+            )
+            results.append((slow, response.headers["x-server"], time.monotonic() - started))
+        return results
+    
+    results = asyncio.run(scenario())
+    slow_results = [result for result in results if result[0]]
+    assert len(slow_results) == 4
+    for _, server, elapsed in slow_results:
+        assert server == "backup"
+        assert elapsed < TAIL_SECONDS / 2
+    assert all(server == "primary" for slow, server, _ in results if not slow)
+    
+    stats = hedger.stats()
+    assert stats["hedged"] == 4
+    assert stats["hedge_wins"] == 4
+    assert stats["over_budget"] == 0
+
+
+def test_hedges_stay_within_budget():
+    # After warm-up the primary is uniformly slow, so every request wants a hedge
+    primary = _server("primary", [FAST_SECONDS] * 10 + [TAIL_SECONDS] * 20)
+    backup = _server("backup", [])
+    hedger = _hedger(budget_percent=10)
+    
+    async def scenario():
+        for _ in range(10):
+            await hedger.run(lambda: primary.post("http://primary/api/tts"), lambda: backup.post("http://backup/api/tts"))
+        return await asyncio.gather(*(
+            hedger.run(lambda: primary.post("http://primary/api/tts"), lambda: backup.post("http://backup/api/tts"))
+            for _ in range(20)
+        ))
+    
+    responses = asyncio.run(scenario())
+    assert all(response.status_code == 200 for response in responses)
+    
+    stats = hedger.stats()
+    assert 0 < stats["hedged"] <= 0.10 * stats["requests"]
+    assert stats["hedged"] + stats["over_budget"] == 20
+    assert sum(response.headers["x-server"] == "backup" for response in responses) == stats["hedge_wins"]
+
+
+def _coqui_service(monkeypatch, primary: httpx.AsyncClient, backup: httpx.AsyncClient) -> coqui_tts.CoquiTTSService:
+    monkeypatch.setenv("COQUI_HEDGE_SERVER_URL", "http://backup")
+    monkeypatch.setenv("COQUI_HEDGE_PERCENTILE", "90")
+    monkeypatch.setenv("COQUI_HEDGE_BUDGET_PERCENT", "50")
+    monkeypatch.setenv("COQUI_HEDGE_MIN_DELAY_MS", "20")
+    monkeypatch.setenv("COQUI_HEDGE_MIN_SAMPLES", "5")
+    monkeypatch.setenv("COQUI_BREAKER_MIN_REQUESTS", "2")
+    monkeypatch.setattr(get_upstream("coqui"), "client", primary)
+    monkeypatch.setattr(get_upstream("coqui_hedge"), "client", backup)
+    service = coqui_tts.CoquiTTSService(server_url="http://primary")
+    monkeypatch.setattr(coqui_tts, "_coqui_service", service)
+    return service
+
+
+def _tagged_server(name: str, delays: list, status: int = 200) -> httpx.AsyncClient:
+    """Fake Coqui server whose WAV bytes name the server that produced them"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delays.pop(0) if delays else FAST_SECONDS)
+        return httpx.Response(status, content=f"RIFF {name}".encode())
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_coqui_service_hedges_slow_synthesis(monkeypatch):
+    service = _coqui_service(
+        monkeypatch,
+        _tagged_server("primary", [FAST_SECONDS] * 5 + [TAIL_SECONDS]),
+        _tagged_server("backup", [])
+    )
+    
+    async def scenario():
+        audio = [await service.synthesize_speech(f"Warm-up sentence {index}.") for index in range(5)]
+        started = time.monotonic()
+        audio.append(await service.synthesize_speech("This one hits the tail."))
+        return audio, time.monotonic() - started
+    
+    audio, elapsed = asyncio.run(scenario())
+    assert audio[:5] == [b"RIFF primary"] * 5
+    assert audio[5] == b"RIFF backup"
+    assert elapsed < TAIL_SECONDS / 2
+    assert service.hedger.stats()["hedge_wins"] == 1
+
+
+def test_coqui_service_uses_hedge_server_while_primary_circuit_is_open(monkeypatch):
+    service = _coqui_service(monkeypatch, _tagged_server("primary", [], status=503), _tagged_server("backup", []))
+    
+    async def scenario():
+        for index in range(2):
+            try:
+                await service.synthesize_speech(f"Failing sentence {index}.")
+            except Exception:
+                pass
+        audio = await service.synthesize_speech("Served during the outage.")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            health = await client.get("/health")
+        return audio, health.json()
+    
+    audio, health = asyncio.run(scenario())
+    assert service.breaker.current_state() == "open"
+    assert audio == b"RIFF backup"
+    assert health["circuits"]["coqui"] == "open"
+    assert health["circuits"]["coqui_hedge"] == "closed"
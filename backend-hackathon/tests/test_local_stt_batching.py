@@ -0,0 +1,95 @@
+"""
+LocalWhisperBackend groups concurrent requests into one batched inference
+"""
+import asyncio
+import threading
+import numpy as np
+import pytest
+from services.stt_backends import LocalWhisperBackend, STTBackend
+from utils.audio_utils import pcm_to_wav
+
+
+class _FakePipeline:
+    """Stand-in for the Whisper pipeline recording every call it receives"""
+    
+    def __init__(self):
+        self.calls = []
+        self.threads = set()
+    
+    def __call__(self, batch, language, task):
+        self.calls.append((len(batch), language, task))
+        self.threads.add(threading.current_thread().name)
+        return [f" {len(samples)} samples " for samples in batch]
+
+
+def _wav(samples: int) -> bytes:
+    return pcm_to_wav(np.zeros(samples, dtype="<i2").tobytes(), sample_rate=16000)
+
+
+def _backend(monkeypatch, pipeline: _FakePipeline) -> LocalWhisperBackend:
+    monkeypatch.setenv("STT_BATCH_MAX_SIZE", "8")
+    # Generous wait so every concurrent request joins the first batch
+    monkeypatch.setenv("STT_BATCH_MAX_WAIT_MS", "200")
+    return LocalWhisperBackend(model_name="fake", load_model=lambda name: pipeline)
+
+
+def test_concurrent_transcriptions_form_one_batch(monkeypatch):
+    pipeline = _FakePipeline()
+    backend = _backend(monkeypatch, pipeline)
+    lengths = [16000, 8000, 24000, 4000, 12000]
+    
+    async def scenario():
+        try:
+            return await asyncio.gather(*(
+                backend.transcribe(_wav(length), f"clip_{index}.wav", language="en")
+                for index, length in enumerate(lengths)
+            ))
+        finally:
+            await backend.close()
+    
+    results = asyncio.run(scenario())
+    
+    # Each caller gets the transcript of its own audio, stripped
+    assert results == [(f"{length} samples", "en") for length in lengths]
+    assert pipeline.calls == [(len(lengths), "en", "transcribe")]
+    # Inference runs on the batcher's own thread, off the event loop
+    assert pipeline.threads and all(name.startswith("local-stt") for name in pipeline.threads)
+    
+    stats = backend.stats()
+    assert stats["batches"] == 1
+    assert stats["items"] == len(lengths)
+    assert stats["largest_batch"] == len(lengths)
+    assert stats["completed"] == len(lengths)
+
+
+def test_batch_runs_one_model_call_per_language_and_task(monkeypatch):
+    pipeline = _FakePipeline()
+    backend = _backend(monkeypatch, pipeline)
+    
+    async def scenario():
+        try:
+            return await asyncio.gather(
+                backend.transcribe(_wav(1600), "a.wav", language="en"),
+                backend.transcribe(_wav(3200), "b.wav", language="ar"),
+                backend.translate(_wav(4800), "c.wav"),
+                backend.transcribe(_wav(6400), "d.wav", language="en")
+            )
+        finally:
+            await backend.close()
+    
+    results = asyncio.run(scenario())
+    
+    assert results == [("1600 samples", "en"), ("3200 samples", "ar"), "4800 samples", ("6400 samples", "en")]
+    assert sorted(pipeline.calls, key=str) == sorted(
+        [(2, "en", "transcribe"), (1, "ar", "transcribe"), (1, None, "translate")], key=str
+    )
+    assert backend.stats()["batches"] == 1
+
+
+def test_backend_missing_translate_fails_at_instantiation():
+    class TranscribeOnly(STTBackend):
+        async def transcribe(self, audio_content, filename, language=None, prompt=None):
+            return "", language
+    
+    with pytest.raises(TypeError, match="translate"):
+        TranscribeOnly()
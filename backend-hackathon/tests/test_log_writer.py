@@ -0,0 +1,46 @@
+"""
+Retried conversation log writes never duplicate entries
+"""
+import asyncio
+import json
+import os
+from services.log_index import ConversationLogIndex
+from services.log_writer import ConversationLogWriter
+
+
+def test_index_failure_is_retried_without_rewriting_entries(tmp_path):
+    logs_dir = str(tmp_path)
+    index = ConversationLogIndex(logs_dir=logs_dir)
+    writer = ConversationLogWriter(logs_dir=logs_dir, index=index, flush_interval=0.01, max_retries=2)
+    
+    record = index.record
+    failures = []
+    
+    def flaky_record(filename, start_offset, lines):
+        # The first index update fails after its lines were appended
+        if not failures:
+            failures.append(filename)
+            raise OSError("index unavailable")
+        record(filename, start_offset, lines)
+    
+    index.record = flaky_record
+    
+    async def scenario():
+        for number in range(3):
+            writer.enqueue("a_20240101.jsonl", {"session_id": "a", "n": number})
+        writer.enqueue("b_20240101.jsonl", {"session_id": "b", "n": 0})
+        await writer.flush()
+        await writer.stop()
+    
+    asyncio.run(scenario())
+    
+    for filename, session_id, expected in (("a_20240101.jsonl", "a", [0, 1, 2]), ("b_20240101.jsonl", "b", [0])):
+        with open(os.path.join(logs_dir, filename), encoding="utf-8") as f:
+            assert [json.loads(line)["n"] for line in f] == expected
+        entries, _ = index.query(session_id, 10)
+        assert [entry["n"] for entry in entries] == expected
+    
+    stats = writer.stats()
+    assert failures and stats["retries"] == 1
+    assert stats["written"] == 4 and stats["dropped"] == 0
+    index.close()
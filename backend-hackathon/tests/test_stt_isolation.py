@@ -0,0 +1,79 @@
+"""
+Saturated /stt must not slow down unrelated routes (Whisper runs off the event loop)
+"""
+import asyncio
+import math
+import struct
+import time
+import httpx
+import main
+from services import whisper_stt
+from services.http_pool import get_upstream
+from services.stt_backends import OpenAIWhisperBackend
+from utils.audio_utils import pcm_to_wav
+
+WHISPER_SECONDS = 1.0
+
+
+class _BlockingTranscriptions:
+    """Stand-in for the synchronous OpenAI client: each call blocks its thread"""
+    
+    def create(self, **kwargs):
+        time.sleep(WHISPER_SECONDS)
+        return type("Transcription", (), {"text": "hello", "language": "en"})()
+
+
+class _FakeOpenAI:
+    def __init__(self):
+        self.audio = type("Audio", (), {"transcriptions": _BlockingTranscriptions()})()
+
+
+def _tone_wav(seconds: float = 1.0, sample_rate: int = 16000) -> bytes:
+    samples = [int(8000 * math.sin(2 * math.pi * 440 * i / sample_rate)) for i in range(int(seconds * sample_rate))]
+    return pcm_to_wav(struct.pack(f"<{len(samples)}h", *samples), sample_rate=sample_rate)
+
+
+async def _fake_coqui(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(0.01)
+    return httpx.Response(200, content=b"RIFF fake wav")
+
+
+def test_health_and_tts_stay_fast_while_stt_is_saturated(monkeypatch):
+    monkeypatch.setenv("STT_CACHE", "false")
+    monkeypatch.setenv("STT_MAX_CONCURRENCY", "2")
+    backend = OpenAIWhisperBackend(api_key="test")
+    backend.client = _FakeOpenAI()
+    monkeypatch.setattr(whisper_stt, "_whisper_service", whisper_stt.WhisperSTTService(backend=backend))
+    coqui = get_upstream("coqui")
+    monkeypatch.setattr(coqui, "client", httpx.AsyncClient(transport=httpx.MockTransport(_fake_coqui)))
+    audio = _tone_wav()
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            # Twice the executor size: two calls run, two wait for a slot
+            stt_requests = [
+                asyncio.ensure_future(client.post("/stt", files={"audio_file": ("speech.wav", audio, "audio/wav")}))
+                for _ in range(4)
+            ]
+            await asyncio.sleep(0.2)
+            assert backend.active == 2
+            
+            latencies = []
+            for index in range(5):
+                started = time.monotonic()
+                health = await client.get("/health")
+                tts = await client.post("/tts", json={"text": f"Sentence number {index}."})
+                latencies.append(time.monotonic() - started)
+                assert health.status_code == 200
+                assert tts.status_code == 200
+            # All probes ran while transcriptions were still blocking their threads
+            assert not all(request.done() for request in stt_requests)
+            
+            responses = await asyncio.gather(*stt_requests)
+            return latencies, responses
+    
+    latencies, responses = asyncio.run(scenario())
+    assert all(response.status_code == 200 for response in responses)
+    assert max(latencies) < 0.25 * WHISPER_SECONDS
+    assert backend.completed == 4
@@ -1,51 +1,172 @@
 """
 Utility functions for audio processing
 """
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import io
 import os
-from typing import Optional
+import shutil
+import struct
+import subprocess
+import wave
+from typing import Optional, Tuple, Union
+import numpy as np
 from fastapi import UploadFile, HTTPException
 
 
 ALLOWED_AUDIO_FORMATS = {".wav", ".mp3", ".m4a", ".ogg", ".flac"}
 MAX_AUDIO_SIZE_MB = 10
+MAX_AUDIO_SIZE_BYTES = MAX_AUDIO_SIZE_MB * 1024 * 1024
 
+# Uploads are copied in chunks of this size
+_READ_CHUNK_BYTES = 64 * 1024
+# Enough leading bytes to identify every supported container
+_SNIFF_BYTES = 12
 
-async def validate_audio_file(file: UploadFile) -> bytes:
+# Speech recognition input format
+TARGET_SAMPLE_RATE = 16000
+# Length of the resampling anti-aliasing filter
+_RESAMPLE_TAPS = 129
+
+
+def sniff_audio_format(header: bytes) -> Optional[str]:
+    """
+    Identify an audio container from its leading magic bytes
+    
+    Args:
+        header: First bytes of the file (at least 12 for MP4/M4A)
+        
+    Returns:
+        Container format ('wav', 'mp3', 'flac', 'ogg', 'm4a') or None if unknown
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:3] == b"ID3":
+        return "mp3"
+    # Raw MPEG audio frame: 11-bit frame sync
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        return "mp3"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    return None
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size: {MAX_AUDIO_SIZE_MB}MB"
+    )
+
+
+def _not_audio() -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail="File content is not a supported audio format (expected WAV, MP3, M4A, OGG or FLAC)"
+    )
+
+
+async def validate_audio_file(file: UploadFile) -> memoryview:
     """
     Validate and read uploaded audio file
     
+    The upload is copied in chunks into a single buffer and rejected as soon
+    as it exceeds the size limit (immediately when its size is already known).
+    The content must start with the magic bytes of a supported container.
+    
     Args:
         file: Uploaded audio file
         
     Returns:
-        Audio file content as bytes
+        Audio file content as a memoryview over one buffer (no further copies)
         
     Raises:
-        HTTPException: If file is invalid
+        HTTPException: 400 if the file is not supported audio, 413 if it is too large
     """
     # Check file extension
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_ext = os.path.splitext(file.filename or "")[1].lower()
     if file_ext not in ALLOWED_AUDIO_FORMATS:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid audio format. Allowed formats: {', '.join(ALLOWED_AUDIO_FORMATS)}"
         )
     
-    # Read file content
-    content = await file.read()
+    # Reject from the declared size before copying anything
+    if file.size is not None and file.size > MAX_AUDIO_SIZE_BYTES:
+        raise _too_large()
     
-    # Check file size
-    file_size_mb = len(content) / (1024 * 1024)
-    if file_size_mb > MAX_AUDIO_SIZE_MB:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_AUDIO_SIZE_MB}MB"
-        )
+    buffer = bytearray(file.size or 0)
+    length = 0
+    sniffed = False
+    while True:
+        chunk = await file.read(_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        if length + len(chunk) > MAX_AUDIO_SIZE_BYTES:
+            raise _too_large()
+        buffer[length:length + len(chunk)] = chunk
+        length += len(chunk)
+        
+        # Stop reading bogus uploads after the first chunk
+        if not sniffed and length >= _SNIFF_BYTES:
+            sniffed = True
+            if sniff_audio_format(bytes(buffer[:_SNIFF_BYTES])) is None:
+                raise _not_audio()
+    
+    if not sniffed and sniff_audio_format(bytes(buffer[:length])) is None:
+        raise _not_audio()
     
     # Reset file pointer for potential re-reading
     await file.seek(0)
     
-    return content
+    return memoryview(buffer)[:length]
+
+
+class AudioBufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over bytes or a memoryview
+    
+    Unlike io.BytesIO, wrapping a memoryview does not copy it; HTTP clients
+    read it in chunks when uploading.
+    """
+    
+    def __init__(self, data, name: str):
+        """
+        Wrap a buffer
+        
+        Args:
+            data: bytes, bytearray or memoryview
+            name: File name reported to the reader (used to detect the format)
+        """
+        self._view = memoryview(data).cast("B")
+        self._position = 0
+        self.name = name
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, target) -> int:
+        count = min(len(target), len(self._view) - self._position)
+        target[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._position = max(0, offset)
+        return self._position
+    
+    def tell(self) -> int:
+        return self._position
 
 
 def get_audio_format(filename: str) -> str:
@@ -62,25 +183,374 @@ def get_audio_format(filename: str) -> str:
     return ext.lstrip('.')
 
 
+def split_wav(wav_bytes: Union[bytes, memoryview]) -> Tuple[bytes, bytes]:
+    """
+    Split a RIFF/WAVE file into its format chunk and raw sample data
+    
+    Args:
+        wav_bytes: Complete WAV file content (slices share a memoryview's buffer)
+        
+    Returns:
+        Tuple of (fmt chunk payload, PCM data)
+        
+    Raises:
+        ValueError: If the content is not a WAV file with fmt and data chunks
+    """
+    if len(wav_bytes) < 12 or wav_bytes[:4] != b"RIFF" or wav_bytes[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+    
+    fmt_chunk = None
+    offset = 12
+    while offset + 8 <= len(wav_bytes):
+        chunk_id = wav_bytes[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", wav_bytes, offset + 4)[0]
+        body_start = offset + 8
+        
+        if chunk_id == b"fmt ":
+            fmt_chunk = wav_bytes[body_start:body_start + chunk_size]
+        elif chunk_id == b"data":
+            if fmt_chunk is None:
+                raise ValueError("WAV data chunk precedes fmt chunk")
+            # Streamed WAVs may carry a placeholder size; clamp to what is present
+            return fmt_chunk, wav_bytes[body_start:body_start + chunk_size]
+        
+        # Chunks are word-aligned
+        offset = body_start + chunk_size + (chunk_size & 1)
+    
+    raise ValueError("WAV file has no data chunk")
+
+
+def wav_pcm16_mono(wav_bytes: Union[bytes, memoryview]) -> Optional[Tuple[Union[bytes, memoryview], int]]:
+    """
+    Get the samples of a 16-bit mono PCM WAV file
+    
+    Args:
+        wav_bytes: Complete WAV file content; a memoryview is sliced, not copied
+        
+    Returns:
+        Tuple of (PCM data, sample rate), or None for any other audio
+    """
+    try:
+        fmt_chunk, pcm = split_wav(wav_bytes)
+    except ValueError:
+        return None
+    # A PCM fmt chunk is at least 16 bytes; anything shorter is malformed
+    if len(fmt_chunk) < 16:
+        return None
+    audio_format, channels, sample_rate = struct.unpack("<HHI", fmt_chunk[:8])
+    bits = struct.unpack("<H", fmt_chunk[14:16])[0]
+    if audio_format != 1 or channels != 1 or bits != 16:
+        return None
+    return pcm, sample_rate
+
+
+def wav_stream_header(fmt_chunk: bytes) -> bytes:
+    """
+    Build a WAV header for a stream of unknown length
+    
+    The RIFF and data sizes are set to 0xFFFFFFFF, which players treat as
+    "read until end of stream".
+    
+    Args:
+        fmt_chunk: fmt chunk payload (e.g. from split_wav)
+        
+    Returns:
+        Header bytes to send before the PCM data
+    """
+    unknown_size = 0xFFFFFFFF
+    return (
+        b"RIFF" + struct.pack("<I", unknown_size) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt_chunk)) + fmt_chunk
+        + (b"\x00" if len(fmt_chunk) & 1 else b"")
+        + b"data" + struct.pack("<I", unknown_size)
+    )
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int = 16000, channels: int = 1, sample_width: int = 2) -> bytes:
+    """
+    Wrap raw PCM samples in a WAV container
+    
+    Args:
+        pcm: Raw little-endian PCM samples
+        sample_rate: Sample rate in Hz
+        channels: Number of interleaved channels
+        sample_width: Bytes per sample
+        
+    Returns:
+        WAV file content
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def decode_audio(audio_content: bytes, source_format: str) -> Tuple[np.ndarray, int]:
+    """
+    Decode audio to float samples in [-1, 1]
+    
+    PCM WAV is decoded with the standard library; everything else (and WAV
+    variants it cannot read) goes through ffmpeg when it is installed.
+    
+    Args:
+        audio_content: Encoded audio bytes
+        source_format: Source audio format (e.g. 'wav', 'mp3')
+        
+    Returns:
+        Tuple of (float32 samples shaped (frames, channels), sample rate)
+        
+    Raises:
+        ValueError: If the audio cannot be decoded
+    """
+    if source_format == "wav":
+        try:
+            return _decode_wav(audio_content)
+        except (wave.Error, EOFError, ValueError):
+            pass
+    
+    if shutil.which("ffmpeg") is None:
+        raise ValueError(f"Cannot decode {source_format} audio without ffmpeg")
+    
+    # ffmpeg downmixes and resamples itself
+    result = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE), "pipe:1"
+        ],
+        input=audio_content,
+        capture_output=True,
+        timeout=60
+    )
+    if result.returncode != 0:
+        raise ValueError(f"ffmpeg could not decode audio: {result.stderr.decode(errors='replace').strip()}")
+    samples = np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768.0
+    return samples.reshape(-1, 1), TARGET_SAMPLE_RATE
+
+
+def _decode_wav(audio_content: bytes) -> Tuple[np.ndarray, int]:
+    with wave.open(io.BytesIO(audio_content), "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        sample_rate = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+    
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        # Sign-extend 24-bit samples into the top of an int32
+        raw = np.frombuffer(frames[:len(frames) // 3 * 3], dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = ((raw[:, 0] << 8) | (raw[:, 1] << 16) | (raw[:, 2] << 24)).astype(np.float32) / 2147483648.0
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+    
+    frame_count = len(samples) // channels
+    return samples[:frame_count * channels].reshape(frame_count, channels), sample_rate
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int = 16000) -> np.ndarray:
+    """
+    Resample mono audio with a windowed-sinc anti-aliasing filter
+    
+    When downsampling, the signal is first low-pass filtered below the new
+    Nyquist frequency (Blackman-windowed sinc, applied by FFT convolution),
+    then read at the new sample positions by linear interpolation.
+    
+    Args:
+        samples: Mono float samples
+        source_rate: Sample rate of samples in Hz
+        target_rate: Output sample rate in Hz
+        
+    Returns:
+        Resampled float32 samples
+    """
+    if source_rate == target_rate or len(samples) == 0:
+        return samples.astype(np.float32, copy=False)
+    
+    if target_rate < source_rate:
+        # Cutoff at 90% of the target Nyquist, in cycles per source sample
+        cutoff = 0.45 * target_rate / source_rate
+        offsets = np.arange(_RESAMPLE_TAPS) - (_RESAMPLE_TAPS - 1) / 2
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * offsets) * np.blackman(_RESAMPLE_TAPS)
+        kernel /= kernel.sum()
+        
+        size = 1 << int(np.ceil(np.log2(len(samples) + _RESAMPLE_TAPS - 1)))
+        filtered = np.fft.irfft(np.fft.rfft(samples, size) * np.fft.rfft(kernel, size), size)
+        # Drop the filter delay so the output stays aligned with the input
+        delay = (_RESAMPLE_TAPS - 1) // 2
+        samples = filtered[delay:delay + len(samples)]
+    
+    count = int(len(samples) * target_rate / source_rate)
+    positions = np.arange(count) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def trim_silence(
+    samples: np.ndarray,
+    sample_rate: int,
+    frame_ms: int = 20,
+    relative_db: float = -40.0,
+    floor_db: float = -60.0,
+    padding_ms: int = 150
+) -> np.ndarray:
+    """
+    Remove leading and trailing silence with a frame energy gate
+    
+    A frame is sound when its RMS level is within relative_db of the loudest
+    frame and above floor_db (dBFS). padding_ms of audio is kept around the
+    first and last sound frames so onsets and endings are not clipped.
+    
+    Args:
+        samples: Mono float samples in [-1, 1]
+        sample_rate: Sample rate in Hz
+        frame_ms: Analysis frame length
+        relative_db: Gate relative to the loudest frame
+        floor_db: Absolute gate
+        padding_ms: Audio kept before the first and after the last sound frame
+        
+    Returns:
+        Trimmed samples (empty if no frame passes the gate)
+    """
+    frame = max(1, sample_rate * frame_ms // 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return samples
+    
+    frames = samples[:count * frame].reshape(count, frame)
+    levels = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+    threshold = max(floor_db, levels.max() + relative_db)
+    loud = np.flatnonzero(levels > threshold)
+    if len(loud) == 0:
+        return samples[:0]
+    
+    padding = sample_rate * padding_ms // 1000
+    start = max(0, loud[0] * frame - padding)
+    end = min(len(samples), (loud[-1] + 1) * frame + padding)
+    return samples[start:end]
+
+
 def convert_to_linear16(audio_content: bytes, source_format: str) -> Optional[bytes]:
     """
-    Convert audio to LINEAR16 format for Google Speech API
-    (Placeholder - implement with pydub if needed)
+    Convert audio to 16 kHz mono LINEAR16 (16-bit little-endian PCM)
+    
+    Decodes, downmixes, resamples and trims leading/trailing silence.
+    
+    Args:
+        audio_content: Raw audio bytes
+        source_format: Source audio format
+        
+    Returns:
+        PCM bytes (empty if the audio is silent) or None if it cannot be decoded
+    """
+    try:
+        samples, sample_rate = decode_audio(audio_content, source_format)
+    except (ValueError, subprocess.TimeoutExpired) as e:
+        print(f"Audio preprocessing skipped: {e}")
+        return None
+    
+    mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    mono = resample(mono, sample_rate, TARGET_SAMPLE_RATE)
+    mono = trim_silence(mono, TARGET_SAMPLE_RATE)
+    # Inverse of the decode scaling, so 16-bit input round-trips unchanged
+    return np.clip(np.round(mono * 32768.0), -32768, 32767).astype("<i2").tobytes()
+
+
+def preprocess_audio(audio_content: bytes, source_format: str) -> Optional[bytes]:
+    """
+    Prepare an upload for speech recognition as a compact 16 kHz mono WAV
     
     Args:
         audio_content: Raw audio bytes
         source_format: Source audio format
         
     Returns:
-        Converted audio bytes or None if conversion not needed
+        WAV bytes, or None if the original should be sent instead (cannot be
+        decoded, or the result would not be smaller)
     """
-    # For now, return as-is. Implement conversion with pydub if needed:
-    # from pydub import AudioSegment
-    # audio = AudioSegment.from_file(io.BytesIO(audio_content), format=source_format)
-    # audio = audio.set_frame_rate(16000).set_channels(1)
-    # return audio.raw_data
+    pcm = convert_to_linear16(audio_content, source_format)
+    if pcm is None:
+        return None
+    wav = pcm_to_wav(pcm, sample_rate=TARGET_SAMPLE_RATE)
+    # Already-compressed uploads (e.g. short MP3s) can be smaller than PCM
+    if pcm and len(wav) >= len(audio_content):
+        return None
+    return wav
+
+
+# Decoding and resampling are CPU-bound; run them outside the event loop process
+_preprocess_pool: Optional[ProcessPoolExecutor] = None
+_preprocess_stats = {"processed": 0, "skipped": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+async def preprocess_for_stt(audio_content, filename: str) -> Tuple[Union[bytes, memoryview], str]:
+    """
+    Preprocess an upload in the process pool before transcription
     
-    return None
+    Disabled with AUDIO_PREPROCESS=false. Any failure falls back to the
+    original upload.
+    
+    Args:
+        audio_content: Audio file content (bytes or memoryview)
+        filename: Original filename
+        
+    Returns:
+        Tuple of (audio to transcribe, filename matching its format). The
+        audio is empty if preprocessing found only silence.
+    """
+    global _preprocess_pool
+    if os.getenv("AUDIO_PREPROCESS", "true").lower() != "true":
+        return audio_content, filename
+    
+    if _preprocess_pool is None:
+        _preprocess_pool = ProcessPoolExecutor(max_workers=int(os.getenv("AUDIO_PREPROCESS_WORKERS", "2")))
+    
+    try:
+        # Views cannot be pickled; this is the one copy of the upload on its way to the pool
+        wav = await asyncio.get_running_loop().run_in_executor(
+            _preprocess_pool, preprocess_audio, bytes(audio_content), get_audio_format(filename)
+        )
+    except Exception as e:
+        _preprocess_stats["failed"] += 1
+        print(f"Audio preprocessing failed: {e}")
+        return audio_content, filename
+    
+    if wav is None:
+        _preprocess_stats["skipped"] += 1
+        return audio_content, filename
+    
+    _preprocess_stats["processed"] += 1
+    _preprocess_stats["bytes_in"] += len(audio_content)
+    _preprocess_stats["bytes_out"] += len(wav)
+    # Silence-only audio becomes a header-only WAV; report it as empty
+    if len(wav) <= 44:
+        return b"", os.path.splitext(filename)[0] + ".wav"
+    return wav, os.path.splitext(filename)[0] + ".wav"
+
+
+def preprocess_stats() -> dict:
+    """
+    Get audio preprocessing counters
+    
+    Returns:
+        Dictionary with processed/skipped/failed counts and size reduction
+    """
+    stats = dict(_preprocess_stats)
+    stats["reduction_ratio"] = round(stats["bytes_in"] / stats["bytes_out"], 2) if stats["bytes_out"] else None
+    return stats
+
+
+def shutdown_preprocess_pool() -> None:
+    """Stop the preprocessing worker processes"""
+    global _preprocess_pool
+    if _preprocess_pool is not None:
+        _preprocess_pool.shutdown(wait=False, cancel_futures=True)
+        _preprocess_pool = None
 
 
 async def save_temp_audio(content: bytes, filename: str, temp_dir: str = "temp") -> str:
@@ -0,0 +1,82 @@
+"""
+Bounded concurrent execution of batched items
+"""
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+import asyncio
+import os
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Upstream calls run at once per batch request
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+
+async def iter_batch(
+    items: Sequence[T],
+    key: Callable[[T], Hashable],
+    worker: Callable[[T], Awaitable[R]],
+    max_concurrency: int = BATCH_MAX_CONCURRENCY
+) -> AsyncIterator[Tuple[List[int], Optional[R], Optional[Exception]]]:
+    """
+    Run worker once per distinct item with bounded concurrency
+    
+    Items with the same key are processed once and share the outcome. A
+    failing item does not affect the others.
+    
+    Args:
+        items: Batch items in request order
+        key: Returns the deduplication key of an item
+        worker: Coroutine function processing one item
+        max_concurrency: Max workers running at once
+    
+    Yields:
+        (indices of the items sharing the outcome, result, error) as each
+        distinct item completes
+    """
+    groups: Dict[Hashable, List[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault(key(item), []).append(index)
+    
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def run(indices: List[int]) -> Tuple[List[int], Optional[R], Optional[Exception]]:
+        async with semaphore:
+            try:
+                return indices, await worker(items[indices[0]]), None
+            except Exception as e:
+                return indices, None, e
+    
+    tasks = [asyncio.create_task(run(indices)) for indices in groups.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The consumer went away (e.g. client disconnected mid-stream)
+        for task in tasks:
+            task.cancel()
+
+
+async def run_batch(
+    items: Sequence[T],
+    key: Callable[[T], Hashable],
+    worker: Callable[[T], Awaitable[R]],
+    max_concurrency: int = BATCH_MAX_CONCURRENCY
+) -> List[Tuple[Optional[R], Optional[Exception]]]:
+    """
+    Run a batch and collect every outcome in request order
+    
+    Args:
+        items: Batch items in request order
+        key: Returns the deduplication key of an item
+        worker: Coroutine function processing one item
+        max_concurrency: Max workers running at once
+    
+    Returns:
+        (result, error) per item, aligned with items
+    """
+    outcomes: List[Tuple[Optional[R], Optional[Exception]]] = [(None, None)] * len(items)
+    async for indices, result, error in iter_batch(items, key, worker, max_concurrency):
+        for index in indices:
+            outcomes[index] = (result, error)
+    return outcomes
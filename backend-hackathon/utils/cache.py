@@ -0,0 +1,265 @@
+"""
+In-process caching utilities
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import time
+
+
+class ByteLRUCache:
+    """LRU cache of byte payloads bounded by total size, with optional TTL"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: Optional[float] = None):
+        """
+        Initialize byte-budgeted cache
+
+        Args:
+            max_bytes: Maximum total size of cached values in bytes (0 disables caching)
+            ttl_seconds: Optional time-to-live for entries in seconds
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a cached value and mark it as most recently used
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached bytes or None on miss/expiry
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, stored_at = entry
+        if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Store a value, evicting least recently used entries to stay within budget
+
+        Args:
+            key: Cache key
+            value: Bytes to cache (ignored if larger than the whole budget)
+        """
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        while self._entries and self._size + size > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+        self._entries[key] = (value, time.monotonic())
+        self._size += size
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> dict:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with size, entry count and hit/miss/eviction counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._size -= len(value)
+
+
+class TTLCache:
+    """
+    Entry-bounded LRU cache with stale-while-revalidate and negative entries
+
+    An entry is fresh for ttl_seconds, then stale (still servable while it is
+    refreshed) for another stale_seconds. Failures can be cached as negative
+    entries for negative_ttl_seconds so a dead upstream is not retried on
+    every call; a failed refresh of a stale entry is remembered just as long
+    while the stale value keeps being served.
+    """
+
+    FRESH = "fresh"
+    STALE = "stale"
+    NEGATIVE = "negative"
+    MISS = "miss"
+
+    _NEGATIVE_MARKER = object()
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        stale_seconds: float = 0.0,
+        negative_ttl_seconds: float = 0.0
+    ):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of entries (0 disables caching)
+            ttl_seconds: How long an entry is fresh
+            stale_seconds: How long after expiry a stale entry may still be served
+            negative_ttl_seconds: How long a cached failure is remembered
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+        # When refreshing a stale entry last failed, by key
+        self._failed_at: Dict[Any, float] = {}
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Any) -> Tuple[str, Any]:
+        """
+        Look up a key
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (state, value) where state is FRESH, STALE, NEGATIVE or MISS
+            and value is None unless the state is FRESH or STALE
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return self.MISS, None
+
+        value, stored_at = entry
+        age = time.monotonic() - stored_at
+
+        if value is self._NEGATIVE_MARKER:
+            if age <= self.negative_ttl_seconds:
+                self.negative_hits += 1
+                return self.NEGATIVE, None
+        elif age <= self.ttl_seconds:
+            self._entries.move_to_end(key)
+            self.fresh_hits += 1
+            return self.FRESH, value
+        elif age <= self.ttl_seconds + self.stale_seconds:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return self.STALE, value
+
+        del self._entries[key]
+        self._failed_at.pop(key, None)
+        self.misses += 1
+        return self.MISS, None
+
+    def set(self, key: Any, value: Any) -> None:
+        """
+        Store a fresh value
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        self._store(key, value)
+
+    def set_negative(self, key: Any) -> None:
+        """
+        Remember that fetching this key just failed
+
+        A stale value for the key, if any, is kept so it can still be served,
+        and the failure time is recorded for refresh_failed_recently().
+
+        Args:
+            key: Cache key
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is not self._NEGATIVE_MARKER:
+            self._failed_at[key] = time.monotonic()
+            return
+        if self.negative_ttl_seconds > 0:
+            self._store(key, self._NEGATIVE_MARKER)
+
+    def refresh_failed_recently(self, key: Any) -> bool:
+        """
+        Check whether refreshing a cached value failed within negative_ttl_seconds
+
+        Callers serving a stale value use this to skip refreshes during an outage.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            True if the last refresh of the key failed less than negative_ttl_seconds ago
+        """
+        failed_at = self._failed_at.get(key)
+        return failed_at is not None and time.monotonic() - failed_at <= self.negative_ttl_seconds
+
+    def stats(self) -> dict:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with entry count, hit counters and hit ratio
+        """
+        lookups = self.fresh_hits + self.stale_hits + self.negative_hits + self.misses
+        hits = self.fresh_hits + self.stale_hits
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
+
+    def _store(self, key: Any, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        self._failed_at.pop(key, None)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._failed_at.pop(evicted, None)
+            self.evictions += 1
@@ -0,0 +1,189 @@
+"""
+Circuit breaker for upstream service calls
+"""
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, List, Optional
+import os
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+    
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream while it is failing
+    
+    - closed: calls go through; outcomes are counted in a rolling window of
+      one-second buckets. Once the window has min_requests calls and the
+      failure rate reaches failure_rate, the circuit opens.
+    - open: calls fail immediately with CircuitOpenError for open_seconds.
+    - half-open: up to half_open_max_calls probe calls go through. A success
+      closes the circuit, a failure opens it again.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        name: str,
+        failure_rate: Optional[float] = None,
+        min_requests: Optional[int] = None,
+        window_seconds: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        half_open_max_calls: int = 1,
+        is_failure: Optional[Callable[[Exception], bool]] = None
+    ):
+        """
+        Initialize breaker (settings default to {NAME}_BREAKER_* environment variables)
+        
+        Args:
+            name: Upstream name, also the environment variable prefix (e.g. "coqui")
+            failure_rate: Failure ratio (0-1) within the window that opens the circuit
+            min_requests: Calls needed in the window before the rate is considered
+            window_seconds: Length of the rolling window
+            open_seconds: Time to fail fast before probing again
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+            is_failure: Decides whether an exception counts as an upstream failure
+                (all exceptions by default)
+        """
+        self.name = name
+        prefix = f"{name.upper()}_BREAKER_"
+        self.failure_rate = failure_rate if failure_rate is not None else float(
+            os.getenv(prefix + "FAILURE_RATE", "0.5")
+        )
+        self.min_requests = min_requests or int(os.getenv(prefix + "MIN_REQUESTS", "5"))
+        self.window_seconds = window_seconds or float(os.getenv(prefix + "WINDOW_SECONDS", "30"))
+        self.open_seconds = open_seconds or float(os.getenv(prefix + "OPEN_SECONDS", "15"))
+        self.half_open_max_calls = half_open_max_calls
+        self.is_failure = is_failure or (lambda e: True)
+        
+        self.state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # [second, successes, failures] per one-second bucket, oldest first
+        self._buckets: Deque[List[int]] = deque()
+        
+        self.opened = 0
+        self.rejected = 0
+    
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run an upstream call through the breaker
+        
+        Args:
+            fn: Zero-argument coroutine function performing the call
+        
+        Returns:
+            Result of fn
+        
+        Raises:
+            CircuitOpenError: If the circuit is open (fn is not called)
+            Exception: Whatever fn raised
+        """
+        probe = self._acquire()
+        try:
+            result = await fn()
+        except Exception as e:
+            if self.is_failure(e):
+                self._record(success=False, probe=probe)
+            else:
+                self._record(success=True, probe=probe)
+            raise
+        except BaseException:
+            # Cancelled: the upstream outcome is unknown, just free the probe slot
+            if probe:
+                self._probes -= 1
+            raise
+        self._record(success=True, probe=probe)
+        return result
+    
+    def current_state(self) -> str:
+        """
+        Get the breaker state, moving from open to half-open once open_seconds passed
+        
+        Returns:
+            "closed", "open" or "half_open"
+        """
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            self._probes = 0
+        return self.state
+    
+    def stats(self) -> dict:
+        """
+        Get breaker state and rolling window counters
+        
+        Returns:
+            Dictionary with state, window counts and totals
+        """
+        successes, failures = self._window_counts()
+        total = successes + failures
+        return {
+            "state": self.current_state(),
+            "window_requests": total,
+            "window_failure_rate": round(failures / total, 3) if total else 0.0,
+            "failure_rate_threshold": self.failure_rate,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_after_seconds": round(self._retry_after(), 1) if self.state == self.OPEN else None
+        }
+    
+    def _acquire(self) -> bool:
+        """Admit a call or raise CircuitOpenError; returns True for half-open probes"""
+        state = self.current_state()
+        if state == self.CLOSED:
+            return False
+        if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(self.name, self._retry_after() if state == self.OPEN else self.open_seconds)
+    
+    def _record(self, success: bool, probe: bool) -> None:
+        if probe:
+            self._probes -= 1
+            if success:
+                self.state = self.CLOSED
+                self._buckets.clear()
+            else:
+                self._open()
+            return
+        
+        # Outcomes of calls admitted before the circuit opened do not reset it
+        if self.state != self.CLOSED:
+            return
+        
+        second = int(time.monotonic())
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        self._buckets[-1][1 if success else 2] += 1
+        
+        successes, failures = self._window_counts()
+        total = successes + failures
+        if total >= self.min_requests and failures / total >= self.failure_rate:
+            self._open()
+    
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._buckets.clear()
+        self.opened += 1
+        print(f"⚡ Circuit for {self.name} opened for {self.open_seconds:g}s")
+    
+    def _window_counts(self) -> tuple:
+        cutoff = int(time.monotonic()) - self.window_seconds
+        while self._buckets and self._buckets[0][0] <= cutoff:
+            self._buckets.popleft()
+        return sum(bucket[1] for bucket in self._buckets), sum(bucket[2] for bucket in self._buckets)
+    
+    def _retry_after(self) -> float:
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
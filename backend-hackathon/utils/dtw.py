@@ -0,0 +1,139 @@
+"""
+Banded dynamic time warping with LB_Keogh lower bounds, vectorized over candidates
+"""
+from typing import Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def resample_sequence(sequence: np.ndarray, length: int) -> np.ndarray:
+    """
+    Linearly resample a sequence of feature vectors to a fixed length
+    
+    Args:
+        sequence: Array shaped (T, D) with T >= 1
+        length: Number of output steps
+        
+    Returns:
+        Float32 array shaped (length, D)
+    """
+    steps = len(sequence)
+    if steps == length:
+        return sequence.astype(np.float32)
+    positions = np.linspace(0, steps - 1, length)
+    left = np.floor(positions).astype(np.int64)
+    right = np.minimum(left + 1, steps - 1)
+    weight = (positions - left)[:, None]
+    return ((1 - weight) * sequence[left] + weight * sequence[right]).astype(np.float32)
+
+
+def keogh_envelopes(sequences: np.ndarray, band: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the upper and lower LB_Keogh envelopes of candidate sequences
+    
+    Args:
+        sequences: Array shaped (M, L, D)
+        band: Sakoe-Chiba band radius in steps
+        
+    Returns:
+        Tuple of (upper, lower) arrays shaped (M, L, D): the running max and
+        min of each dimension over steps i - band .. i + band
+    """
+    padded = np.pad(sequences, ((0, 0), (band, band), (0, 0)), mode="edge")
+    windows = sliding_window_view(padded, 2 * band + 1, axis=1)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+
+def lb_keogh(query: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+    """
+    LB_Keogh lower bound of the banded DTW cost per query step
+    
+    Each query step is aligned to some candidate step within the band, so
+    it costs at least its squared distance to the candidate's envelope.
+    
+    Args:
+        query: Array shaped (L, D)
+        upper: Upper envelopes shaped (M, L, D)
+        lower: Lower envelopes shaped (M, L, D)
+        
+    Returns:
+        Array shaped (M, L); the sum over steps bounds the DTW cost from below
+    """
+    # At most one of the two differences is positive; computed in place, as
+    # allocating (M, L, D) temporaries dominates the cost
+    outside = query - upper
+    np.maximum(outside, np.subtract(lower, query), out=outside)
+    np.maximum(outside, 0.0, out=outside)
+    return np.einsum("mld,mld->ml", outside, outside)
+
+
+def banded_dtw(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    band: int,
+    lower_bounds: np.ndarray,
+    threshold: float = np.inf
+) -> np.ndarray:
+    """
+    DTW cost between a query and a batch of candidates, with early abandoning
+    
+    The local cost is the squared Euclidean distance between steps, and
+    warping is limited to a Sakoe-Chiba band. Rows of the cost matrix are
+    filled for all candidates at once. Within a row, the left-neighbour
+    recurrence is solved with a cumulative sum and a running minimum rather
+    than a loop. After each row, a candidate is abandoned once its cheapest
+    partial path plus the LB_Keogh bound of the remaining rows reaches
+    threshold.
+    
+    Args:
+        query: Array shaped (L, D)
+        candidates: Array shaped (B, L, D)
+        band: Sakoe-Chiba band radius in steps
+        lower_bounds: Per-step LB_Keogh bounds shaped (B, L) from lb_keogh
+        threshold: Cost at which a candidate is no longer of interest
+        
+    Returns:
+        Float64 array shaped (B,) of DTW costs (inf for abandoned candidates)
+    """
+    steps = len(query)
+    results = np.full(len(candidates), np.inf)
+    # Local costs of every (query step, candidate step) pair from one matrix product
+    cost = (
+        np.einsum("ld,ld->l", query, query)[None, :, None]
+        + np.einsum("bld,bld->bl", candidates, candidates)[:, None, :]
+        - 2.0 * np.matmul(query, candidates.transpose(0, 2, 1))
+    ).astype(np.float64)
+    np.maximum(cost, 0.0, out=cost)
+    # Lower bound of the rows still to be filled after each row
+    remaining = np.cumsum(lower_bounds[:, ::-1], axis=1)[:, ::-1]
+    remaining = np.concatenate([remaining[:, 1:], np.zeros((len(candidates), 1))], axis=1)
+    
+    alive = np.arange(len(candidates))
+    # Column 0 is a permanent inf border, column j + 1 holds candidate step j
+    previous = np.full((len(candidates), steps + 1), np.inf)
+    for i in range(steps):
+        lo, hi = max(0, i - band), min(steps - 1, i + band)
+        row_cost = cost[:, i, lo:hi + 1]
+        if i == 0:
+            reach = np.full(row_cost.shape, np.inf)
+            reach[:, 0] = 0.0
+        else:
+            # Best of the diagonal and vertical predecessors
+            reach = np.minimum(previous[:, lo:hi + 1], previous[:, lo + 1:hi + 2])
+        # D[j] = min(reach[j] + c[j], D[j - 1] + c[j])
+        #      = S[j] + min over k <= j of (reach[k] + c[k] - S[k]), S = cumsum(c)
+        prefix = np.cumsum(row_cost, axis=1)
+        row = prefix + np.minimum.accumulate(reach + row_cost - prefix, axis=1)
+        
+        current = np.full((len(alive), steps + 1), np.inf)
+        current[:, lo + 1:hi + 2] = row
+        previous = current
+        
+        keep = row.min(axis=1) + remaining[:, i] < threshold
+        if not keep.all():
+            alive, cost, previous, remaining = alive[keep], cost[keep], previous[keep], remaining[keep]
+            if not len(alive):
+                return results
+    
+    results[alive] = previous[:, steps]
+    return results
@@ -0,0 +1,230 @@
+"""
+Vectorized hand gesture rules over MediaPipe hand landmarks (mirrors lib/gesture.ts)
+"""
+from collections import Counter, deque
+from typing import Deque, Hashable, List, Optional, Tuple
+import struct
+import numpy as np
+
+NUM_LANDMARKS = 21
+WRIST = 0
+THUMB_MCP = 2
+THUMB_TIP = 4
+# (MCP, PIP, tip) landmark indices of index, middle, ring and pinky fingers
+FINGER_JOINTS = np.array([
+    [5, 6, 8],
+    [9, 10, 12],
+    [13, 14, 16],
+    [17, 18, 20]
+])
+# A finger tip must be this much farther from the wrist than its MCP joint
+RADIAL_RATIO = 1.15
+
+FINGER_NAMES = ["thumb", "index", "middle", "ring", "pinky"]
+GESTURE_LABELS = ["Hello", "Help"]
+
+# Label per code returned by gesture_codes (0 = no gesture)
+_LABELS = np.array([None] + GESTURE_LABELS, dtype=object)
+
+# Binary landmark message: header (version, reserved byte, frame count,
+# sequence number; little-endian) followed by count x float32[21 x 3]
+FRAME_HEADER = struct.Struct("<BxHI")
+FRAME_VERSION = 1
+FRAME_FLOATS = NUM_LANDMARKS * 3
+
+
+def as_landmark_array(frames) -> np.ndarray:
+    """
+    Convert landmark frames to a float32 array shaped (frames, 21, 3)
+    
+    Args:
+        frames: Nested sequence or array shaped (N, 21, 3), or (N, 21, 2)
+            without depth (z is then 0, as in lib/gesture.ts)
+            
+    Returns:
+        Float32 array shaped (N, 21, 3) (MediaPipe's own precision)
+        
+    Raises:
+        ValueError: If the frames are ragged or not 21 landmarks of 2-3 coordinates
+    """
+    array = np.asarray(frames, dtype=np.float32)
+    if array.ndim != 3 or array.shape[1] != NUM_LANDMARKS or array.shape[2] not in (2, 3):
+        raise ValueError(
+            f"Expected frames shaped (N, {NUM_LANDMARKS}, 3) or (N, {NUM_LANDMARKS}, 2), got {array.shape}"
+        )
+    if array.shape[2] == 2:
+        array = np.concatenate([array, np.zeros(array.shape[:2] + (1,), dtype=np.float32)], axis=2)
+    return array
+
+
+def finger_extension(frames: np.ndarray) -> np.ndarray:
+    """
+    Compute which fingers are extended in every frame at once
+    
+    Same rules as lib/gesture.ts:
+    - thumb: |tip - wrist| > |MCP - wrist| * 1.15
+    - other fingers: tip above PIP (smaller y) and
+      |tip - wrist| > |MCP - wrist| * 1.15
+      
+    Args:
+        frames: Landmarks shaped (N, 21, 3)
+        
+    Returns:
+        Boolean array shaped (N, 5) in FINGER_NAMES order
+    """
+    mcp, pip, tip = FINGER_JOINTS.T
+    # Squared distances to the wrist of only the landmarks the rules use,
+    # summed one coordinate plane at a time (much faster than reducing over a
+    # length-3 axis); comparing squares against RADIAL_RATIO ** 2 avoids the
+    # square roots
+    points = np.concatenate([[THUMB_MCP, THUMB_TIP], mcp, tip])
+    squared = None
+    for axis in range(3):
+        plane = frames[:, :, axis]
+        offsets = plane[:, points] - plane[:, WRIST:WRIST + 1]
+        offsets *= offsets
+        squared = offsets if squared is None else squared + offsets
+    ratio = np.float32(RADIAL_RATIO ** 2)
+    y = frames[:, :, 1]
+    
+    extended = np.empty((len(frames), 5), dtype=bool)
+    extended[:, 0] = squared[:, 1] > squared[:, 0] * ratio
+    extended[:, 1:] = (y[:, tip] < y[:, pip]) & (squared[:, 6:10] > squared[:, 2:6] * ratio)
+    return extended
+
+
+def gesture_codes(extended: np.ndarray) -> np.ndarray:
+    """
+    Map finger extension flags to gesture codes
+    
+    Args:
+        extended: Boolean array shaped (N, 5) from finger_extension
+        
+    Returns:
+        Integer array shaped (N,): 0 for no gesture, otherwise the index
+        into GESTURE_LABELS plus one
+    """
+    hello = extended.all(axis=1)
+    # Thumb and pinky out, index, middle and ring folded
+    help_sign = extended[:, 0] & extended[:, 4] & ~extended[:, 1:4].any(axis=1)
+    return np.where(hello, 1, np.where(help_sign, 2, 0))
+
+
+def gesture_labels(codes: np.ndarray) -> List[Optional[str]]:
+    """
+    Convert gesture codes to labels
+    
+    Args:
+        codes: Integer array from gesture_codes
+        
+    Returns:
+        "Hello", "Help" or None per code
+    """
+    return _LABELS[codes].tolist()
+
+
+def classify_frames(frames) -> List[Optional[str]]:
+    """
+    Classify every frame with the lib/gesture.ts rules in one vectorized pass
+    
+    Args:
+        frames: Landmarks shaped (N, 21, 3) or (N, 21, 2)
+        
+    Returns:
+        "Hello", "Help" or None per frame
+    """
+    return gesture_labels(gesture_codes(finger_extension(as_landmark_array(frames))))
+
+
+def parse_landmark_message(message: bytes) -> Tuple[int, np.ndarray]:
+    """
+    Read a binary landmark message without copying the landmarks
+    
+    Args:
+        message: FRAME_HEADER followed by frame count x 21 x 3 little-endian
+            float32 values (x, y, z per landmark). A count of 0 means no hand
+            was detected.
+            
+    Returns:
+        Tuple of (sequence number, read-only float32 array shaped (count, 21, 3)
+        backed by message)
+        
+    Raises:
+        ValueError: If the header or length is invalid
+    """
+    if len(message) < FRAME_HEADER.size:
+        raise ValueError(f"Message shorter than the {FRAME_HEADER.size}-byte header")
+    version, count, sequence = FRAME_HEADER.unpack_from(message)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported landmark message version {version}")
+    expected = FRAME_HEADER.size + count * FRAME_FLOATS * 4
+    if len(message) != expected:
+        raise ValueError(f"Expected {expected} bytes for {count} frames, got {len(message)}")
+    frames = np.frombuffer(message, dtype="<f4", count=count * FRAME_FLOATS, offset=FRAME_HEADER.size)
+    return sequence, frames.reshape(count, NUM_LANDMARKS, 3)
+
+
+class GestureSmoother:
+    """
+    Stabilize per-frame labels with a majority vote and hysteresis
+    
+    The labels of the last `window` frames are kept in a ring buffer with
+    running counts. A new label becomes the stable one once it holds
+    enter_ratio of the window. The stable label is kept until its share
+    drops below exit_ratio, so a label hovering around the threshold does
+    not flicker. When the stable label loses support and no other label has
+    enough votes, the stable label becomes None.
+    """
+    
+    def __init__(self, window: int = 15, enter_ratio: float = 0.6, exit_ratio: float = 0.4):
+        """
+        Initialize smoother
+        
+        Args:
+            window: Number of recent frames voting (15 is 0.5s at 30 fps)
+            enter_ratio: Share of the window a label needs to become stable
+            exit_ratio: Share below which the stable label is dropped
+        """
+        self.window = max(1, window)
+        self.enter_votes = max(1, int(np.ceil(enter_ratio * self.window)))
+        self.exit_votes = min(self.enter_votes, max(1, int(np.ceil(exit_ratio * self.window))))
+        self._labels: Deque[Hashable] = deque(maxlen=self.window)
+        self._counts: Counter = Counter()
+        self.label: Hashable = None
+    
+    def push(self, label: Hashable) -> bool:
+        """
+        Add the label of the next frame
+        
+        Args:
+            label: Frame label (None for no gesture)
+            
+        Returns:
+            True if the stable label changed
+        """
+        if len(self._labels) == self.window:
+            oldest = self._labels[0]
+            self._counts[oldest] -= 1
+            if not self._counts[oldest]:
+                del self._counts[oldest]
+        self._labels.append(label)
+        self._counts[label] += 1
+        
+        if self._counts[self.label] >= self.exit_votes:
+            return False
+        
+        candidate, votes = self._counts.most_common(1)[0]
+        new_label = candidate if votes >= self.enter_votes else None
+        if new_label == self.label:
+            return False
+        self.label = new_label
+        return True
+    
+    def confidence(self) -> float:
+        """
+        Get the share of the window agreeing with the stable label
+        
+        Returns:
+            Ratio between 0 and 1
+        """
+        return self._counts[self.label] / self.window
@@ -0,0 +1,212 @@
+"""
+Hedged requests: race a backup call against a slow primary
+"""
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Optional
+import asyncio
+import os
+import time
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies with cached percentiles"""
+    
+    def __init__(self, window: int = 500, refresh_every: int = 16):
+        """
+        Initialize tracker
+        
+        Args:
+            window: Number of most recent samples kept
+            refresh_every: Recompute cached percentiles after this many new samples
+        """
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: list = []
+        self._refresh_every = refresh_every
+        self._since_refresh = 0
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def record(self, seconds: float) -> None:
+        """
+        Add a latency sample
+        
+        Args:
+            seconds: Observed latency
+        """
+        self._samples.append(seconds)
+        self._since_refresh += 1
+    
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Get a latency percentile over the window
+        
+        Args:
+            p: Percentile (0-100)
+        
+        Returns:
+            Latency in seconds, or None without samples
+        """
+        if self._since_refresh >= self._refresh_every or len(self._sorted) != len(self._samples):
+            self._sorted = sorted(self._samples)
+            self._since_refresh = 0
+        if not self._sorted:
+            return None
+        index = min(len(self._sorted) - 1, int(len(self._sorted) * p / 100))
+        return self._sorted[index]
+
+
+class Hedger:
+    """
+    Send a hedge request once the primary is slower than usual
+    
+    The primary call starts immediately. If it has not finished after the
+    current percentile latency of recent primary calls, the hedge call is
+    started too. The first successful response wins and the other call is
+    cancelled. Hedges are capped at budget_percent of recent requests so a
+    slow period cannot double the upstream load.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        percentile: Optional[float] = None,
+        budget_percent: Optional[float] = None,
+        min_delay_ms: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        window: int = 500
+    ):
+        """
+        Initialize hedger (settings default to {NAME}_HEDGE_* environment variables)
+        
+        Args:
+            name: Upstream name, also the environment variable prefix (e.g. "coqui")
+            percentile: Primary latency percentile after which the hedge is sent
+            budget_percent: Max share of recent requests that may be hedged
+            min_delay_ms: Never hedge earlier than this
+            min_samples: Primary samples needed before hedging starts
+            window: Number of recent requests the threshold and budget cover
+        """
+        self.name = name
+        prefix = f"{name.upper()}_HEDGE_"
+        self.percentile = percentile or float(os.getenv(prefix + "PERCENTILE", "95"))
+        self.budget = (budget_percent if budget_percent is not None else float(
+            os.getenv(prefix + "BUDGET_PERCENT", "10")
+        )) / 100
+        self.min_delay = (min_delay_ms if min_delay_ms is not None else float(
+            os.getenv(prefix + "MIN_DELAY_MS", "50")
+        )) / 1000
+        self.min_samples = min_samples or int(os.getenv(prefix + "MIN_SAMPLES", "20"))
+        
+        self.latencies = LatencyTracker(window)
+        # Whether each recent request was hedged, for the budget
+        self._recent: Deque[bool] = deque(maxlen=window)
+        self._recent_hedged = 0
+        
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+    
+    def threshold(self) -> Optional[float]:
+        """
+        Get the current hedge delay
+        
+        Returns:
+            Seconds to wait for the primary before hedging, or None while warming up
+        """
+        if len(self.latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latencies.percentile(self.percentile))
+    
+    async def run(
+        self,
+        primary: Callable[[], Awaitable[Any]],
+        hedge: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run primary, racing hedge against it if primary is slow
+        
+        Args:
+            primary: Zero-argument coroutine function calling the primary backend
+            hedge: Zero-argument coroutine function calling the backup backend
+        
+        Returns:
+            Result of whichever call succeeded first
+        
+        Raises:
+            Exception: The primary's error if no call succeeded
+        """
+        self.requests += 1
+        started = time.monotonic()
+        delay = self.threshold()
+        primary_task = asyncio.ensure_future(primary())
+        hedge_task: Optional[asyncio.Future] = None
+        
+        try:
+            if delay is not None:
+                await asyncio.wait({primary_task}, timeout=delay)
+            
+            if not primary_task.done() and delay is not None:
+                if self._budget_allows():
+                    hedge_task = asyncio.ensure_future(hedge())
+                    self.hedged += 1
+                else:
+                    self.over_budget += 1
+            self._track_budget(hedge_task is not None)
+            
+            if hedge_task is None:
+                result = await primary_task
+                self.latencies.record(time.monotonic() - started)
+                return result
+            
+            pending = {primary_task, hedge_task}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            self.hedge_wins += 1
+                        # A cancelled primary still took at least this long
+                        self.latencies.record(time.monotonic() - started)
+                        return task.result()
+            # Both failed: report the primary's error
+            return primary_task.result()
+        finally:
+            for task in (primary_task, hedge_task):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    def stats(self) -> dict:
+        """
+        Get hedging counters
+        
+        Returns:
+            Dictionary with request, hedge and win counts plus current threshold
+        """
+        threshold = self.threshold()
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "over_budget": self.over_budget,
+            "budget_percent": self.budget * 100,
+            "percentile": self.percentile,
+            "threshold_ms": round(threshold * 1000, 1) if threshold is not None else None,
+            "p50_ms": self._percentile_ms(50),
+            "p99_ms": self._percentile_ms(99)
+        }
+    
+    def _budget_allows(self) -> bool:
+        # Count this request as part of the window it is checked against
+        return self._recent_hedged + 1 <= self.budget * (len(self._recent) + 1)
+    
+    def _track_budget(self, hedged: bool) -> None:
+        if len(self._recent) == self._recent.maxlen and self._recent[0]:
+            self._recent_hedged -= 1
+        self._recent.append(hedged)
+        self._recent_hedged += hedged
+    
+    def _percentile_ms(self, p: float) -> Optional[float]:
+        value = self.latencies.percentile(p)
+        return round(value * 1000, 1) if value is not None else None
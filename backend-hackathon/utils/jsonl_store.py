@@ -0,0 +1,94 @@
+"""
+Append-only JSONL data files of labelled records
+"""
+from typing import Any, Callable, List, Tuple
+import json
+import os
+import threading
+import numpy as np
+
+
+class LabeledJSONLStore:
+    """
+    Base for vocabularies kept as one labelled JSON record per line
+    
+    Subclasses turn records into their own arrays; this class reads and
+    appends the data file and maintains the label index they share: the
+    label of every record, the sorted distinct labels and each record's
+    label id. Raw records are stored so derived features can change later.
+    """
+    
+    # Name of one record in warnings about unreadable lines
+    record_name = "record"
+    
+    def __init__(self, path: str):
+        """
+        Initialize an empty store (subclasses call load() once set up)
+        
+        Args:
+            path: JSONL data file
+        """
+        self.path = path
+        
+        # Appends from request handlers must not interleave with rebuilds
+        self._lock = threading.Lock()
+        self.labels: List[str] = []
+        self._record_labels: List[str] = []
+        self._label_ids = np.zeros(0, dtype=np.int32)
+    
+    def count(self, label: str) -> int:
+        """
+        Get the number of records stored for a label
+        
+        Args:
+            label: Sign name
+            
+        Returns:
+            Record count
+        """
+        with self._lock:
+            return self._record_labels.count(label)
+    
+    def _read_records(self, parse: Callable[[dict], Any]) -> Tuple[List[str], List[Any]]:
+        """
+        Parse every record of the data file, skipping unreadable lines with a warning
+        
+        Args:
+            parse: Turns a record into the subclass's value; raises ValueError,
+                KeyError or TypeError for an invalid record
+                
+        Returns:
+            Tuple of (label per record, parsed value per record)
+        """
+        labels: List[str] = []
+        values: List[Any] = []
+        if not os.path.exists(self.path):
+            return labels, values
+        
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    label = str(record["label"])
+                    value = parse(record)
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"⚠️ Skipping {self.record_name} {self.path}:{line_number}: {e}")
+                    continue
+                labels.append(label)
+                values.append(value)
+        return labels, values
+    
+    def _append_records(self, records: List[dict]) -> None:
+        """Append records to the data file (lock held)"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+    
+    def _index_labels(self, record_labels: List[str]) -> None:
+        """Rebuild the label index for a new list of record labels (lock held)"""
+        labels, label_ids = np.unique(np.array(record_labels, dtype=object), return_inverse=True)
+        self._record_labels = record_labels
+        self.labels = [str(label) for label in labels]
+        self._label_ids = label_ids.astype(np.int32).reshape(-1)
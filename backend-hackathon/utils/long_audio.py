@@ -0,0 +1,130 @@
+"""
+Splitting long recordings at silences and stitching chunk transcripts
+"""
+from typing import List, Optional, Tuple
+import math
+import re
+import numpy as np
+
+_WORD = re.compile(r"[\w']+")
+
+
+def plan_chunks(
+    pcm: bytes,
+    sample_rate: int = 16000,
+    target_seconds: float = 30.0,
+    max_seconds: float = 45.0,
+    overlap_seconds: float = 1.0,
+    frame_ms: int = 20,
+    smooth_ms: int = 300
+) -> List[Tuple[int, int]]:
+    """
+    Choose chunk boundaries for parallel transcription
+    
+    Each cut is placed at the quietest point between target_seconds and
+    max_seconds after the previous cut (energy smoothed over smooth_ms), so
+    words are rarely split. Every chunk after the first starts
+    overlap_seconds before its cut, so a word cut anyway appears whole in
+    one of the two chunks.
+    
+    Args:
+        pcm: 16-bit little-endian mono samples
+        sample_rate: Sample rate in Hz
+        target_seconds: Preferred minimum chunk length
+        max_seconds: Maximum chunk length (excluding overlap)
+        overlap_seconds: Audio repeated at the start of each following chunk
+        frame_ms: Energy analysis frame length
+        smooth_ms: Window over which frame energy is averaged to find pauses
+        
+    Returns:
+        (start, end) byte offsets into pcm of each chunk, in order
+    """
+    samples = np.frombuffer(pcm[:len(pcm) // 2 * 2], dtype="<i2")
+    frame = sample_rate * frame_ms // 1000
+    count = len(samples) // frame
+    total_seconds = len(samples) / sample_rate
+    if count == 0 or total_seconds <= max_seconds:
+        return [(0, len(samples) * 2)]
+    
+    energy = np.mean(samples[:count * frame].reshape(count, frame).astype(np.float32) ** 2, axis=1)
+    width = max(1, smooth_ms // frame_ms)
+    smoothed = np.convolve(energy, np.ones(width) / width, mode="same")
+    
+    frames_per_second = 1000 / frame_ms
+    target = int(target_seconds * frames_per_second)
+    longest = int(max_seconds * frames_per_second)
+    
+    cuts = [0]
+    while count - cuts[-1] > longest:
+        low, high = cuts[-1] + target, cuts[-1] + longest
+        cuts.append(low + int(np.argmin(smoothed[low:high])))
+    
+    overlap = int(overlap_seconds * sample_rate)
+    boundaries = [cut * frame for cut in cuts[1:]] + [len(samples)]
+    chunks = []
+    start = 0
+    for end in boundaries:
+        chunks.append((max(0, start - overlap) * 2, end * 2))
+        start = end
+    chunks[0] = (0, chunks[0][1])
+    return chunks
+
+
+def stitch_transcripts(
+    transcripts: List[str],
+    chunks: List[Tuple[int, int]],
+    max_overlap_words: int = 12
+) -> str:
+    """
+    Join chunk transcripts, removing words repeated across each seam
+    
+    The overlap is the longest run of words (compared case- and
+    punctuation-insensitively) that ends one transcript and starts the next.
+    Only words that can fall inside the overlapping audio are compared: each
+    side's window is its share of the chunk's words spoken during the
+    overlap, plus one for a word cut at the edge, so genuine repetitions
+    further from the seam are kept.
+    
+    Args:
+        transcripts: Transcripts of consecutive overlapping chunks
+        chunks: (start, end) offsets of each chunk, as returned by plan_chunks
+        max_overlap_words: Longest repeated run looked for at a seam
+        
+    Returns:
+        Combined transcript
+    """
+    result: List[str] = []
+    previous: Optional[Tuple[int, int, int]] = None  # (chunk index, word count, end offset)
+    for index, (transcript, (start, end)) in enumerate(zip(transcripts, chunks)):
+        words = transcript.split()
+        if not words:
+            previous = None
+            continue
+        
+        skip = 0
+        if previous is not None and previous[0] == index - 1:
+            _, previous_words, previous_end = previous
+            previous_start = chunks[index - 1][0]
+            overlap = previous_end - start
+            if overlap > 0:
+                tail_size = _words_in(previous_words, overlap, previous_end - previous_start, max_overlap_words)
+                head_size = _words_in(len(words), overlap, end - start, max_overlap_words)
+                tail = [_normalize(word) for word in result[-tail_size:]]
+                head = [_normalize(word) for word in words[:head_size]]
+                for size in range(min(len(tail), len(head)), 0, -1):
+                    if tail[-size:] == head[:size] and any(tail[-size:]):
+                        skip = size
+                        break
+        
+        result.extend(words[skip:])
+        previous = (index, len(words) - skip, end)
+    return " ".join(result)
+
+
+def _words_in(word_count: int, overlap: int, length: int, limit: int) -> int:
+    # Words expected in the overlapping part at the chunk's average speaking rate
+    return min(limit, word_count, math.ceil(word_count * overlap / max(1, length)) + 1)
+
+
+def _normalize(word: str) -> str:
+    return "".join(_WORD.findall(word.lower()))
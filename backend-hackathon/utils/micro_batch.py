@@ -0,0 +1,154 @@
+"""
+Dynamic micro-batching of concurrent calls to a blocking batch function
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+import asyncio
+import time
+
+
+class MicroBatcher:
+    """
+    Group concurrent submissions into single calls of a batch function
+    
+    The first item of a batch waits at most max_wait_ms for others to join.
+    The batch is flushed as soon as it reaches max_batch_size or that
+    deadline passes. Batches run one at a time on a dedicated thread, so
+    items submitted during an inference form the next batch and are
+    flushed immediately after it. Under load, batches therefore grow
+    without adding latency.
+    """
+    
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20.0,
+        name: str = "batch"
+    ):
+        """
+        Initialize batcher
+        
+        Args:
+            fn: Blocking function mapping a list of items to a list of results
+                in the same order
+            max_batch_size: Largest number of items per call
+            max_wait_ms: Longest time an item waits for a batch to fill
+            name: Thread name prefix of the inference thread
+        """
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        
+        # (item, future, submitted at) in arrival order
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._arrived: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        
+        self.batches = 0
+        self.items = 0
+        self.full_flushes = 0
+        self.largest_batch = 0
+        self.total_run_seconds = 0.0
+    
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its result
+        
+        Args:
+            item: Input passed to the batch function
+            
+        Returns:
+            Result of the batch function for this item
+            
+        Raises:
+            Exception: Whatever the batch function raised for the batch
+        """
+        loop = asyncio.get_running_loop()
+        self._ensure_runner(loop)
+        future = loop.create_future()
+        self._pending.append((item, future, time.monotonic()))
+        self._arrived.set()
+        return await future
+    
+    def _ensure_runner(self, loop: asyncio.AbstractEventLoop) -> None:
+        # The runner is tied to the loop it was started on (e.g. app restarts in tests)
+        if self._runner is None or self._runner.done() or self._runner.get_loop() is not loop:
+            self._pending = []
+            self._arrived = asyncio.Event()
+            self._runner = loop.create_task(self._run())
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._arrived.clear()
+                await self._arrived.wait()
+            
+            # Wait for the batch to fill, up to the oldest item's deadline
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            # Callers that timed out or disconnected while queued are skipped
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                continue
+            
+            if len(batch) == self.max_batch_size:
+                self.full_flushes += 1
+            started = time.monotonic()
+            try:
+                results = await loop.run_in_executor(self._executor, self.fn, [item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                self.total_run_seconds += time.monotonic() - started
+    
+    def stats(self) -> dict:
+        """
+        Get batching counters
+        
+        Returns:
+            Dictionary with batch counts, sizes, queue depth and run time
+        """
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": len(self._pending),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else None,
+            "largest_batch": self.largest_batch,
+            "full_flushes": self.full_flushes,
+            "avg_batch_ms": round(self.total_run_seconds / self.batches * 1000, 1) if self.batches else None
+        }
+    
+    def close(self) -> None:
+        """Stop the runner and fail queued items"""
+        if self._runner is not None and not self._runner.done():
+            self._runner.cancel()
+        for _, future, _ in self._pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher closed"))
+        self._pending = []
+        self._executor.shutdown(wait=False, cancel_futures=True)
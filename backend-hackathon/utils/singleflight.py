@@ -0,0 +1,94 @@
+"""
+Single-flight coalescing of identical concurrent async calls
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Flight:
+    """A shared upstream call and the number of callers waiting on it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between concurrent callers with the same key
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same result (or exception). A caller that is
+    cancelled only stops waiting - the shared call is cancelled once no
+    callers are left waiting on it.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._flights: Dict[Hashable, _Flight] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once per key among concurrent callers
+
+        Args:
+            key: Request key identifying identical calls
+            fn: Zero-argument coroutine function performing the upstream call
+
+        Returns:
+            Result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            self.calls += 1
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finish(key, task))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # This caller was cancelled; stop the upstream call if nobody else needs it
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def in_flight(self) -> int:
+        """
+        Get number of distinct calls currently running
+
+        Returns:
+            Count of in-flight keys
+        """
+        return len(self._flights)
+
+    def stats(self) -> dict:
+        """
+        Get coalescing counters
+
+        Returns:
+            Dictionary with upstream call, coalesced call and in-flight counts
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights),
+        }
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._flights.get(key) is not None and self._flights[key].task is task:
+            del self._flights[key]
+        # Mark the exception as retrieved when every waiter has gone away
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,94 @@
+"""
+ASGI middleware rejecting oversized request bodies before they are buffered
+"""
+from typing import Iterable
+import json
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject request bodies over max_bytes on the given path prefixes with 413
+    
+    Multipart uploads are parsed and spooled in full before route handlers
+    run, so the limit is enforced here: from Content-Length before reading
+    the body, and by counting bytes while it streams in for chunked uploads.
+    """
+    
+    def __init__(self, app, max_bytes: int, path_prefixes: Iterable[str]):
+        """
+        Wrap an ASGI app
+        
+        Args:
+            app: ASGI application
+            max_bytes: Largest accepted request body
+            path_prefixes: Only requests to one of these paths or below it are limited
+        """
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = tuple(prefix.rstrip("/") for prefix in path_prefixes)
+        
+        self.rejected = 0
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._limited(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_bytes:
+                    await self._reject(send)
+                    return
+                break
+        
+        received = 0
+        exceeded = False
+        response_started = False
+        
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Make the app stop reading as if the client went away
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+        
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded and not response_started:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        
+        if exceeded and not response_started:
+            await self._reject(send)
+    
+    def _limited(self, path: str) -> bool:
+        # Match whole path segments so /stt covers /stt/ws but not /sttx
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.path_prefixes)
+    
+    async def _reject(self, send) -> None:
+        self.rejected += 1
+        body = json.dumps({
+            "detail": f"Request body too large. Maximum size: {self.max_bytes // (1024 * 1024)}MB"
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
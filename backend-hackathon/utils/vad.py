@@ -0,0 +1,170 @@
+"""
+Energy-based voice activity detection for streamed PCM audio
+"""
+from collections import deque
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+class VADSegmenter:
+    """
+    Split a stream of 16-bit mono PCM into utterances using frame energy
+
+    A frame is speech when its level exceeds both an absolute floor and an
+    adaptive noise estimate by a margin. An utterance opens on the first
+    speech frame (with a short pre-roll from a ring buffer so onsets are not
+    clipped) and closes after a run of silent frames or at a maximum length.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        threshold_db: float = -45.0,
+        noise_margin_db: float = 10.0,
+        preroll_ms: int = 300,
+        hangover_ms: int = 600,
+        min_speech_ms: int = 250,
+        max_utterance_s: float = 15.0,
+        noise_window_s: float = 5.0
+    ):
+        """
+        Initialize segmenter
+
+        Args:
+            sample_rate: Sample rate of the incoming PCM
+            frame_ms: Analysis frame length in milliseconds
+            threshold_db: Absolute level (dBFS) below which frames are always silence
+            noise_margin_db: Margin above the running noise floor required for speech
+            preroll_ms: Audio kept before speech onset
+            hangover_ms: Silence needed to close an utterance
+            min_speech_ms: Utterances with less speech than this are discarded
+            max_utterance_s: Utterances are force-closed at this length
+            noise_window_s: The noise floor is at least the quietest frame
+                level of this many recent seconds
+        """
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * 2
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_utterance_frames = int(max_utterance_s * 1000) // frame_ms
+
+        self._pending = bytearray()
+        self._preroll: deque = deque(maxlen=max(1, preroll_ms // frame_ms))
+        self._noise_floor_db = threshold_db
+        # Recent frame levels for the minimum-statistics noise estimate
+        self._recent_levels: deque = deque(maxlen=max(1, int(noise_window_s * 1000) // frame_ms))
+        self._utterance: Optional[List[bytes]] = None
+        self._speech_frames = 0
+        self._silent_run = 0
+
+        # Id of the most recently opened utterance
+        self.utterance_id = 0
+
+    @property
+    def in_speech(self) -> bool:
+        """Whether an utterance is currently open"""
+        return self._utterance is not None
+
+    @property
+    def speech_seconds(self) -> float:
+        """Amount of speech in the open utterance, in seconds"""
+        return self._speech_frames * self.frame_samples / self.sample_rate
+
+    def current_audio(self) -> bytes:
+        """
+        Get the PCM of the open utterance so far
+
+        Returns:
+            PCM bytes (empty if no utterance is open)
+        """
+        return b"".join(self._utterance) if self._utterance else b""
+
+    def feed(self, pcm: bytes) -> List[Tuple[int, bytes]]:
+        """
+        Add PCM to the stream
+
+        Args:
+            pcm: 16-bit little-endian mono samples (any length)
+
+        Returns:
+            (utterance_id, PCM) of every utterance closed by this chunk, in order
+        """
+        self._pending.extend(pcm)
+        usable = len(self._pending) - len(self._pending) % self.frame_bytes
+        if usable == 0:
+            return []
+
+        block = bytes(self._pending[:usable])
+        del self._pending[:usable]
+
+        samples = np.frombuffer(block, dtype="<i2").reshape(-1, self.frame_samples)
+        rms = np.sqrt(np.mean(samples.astype(np.float32) ** 2, axis=1))
+        levels_db = 20.0 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+
+        closed = []
+        for index, level_db in enumerate(levels_db):
+            frame = block[index * self.frame_bytes:(index + 1) * self.frame_bytes]
+            utterance = self._process_frame(frame, float(level_db))
+            if utterance is not None:
+                closed.append(utterance)
+        return closed
+
+    def flush(self) -> List[Tuple[int, bytes]]:
+        """
+        Close the open utterance at end of stream
+
+        Returns:
+            (utterance_id, PCM) of the final utterance, if it contained enough speech
+        """
+        self._pending.clear()
+        utterance = self._close()
+        return [utterance] if utterance is not None else []
+
+    def _process_frame(self, frame: bytes, level_db: float) -> Optional[Tuple[int, bytes]]:
+        # Speech keeps dipping between words, so the quietest recent frame
+        # tracks the background even while every frame counts as speech; a
+        # steady hum raises it within noise_window_s and stops being speech
+        self._recent_levels.append(level_db)
+        noise_floor_db = max(self._noise_floor_db, min(self._recent_levels))
+        is_speech = level_db > max(self.threshold_db, noise_floor_db + self.noise_margin_db)
+
+        if not is_speech:
+            # Follow background noise smoothly between utterances
+            self._noise_floor_db = 0.95 * self._noise_floor_db + 0.05 * level_db
+
+        if self._utterance is None:
+            if is_speech:
+                self._utterance = list(self._preroll) + [frame]
+                self._preroll.clear()
+                self.utterance_id += 1
+                self._speech_frames = 1
+                self._silent_run = 0
+            else:
+                self._preroll.append(frame)
+            return None
+
+        self._utterance.append(frame)
+        if is_speech:
+            self._speech_frames += 1
+            self._silent_run = 0
+        else:
+            self._silent_run += 1
+
+        if self._silent_run >= self.hangover_frames or len(self._utterance) >= self.max_utterance_frames:
+            return self._close()
+        return None
+
+    def _close(self) -> Optional[Tuple[int, bytes]]:
+        utterance, speech_frames = self._utterance, self._speech_frames
+        self._utterance = None
+        self._speech_frames = 0
+        self._silent_run = 0
+
+        if utterance is None or speech_frames < self.min_speech_frames:
+            return None
+
+        return self.utterance_id, b"".join(utterance)